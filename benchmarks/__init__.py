@@ -0,0 +1 @@
+"""Benchmarks do Sistema Multi-Agente"""
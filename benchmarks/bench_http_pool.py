@@ -0,0 +1,70 @@
+"""Benchmark: WeatherAgent com e sem o pool HTTP compartilhado.
+
+Usa um servidor stub local para isolar o custo de conexão da latência real
+da API. Sem pool, cada request abre um novo ``httpx.AsyncClient``.
+
+Uso:
+    python -m benchmarks.bench_http_pool --requests 500 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+from src.agents.weather_agent import WeatherAgent
+from src.utils.http import create_http_client
+from tests.stub_server import StubServer
+
+
+async def run_requests(agent: WeatherAgent, total: int, concurrency: int) -> float:
+    """Dispara ``total`` consultas com no máximo ``concurrency`` simultâneas."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            # Chama a API diretamente para medir o custo de conexão sem o cache de observações
+            await agent._fetch_current(-23.5505, -46.6333)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return total / (time.perf_counter() - started)
+
+
+async def run(total: int, concurrency: int):
+    with StubServer() as stub:
+        os.environ["WEATHER_API_BASE_URL"] = stub.url("/v1/forecast")
+
+        agent = WeatherAgent()
+        stub.connections = 0
+        without_pool = await run_requests(agent, total, concurrency)
+        connections_without = stub.connections
+
+        http_client = create_http_client()
+        await agent.startup(http_client)
+        stub.connections = 0
+        try:
+            with_pool = await run_requests(agent, total, concurrency)
+        finally:
+            await agent.shutdown()
+            await http_client.aclose()
+        connections_with = stub.connections
+
+    print(f"sem pool: {without_pool:8.1f} req/s  ({connections_without} conexões)")
+    print(f"com pool: {with_pool:8.1f} req/s  ({connections_with} conexões)")
+    print(f"ganho:    {with_pool / without_pool:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    asyncio.run(run(args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Benchmark: custo de setup por request (frio) vs orquestrador reutilizado (quente).
+
+Uso:
+    python -m benchmarks.bench_orchestrator --iterations 50
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import time
+
+os.environ.setdefault("LLM_PROVIDER", "openai")
+os.environ.setdefault("LLM_API_KEY", "bench-dummy-key")
+# Mede o grafo, não o cache de respostas finais
+os.environ.setdefault("RESPONSE_CACHE_ENABLED", "false")
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from src.orchestrator.main import (
+    Orchestrator, create_agents, create_initial_state, create_orchestrator, get_llm
+)
+
+QUERY = "O que é MCP?"
+
+
+def fake_llm() -> FakeListChatModel:
+    """LLM local que sempre roteia para o info_agent (sem rede)."""
+    return FakeListChatModel(responses=["info_agent"])
+
+
+async def cold_request() -> float:
+    """Reproduz o caminho antigo: LLM, agentes e grafo recriados a cada query."""
+    started = time.perf_counter()
+    get_llm()
+    agents = create_agents()
+    app = create_orchestrator(fake_llm(), agents)
+    await app.ainvoke(create_initial_state(QUERY))
+    return time.perf_counter() - started
+
+
+async def warm_request(orchestrator: Orchestrator) -> float:
+    """Query servida pelo orquestrador já aquecido."""
+    started = time.perf_counter()
+    await orchestrator.process_query(QUERY)
+    return time.perf_counter() - started
+
+
+def summarize(label: str, samples: list) -> str:
+    ms = sorted(s * 1000 for s in samples)
+    p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+    return f"{label:<6} média={statistics.mean(ms):8.3f}ms  p50={statistics.median(ms):8.3f}ms  p95={p95:8.3f}ms"
+
+
+async def run(iterations: int):
+    cold = [await cold_request() for _ in range(iterations)]
+    
+    orchestrator = Orchestrator(llm=fake_llm())
+    await orchestrator.start()
+    try:
+        await warm_request(orchestrator)
+        warm = [await warm_request(orchestrator) for _ in range(iterations)]
+    finally:
+        await orchestrator.stop()
+    
+    print(summarize("frio", cold))
+    print(summarize("quente", warm))
+    print(f"speedup: {statistics.mean(cold) / statistics.mean(warm):.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+    
+    logging.disable(logging.INFO)
+    asyncio.run(run(args.iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Benchmark: agregações do DataAgent sobre travel_bookings vs contadores de resumo.
+
+Gera reservas sintéticas com ``benchmarks.datagen``, mede as consultas
+originais (COUNT/GROUP BY sobre a tabela inteira) e as mesmas perguntas
+respondidas por ``booking_counters``, mantida por triggers.
+
+Uso:
+    python -m benchmarks.bench_summary --rows 1000000 --iterations 20
+"""
+
+import argparse
+import logging
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from benchmarks.datagen import generate_bookings
+from src.agents.data_agent import (
+    BOOKING_INDEXES, BOOKING_SUMMARY, QUERY_TEMPLATES, SUMMARY_TEMPLATES
+)
+from src.utils.index_advisor import apply_indexes
+
+
+def timed(conn: sqlite3.Connection, sql: str, iterations: int) -> list:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        conn.execute(sql).fetchall()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def run(rows: int, iterations: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        started = time.perf_counter()
+        generate_bookings(path, rows)
+        conn = sqlite3.connect(path)
+        print(f"{rows} reservas geradas em {time.perf_counter() - started:.1f}s")
+
+        baseline = {name: timed(conn, QUERY_TEMPLATES.get(name).sql, iterations) for name in SUMMARY_TEMPLATES}
+
+        started = time.perf_counter()
+        apply_indexes(conn, "travel_bookings", BOOKING_INDEXES + [BOOKING_SUMMARY], {})
+        print(f"índices e contadores criados em {time.perf_counter() - started:.1f}s")
+
+        indexed = {name: timed(conn, QUERY_TEMPLATES.get(name).sql, iterations) for name in SUMMARY_TEMPLATES}
+        summary = {
+            name: timed(conn, QUERY_TEMPLATES.get(summary_name).sql, iterations)
+            for name, summary_name in SUMMARY_TEMPLATES.items()
+        }
+
+        print(f"{'consulta':<18}{'tabela':>12}{'com índices':>14}{'resumo':>12}{'speedup':>10}")
+        for name in SUMMARY_TEMPLATES:
+            table_ms = statistics.median(baseline[name]) * 1000
+            indexed_ms = statistics.median(indexed[name]) * 1000
+            summary_ms = statistics.median(summary[name]) * 1000
+            print(
+                f"{name:<18}{table_ms:10.3f}ms{indexed_ms:12.3f}ms{summary_ms:10.3f}ms"
+                f"{table_ms / summary_ms:9.0f}x"
+            )
+
+        # Custo dos triggers na escrita
+        started = time.perf_counter()
+        with conn:
+            conn.executemany(
+                "INSERT INTO travel_bookings (customer_name, destination, booking_date) VALUES (?, ?, ?)",
+                ((f"Cliente {i}", "Paris", "2025-01-01") for i in range(10_000))
+            )
+        print(f"10000 inserts com triggers: {time.perf_counter() - started:.2f}s")
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    run(args.rows, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
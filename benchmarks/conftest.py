@@ -0,0 +1,90 @@
+"""Fixtures da suíte de benchmarks (pytest-benchmark).
+
+O tamanho do banco vem de ``BENCH_ROWS`` (padrão 100000; de 10 mil a 10
+milhões) e os bancos gerados ficam em ``BENCH_DB_DIR`` para serem reusados
+entre execuções.
+"""
+
+import asyncio
+import os
+import shutil
+import sqlite3
+import tempfile
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from benchmarks.datagen import generate_bookings
+from src.agents.data_agent import DataAgent
+from src.utils.sqlite_executor import shutdown_executor
+from src.utils.sqlite_pool import close_all_pools
+
+BENCH_SEED = 42
+
+
+def _row_count(path: str) -> int:
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            return conn.execute("SELECT COUNT(*) FROM travel_bookings").fetchone()[0]
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return -1
+
+
+@pytest.fixture(scope="session")
+def bench_rows() -> int:
+    return int(os.getenv("BENCH_ROWS", "100000"))
+
+
+@pytest.fixture(scope="session")
+def bench_dir() -> str:
+    path = os.getenv("BENCH_DB_DIR", os.path.join(tempfile.gettempdir(), "super_agent_bench"))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+@pytest.fixture(scope="session")
+def bookings_db(bench_rows, bench_dir) -> str:
+    """Banco só com ``travel_bookings`` (sem índices), gerado uma vez por tamanho."""
+    path = os.path.join(bench_dir, f"bookings-{bench_rows}-{BENCH_SEED}.db")
+    if _row_count(path) != bench_rows:
+        generate_bookings(path, bench_rows, seed=BENCH_SEED)
+    return path
+
+
+@pytest.fixture(scope="session")
+def indexed_db(bookings_db, bench_dir, loop) -> str:
+    """Cópia do banco com os índices, FTS e contadores criados pelo DataAgent."""
+    path = bookings_db.replace(".db", "-indexed.db")
+    if _row_count(path) != _row_count(bookings_db):
+        shutil.copyfile(bookings_db, path)
+        agent = DataAgent()
+        agent.db_path = path
+        loop.run_until_complete(agent.ensure_indexes(summary=True))
+        close_all_pools()
+    return path
+
+
+@pytest.fixture(scope="session")
+def loop():
+    """Event loop compartilhado pelos benchmarks assíncronos."""
+    loop = asyncio.new_event_loop()
+    yield loop
+    shutdown_executor()
+    close_all_pools()
+    loop.close()
+
+
+@pytest.fixture(params=["plain", "indexed"])
+def data_agent(request, bookings_db, indexed_db, loop) -> DataAgent:
+    """DataAgent sobre o banco sem índices (``plain``) ou preparado (``indexed``)."""
+    agent = DataAgent()
+    if request.param == "plain":
+        agent.db_path = bookings_db
+    else:
+        agent.db_path = indexed_db
+        loop.run_until_complete(agent.startup())
+    return agent
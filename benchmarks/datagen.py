@@ -0,0 +1,154 @@
+"""Gerador determinístico de reservas sintéticas para ``travel_bookings``.
+
+Destinos e clientes seguem distribuições de Zipf (poucos destinos e clientes
+concentram a maior parte das reservas) e as datas têm picos nas férias de
+janeiro, julho e dezembro. A mesma semente sempre gera o mesmo banco.
+
+Uso:
+    python -m benchmarks.datagen --rows 1000000 --output travel_agency.db
+"""
+
+import argparse
+import itertools
+import os
+import random
+import sqlite3
+import time
+from datetime import date, timedelta
+from typing import Iterator, List, Tuple
+
+DESTINATIONS = [
+    "Paris", "Lisboa", "Rio de Janeiro", "Nova York", "Roma", "Londres", "Salvador",
+    "Buenos Aires", "Orlando", "Madri", "Florianópolis", "Cancún", "Santiago", "Recife",
+    "Barcelona", "Tóquio", "Gramado", "Fortaleza", "Amsterdã", "Porto", "Natal",
+    "Dubai", "Miami", "Berlim", "Foz do Iguaçu", "Bariloche", "Cusco", "Maceió",
+    "Praga", "Viena", "Cidade do Cabo", "Sydney", "Bonito", "Veneza", "Istambul",
+    "Manaus", "Punta Cana", "Atenas", "Montevidéu", "Fernando de Noronha",
+]
+
+FIRST_NAMES = [
+    "Ana", "Bruno", "Carla", "Daniel", "Eduarda", "Felipe", "Gabriela", "Henrique",
+    "Isabela", "João", "Larissa", "Marcos", "Natália", "Otávio", "Paula", "Rafael",
+    "Sofia", "Thiago", "Vitória", "Lucas", "Mariana", "Pedro", "Juliana", "Gustavo",
+]
+
+LAST_NAMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira",
+    "Lima", "Gomes", "Costa", "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes",
+    "Soares", "Fernandes", "Vieira", "Barbosa", "Rocha", "Dias", "Nascimento", "Moreira",
+]
+
+# Peso relativo de cada mês (alta temporada em janeiro, julho e dezembro)
+MONTH_WEIGHTS = [1.6, 1.1, 0.9, 0.8, 0.8, 0.9, 1.5, 1.1, 0.8, 0.9, 1.0, 1.6]
+
+START_DATE = date(2023, 1, 1)
+DAYS = 730
+
+BATCH_SIZE = 50_000
+
+
+def zipf_cum_weights(n: int, s: float) -> List[float]:
+    """Pesos acumulados de uma Zipf com expoente ``s`` sobre ``n`` itens."""
+    return list(itertools.accumulate(1 / (rank ** s) for rank in range(1, n + 1)))
+
+
+def customer_names(count: int, rng: random.Random) -> List[str]:
+    """Gera ``count`` nomes de clientes distintos e reprodutíveis."""
+    combos = [f"{first} {last}" for first in FIRST_NAMES for last in LAST_NAMES]
+    rng.shuffle(combos)
+    return [
+        combos[i % len(combos)] + (f" {i // len(combos) + 1}" if i >= len(combos) else "")
+        for i in range(count)
+    ]
+
+
+def iter_bookings(
+    rows: int,
+    seed: int = 42,
+    customers: int = None,
+    destination_skew: float = 1.1,
+    customer_skew: float = 0.8
+) -> Iterator[List[Tuple[str, str, str]]]:
+    """Produz as reservas em lotes de ``BATCH_SIZE`` tuplas (cliente, destino, data).
+
+    Args:
+        rows: Total de reservas
+        seed: Semente do gerador pseudoaleatório
+        customers: Clientes distintos (padrão: ``rows // 20``, mínimo 10)
+        destination_skew: Expoente da Zipf dos destinos
+        customer_skew: Expoente da Zipf dos clientes
+    """
+    rng = random.Random(seed)
+    names = customer_names(customers or max(10, rows // 20), rng)
+    customer_weights = zipf_cum_weights(len(names), customer_skew)
+    destination_weights = zipf_cum_weights(len(DESTINATIONS), destination_skew)
+    dates = [START_DATE + timedelta(days=day) for day in range(DAYS)]
+    date_weights = list(itertools.accumulate(MONTH_WEIGHTS[d.month - 1] for d in dates))
+    date_strings = [d.isoformat() for d in dates]
+
+    for start in range(0, rows, BATCH_SIZE):
+        count = min(BATCH_SIZE, rows - start)
+        yield list(zip(
+            rng.choices(names, cum_weights=customer_weights, k=count),
+            rng.choices(DESTINATIONS, cum_weights=destination_weights, k=count),
+            rng.choices(date_strings, cum_weights=date_weights, k=count),
+        ))
+
+
+def generate_bookings(
+    path: str,
+    rows: int,
+    seed: int = 42,
+    customers: int = None,
+    destination_skew: float = 1.1,
+    customer_skew: float = 0.8
+) -> str:
+    """Cria (ou recria) ``travel_bookings`` em ``path`` com ``rows`` reservas.
+
+    Os parâmetros seguem ``iter_bookings``.
+
+    Returns:
+        Caminho do banco gerado
+    """
+    if os.path.exists(path):
+        os.remove(path)
+
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute(
+            "CREATE TABLE travel_bookings ("
+            "id INTEGER PRIMARY KEY, customer_name TEXT, destination TEXT, booking_date TEXT)"
+        )
+        with conn:
+            for batch in iter_bookings(rows, seed, customers, destination_skew, customer_skew):
+                conn.executemany(
+                    "INSERT INTO travel_bookings (customer_name, destination, booking_date) VALUES (?, ?, ?)",
+                    batch
+                )
+    finally:
+        conn.close()
+
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="reservas a gerar (ex: 10000 a 10000000)")
+    parser.add_argument("--output", default="travel_agency.db", help="arquivo SQLite de saída")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--customers", type=int, default=None, help="clientes distintos (padrão: rows/20)")
+    parser.add_argument("--destination-skew", type=float, default=1.1, help="expoente da Zipf dos destinos")
+    parser.add_argument("--customer-skew", type=float, default=0.8, help="expoente da Zipf dos clientes")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    generate_bookings(
+        args.output, args.rows, args.seed, args.customers, args.destination_skew, args.customer_skew
+    )
+    print(f"{args.rows} reservas geradas em {args.output} ({time.perf_counter() - started:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Benchmarks do DataAgent e da ferramenta MCP query_database.
+
+Cobre todos os padrões de consulta do DataAgent, com e sem os índices e
+contadores criados no startup. Uso:
+
+    pytest benchmarks/ --benchmark-only
+    BENCH_ROWS=1000000 pytest benchmarks/ --benchmark-only --benchmark-autosave
+"""
+
+import pytest
+
+from src.mcp import server
+
+# Pergunta do usuário -> template esperado (sem índices, com índices)
+QUERIES = {
+    "Quantas reservas temos?": ("count_bookings", "count_bookings_summary"),
+    "Qual o destino mais popular?": ("top_destination", "top_destination_summary"),
+    "Mostre as últimas 20 reservas": ("latest_bookings", "latest_bookings"),
+    "Reservas para Lisboa": ("bookings_by_destination", "bookings_by_destination_fts"),
+    "Reservas para Rio": ("bookings_by_destination", "bookings_by_destination_fts"),
+    "Qual cliente tem mais reservas?": ("top_customer", "top_customer_summary"),
+    "Mostre reservas": ("sample_bookings", "sample_bookings"),
+}
+
+# Consultas SQL enviadas diretamente ao query_database
+MCP_QUERIES = {
+    "count": "SELECT COUNT(*) FROM travel_bookings",
+    "group_by_destination": "SELECT destination, COUNT(*) FROM travel_bookings GROUP BY destination",
+    "range_scan": "SELECT * FROM travel_bookings WHERE booking_date >= '2024-12-01'",
+}
+
+
+@pytest.mark.parametrize("query", list(QUERIES))
+def test_data_agent(benchmark, data_agent, loop, query):
+    expected = QUERIES[query][1 if data_agent.summary_ready else 0]
+    benchmark.group = f"data_agent: {query}"
+
+    result = benchmark(lambda: loop.run_until_complete(data_agent.execute(query)))
+
+    assert result["success"], result.get("error")
+    assert result["template"] == expected
+    benchmark.extra_info["template"] = result["template"]
+    benchmark.extra_info["rows"] = result["count"]
+
+
+@pytest.mark.parametrize("name", list(MCP_QUERIES))
+def test_query_database(benchmark, bookings_db, loop, monkeypatch, name):
+    monkeypatch.setenv("MCP_DATABASE_PATH", bookings_db)
+    benchmark.group = f"query_database: {name}"
+
+    result = benchmark(lambda: loop.run_until_complete(server.query_database(MCP_QUERIES[name])))
+
+    assert "error" not in result, result.get("error")
+    benchmark.extra_info["rows"] = result["count"]
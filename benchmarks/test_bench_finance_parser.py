@@ -0,0 +1,52 @@
+"""Micro-benchmark do parsing de queries do FinanceAgent.
+
+Compara o parser de uma passada (``parse_finance_query``) com a extração
+antiga, que varria a query várias vezes (uma busca por campo). Uso:
+
+    pytest benchmarks/test_bench_finance_parser.py --benchmark-only
+"""
+
+import re
+
+import pytest
+
+from src.utils.finance_parser import parse_finance_query
+
+QUERIES = [
+    "Converta 1000 USD para BRL",
+    "Converta R$ 1.000,50 para EUR",
+    "Qual a taxa de câmbio do EUR para BRL?",
+    "Calcule juros compostos de 10000 a 0.5% por 12 meses",
+    "Quanto rende R$ 25.000,00 a 1,2% ao mês por 3 anos com juros compostos?",
+    "Quanto é 100 dólares em reais?",
+]
+
+
+def legacy_parse(query: str):
+    """Extração anterior: várias buscas ``re.search`` e ``in`` sobre a mesma query."""
+    query_lower = query.lower()
+    if "convert" in query_lower or "converta" in query_lower or "converter" in query_lower:
+        return re.search(r'(\d+(?:\.\d+)?)\s*(USD|BRL|EUR)\s*para\s*(USD|BRL|EUR)', query, re.IGNORECASE)
+    elif "taxa" in query_lower and "câmbio" in query_lower:
+        query_upper = query.upper()
+        return [currency for currency in ["USD", "BRL", "EUR"] if currency in query_upper]
+    elif "juros" in query_lower or "interest" in query_lower:
+        return (
+            re.search(r'(\d+(?:\.\d+)?)', query),
+            re.search(r'(\d+(?:\.\d+)?)%', query),
+            re.search(r'(\d+)\s*(meses|anos|mes|ano)', query),
+            "compostos" in query_lower or "compound" in query_lower
+        )
+    return None
+
+
+def _parse_all(parse):
+    for query in QUERIES:
+        parse(query)
+
+
+@pytest.mark.parametrize("parser", [parse_finance_query, legacy_parse], ids=["single_pass", "legacy"])
+def test_finance_parser(benchmark, parser):
+    benchmark.group = "finance_parser"
+    benchmark.extra_info["queries"] = len(QUERIES)
+    benchmark(_parse_all, parser)
@@ -0,0 +1,79 @@
+"""Benchmarks da busca BM25 do InformationAgent.
+
+Gera ``BENCH_DOCS`` artigos sintéticos (padrão 100000; vocabulário com
+distribuição de Zipf), grava o índice em ``BENCH_DB_DIR`` e mede buscas no
+índice aberto via mmap. Uso:
+
+    pytest benchmarks/test_bench_info_search.py --benchmark-only
+    BENCH_DOCS=10000 pytest benchmarks/test_bench_info_search.py --benchmark-only
+"""
+
+import os
+import random
+
+import pytest
+
+from benchmarks.datagen import zipf_cum_weights
+from src.utils.search_index import BM25Index
+
+BENCH_SEED = 42
+VOCABULARY_SIZE = 50_000
+SYLLABLES = ["ra", "te", "lo", "mi", "sa", "cu", "de", "no", "pa", "vi", "ge", "tor", "cas", "lan", "fe"]
+
+# Query -> descrição (termos raros, frequentes e mistos)
+QUERIES = {
+    "O que é {rare}?": "rare_term",
+    "Explique {rare} e {mid}": "two_terms",
+    "{common} {common2} {mid}": "common_terms",
+    "{rare} {mid} {mid2} {common} {rare2}": "long_query",
+}
+
+
+def synthetic_vocabulary(rng: random.Random):
+    words = set()
+    while len(words) < VOCABULARY_SIZE:
+        words.add("".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    return sorted(words)
+
+
+def synthetic_articles(count: int, seed: int = BENCH_SEED):
+    """Artigos reprodutíveis: tópico, definição e conceitos com palavras Zipf."""
+    rng = random.Random(seed)
+    words = synthetic_vocabulary(rng)
+    rng.shuffle(words)
+    weights = zipf_cum_weights(len(words), 1.0)
+    return words, {
+        f"{' '.join(rng.choices(words, cum_weights=weights, k=2))} {i}": {
+            "definition": " ".join(rng.choices(words, cum_weights=weights, k=40)),
+            "key_concepts": [" ".join(rng.choices(words, cum_weights=weights, k=3)) for _ in range(4)],
+        }
+        for i in range(count)
+    }
+
+
+@pytest.fixture(scope="module")
+def knowledge_index(bench_dir):
+    count = int(os.getenv("BENCH_DOCS", "100000"))
+    path = os.path.join(bench_dir, f"knowledge-{count}-{BENCH_SEED}.idx")
+    words, articles = synthetic_articles(count)
+    if not os.path.exists(path):
+        BM25Index.build(articles).save(path)
+    index = BM25Index.load(path)
+    assert len(index) == count
+    return index, words
+
+
+@pytest.mark.parametrize("template", list(QUERIES), ids=list(QUERIES.values()))
+def test_info_search(benchmark, knowledge_index, template):
+    index, words = knowledge_index
+    # Posição no ranking de Zipf: 0 = mais frequente
+    query = template.format(
+        common=words[0], common2=words[1], mid=words[500], mid2=words[2000],
+        rare=words[30_000], rare2=words[45_000]
+    )
+    benchmark.group = "info_search"
+
+    hits = benchmark(index.search, query, 10)
+
+    benchmark.extra_info["documents"] = len(index)
+    benchmark.extra_info["hits"] = len(hits)
@@ -84,6 +84,16 @@ case "$MODE" in
         python src/cli.py --interactive
         ;;
         
+    "batch")
+        log_info "Modo: Lote - Processando arquivo JSONL"
+        if [ -z "$2" ] || [ -z "$3" ]; then
+            log_error "Uso: $0 batch entrada.jsonl saida.jsonl [opções]"
+            exit 1
+        fi
+        
+        python src/cli.py batch "$2" -o "$3" "${@:4}"
+        ;;
+        
     "test")
         log_info "Modo: Teste - Executando queries de exemplo"
         echo ""
@@ -111,6 +121,7 @@ case "$MODE" in
         echo "Uso:"
         echo "  $0 cli 'Sua pergunta'    - Executa uma query"
         echo "  $0 interactive           - Modo interativo"
+        echo "  $0 batch in.jsonl out.jsonl - Processa queries em lote"
         echo "  $0 test                  - Executa testes"
         echo "  $0 server                - Inicia MCP Server"
         exit 1
@@ -40,12 +40,14 @@ setup(
         "pydantic>=2.5.0",
         "rich>=13.7.0",
         "click>=8.1.7",
+        "numpy>=1.26.0",
     ],
     extras_require={
         "dev": [
             "pytest>=7.4.0",
             "pytest-asyncio>=0.21.0",
             "pytest-cov>=4.1.0",
+            "pytest-benchmark>=4.0.0",
             "black>=23.12.0",
             "flake8>=6.1.0",
             "mypy>=1.7.0",
@@ -1,9 +1,11 @@
 """Classe base para todos os agentes do sistema"""
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import logging
 
+import httpx
+
 
 class BaseAgent(ABC):
     """Classe abstrata base para agentes especializados."""
@@ -17,9 +19,38 @@ class BaseAgent(ABC):
         """
         self.name = name
         self.description = description
+        self.http_client: Optional[httpx.AsyncClient] = None
         self.logger = logging.getLogger(f"agent.{name}")
         self.logger.info(f"Agente {name} inicializado")
 
+    async def startup(self, http_client: Optional[httpx.AsyncClient] = None):
+        """Recebe recursos compartilhados quando o orquestrador inicia.
+        
+        Args:
+            http_client: Cliente HTTP com pool de conexões compartilhado
+        """
+        self.http_client = http_client
+
+    async def shutdown(self):
+        """Libera referências a recursos compartilhados."""
+        self.http_client = None
+
+    async def _get_json(self, url: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Faz um GET e retorna o JSON da resposta.
+        
+        Usa o pool compartilhado quando disponível; caso contrário abre um
+        cliente temporário (uso standalone do agente).
+        """
+        if self.http_client is not None:
+            response = await self.http_client.get(url, params=params)
+            response.raise_for_status()
+            return response.json()
+        
+        async with httpx.AsyncClient() as client:
+            response = await client.get(url, params=params)
+            response.raise_for_status()
+            return response.json()
+
     @abstractmethod
     async def execute(self, query: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         """Executa a query do agente.
@@ -33,6 +64,19 @@ class BaseAgent(ABC):
         """
         pass
 
+    def cache_ttl(self, result: Dict[str, Any]) -> float:
+        """Por quanto tempo (segundos) a resposta final baseada em ``result`` pode ser reutilizada.
+        
+        O padrão é não reutilizar; agentes com dados estáveis sobrescrevem.
+        
+        Args:
+            result: Resultado devolvido por ``execute``
+            
+        Returns:
+            Validade em segundos (zero desativa o cache da resposta)
+        """
+        return 0.0
+
     @abstractmethod
     def get_capabilities(self) -> List[str]:
         """Retorna lista de capacidades do agente.
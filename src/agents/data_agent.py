@@ -1,9 +1,238 @@
 """Agente especializado em consultas ao banco de dados"""
 
 import os
-import sqlite3
-from typing import Dict, Any, List
+import re
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from src.agents.base_agent import BaseAgent
+from src.utils.index_advisor import IndexSpec, apply_indexes, object_exists
+from src.utils.query_templates import QueryTemplate, QueryTemplateRegistry
+from src.utils.sqlite_executor import get_executor
+from src.utils.sqlite_pool import get_pool
+from src.utils.sqlite_stream import default_page_size, fetch_page, iter_batches
+
+# Consultas suportadas pelo agente (texto fixo, valores sempre via parâmetros)
+QUERY_TEMPLATES = QueryTemplateRegistry()
+QUERY_TEMPLATES.register(
+    "count_bookings",
+    "SELECT COUNT(*) as total FROM travel_bookings",
+    "Total de reservas"
+)
+QUERY_TEMPLATES.register(
+    "top_destination",
+    """
+        SELECT destination, COUNT(*) as count
+        FROM travel_bookings
+        GROUP BY destination
+        ORDER BY count DESC
+        LIMIT 1
+    """,
+    "Destino mais reservado"
+)
+QUERY_TEMPLATES.register(
+    "latest_bookings",
+    """
+        SELECT customer_name, destination, booking_date
+        FROM travel_bookings
+        ORDER BY booking_date DESC
+        LIMIT ?
+    """,
+    "Últimas N reservas"
+)
+QUERY_TEMPLATES.register(
+    "bookings_by_destination",
+    """
+        SELECT customer_name, booking_date, rowid AS page_key
+        FROM travel_bookings
+        WHERE LOWER(destination) LIKE '%' || ? || '%' ESCAPE '\\'
+        ORDER BY rowid
+    """,
+    "Reservas para um destino",
+    page_key="page_key"
+)
+QUERY_TEMPLATES.register(
+    "bookings_by_destination_fts",
+    """
+        SELECT b.customer_name, b.booking_date, f.rowid AS page_key
+        FROM travel_bookings_fts f
+        JOIN travel_bookings b ON b.rowid = f.rowid
+        WHERE travel_bookings_fts MATCH ?
+        ORDER BY f.rowid
+    """,
+    "Reservas para um destino (busca por trigramas)",
+    page_key="page_key"
+)
+QUERY_TEMPLATES.register(
+    "top_customer",
+    """
+        SELECT customer_name, COUNT(*) as bookings
+        FROM travel_bookings
+        GROUP BY customer_name
+        ORDER BY bookings DESC
+        LIMIT 1
+    """,
+    "Cliente com mais reservas"
+)
+QUERY_TEMPLATES.register(
+    "count_bookings_summary",
+    "SELECT count as total FROM booking_counters WHERE kind = 'total' AND key = ''",
+    "Total de reservas (tabela de resumo)"
+)
+QUERY_TEMPLATES.register(
+    "top_destination_summary",
+    """
+        SELECT key as destination, count
+        FROM booking_counters
+        WHERE kind = 'destination'
+        ORDER BY count DESC
+        LIMIT 1
+    """,
+    "Destino mais reservado (tabela de resumo)"
+)
+QUERY_TEMPLATES.register(
+    "top_customer_summary",
+    """
+        SELECT key as customer_name, count as bookings
+        FROM booking_counters
+        WHERE kind = 'customer'
+        ORDER BY count DESC
+        LIMIT 1
+    """,
+    "Cliente com mais reservas (tabela de resumo)"
+)
+QUERY_TEMPLATES.register(
+    "sample_bookings",
+    "SELECT * FROM travel_bookings LIMIT 10",
+    "Amostra de reservas (consulta padrão)"
+)
+
+
+# Índices para os padrões de acesso dos templates acima
+BOOKING_INDEXES = [
+    IndexSpec("idx_bookings_destination", (
+        "CREATE INDEX IF NOT EXISTS idx_bookings_destination ON travel_bookings(destination)",
+    )),
+    IndexSpec("idx_bookings_customer", (
+        "CREATE INDEX IF NOT EXISTS idx_bookings_customer ON travel_bookings(customer_name)",
+    )),
+    IndexSpec("idx_bookings_date", (
+        "CREATE INDEX IF NOT EXISTS idx_bookings_date "
+        "ON travel_bookings(booking_date, customer_name, destination)",
+    )),
+    IndexSpec("idx_bookings_destination_lower", (
+        "CREATE INDEX IF NOT EXISTS idx_bookings_destination_lower "
+        "ON travel_bookings(LOWER(destination), customer_name, booking_date)",
+    )),
+    IndexSpec("travel_bookings_fts", (
+        "CREATE VIRTUAL TABLE IF NOT EXISTS travel_bookings_fts "
+        "USING fts5(destination, content='travel_bookings', tokenize='trigram')",
+        "CREATE TRIGGER IF NOT EXISTS travel_bookings_fts_ai AFTER INSERT ON travel_bookings BEGIN "
+        "INSERT INTO travel_bookings_fts(rowid, destination) VALUES (new.rowid, new.destination); END",
+        "CREATE TRIGGER IF NOT EXISTS travel_bookings_fts_ad AFTER DELETE ON travel_bookings BEGIN "
+        "INSERT INTO travel_bookings_fts(travel_bookings_fts, rowid, destination) "
+        "VALUES ('delete', old.rowid, old.destination); END",
+        "CREATE TRIGGER IF NOT EXISTS travel_bookings_fts_au AFTER UPDATE OF destination ON travel_bookings BEGIN "
+        "INSERT INTO travel_bookings_fts(travel_bookings_fts, rowid, destination) "
+        "VALUES ('delete', old.rowid, old.destination); "
+        "INSERT INTO travel_bookings_fts(rowid, destination) VALUES (new.rowid, new.destination); END",
+        "INSERT INTO travel_bookings_fts(travel_bookings_fts) VALUES ('rebuild')",
+    )),
+]
+
+# Contadores mantidos por triggers: total de reservas e reservas por destino e
+# por cliente (NULL é contado como ''), para responder às agregações sem varrer
+# travel_bookings. Cada escrita em travel_bookings passa a pagar os triggers, por
+# isso só são criados com ``DATA_SUMMARY_COUNTERS`` (à parte dos índices)
+SUMMARY_REFRESH = (
+    "DELETE FROM booking_counters",
+    "INSERT INTO booking_counters (kind, key, count) "
+    "SELECT 'total', '', COUNT(*) FROM travel_bookings",
+    "INSERT INTO booking_counters (kind, key, count) "
+    "SELECT 'destination', COALESCE(destination, ''), COUNT(*) FROM travel_bookings GROUP BY 1, 2",
+    "INSERT INTO booking_counters (kind, key, count) "
+    "SELECT 'customer', COALESCE(customer_name, ''), COUNT(*) FROM travel_bookings GROUP BY 1, 2",
+)
+
+
+def _counter_upsert(kind: str, key: str, delta: int) -> str:
+    return (
+        f"INSERT INTO booking_counters (kind, key, count) VALUES ('{kind}', {key}, {delta}) "
+        f"ON CONFLICT (kind, key) DO UPDATE SET count = count + ({delta});"
+    )
+
+
+def _counter_prune(kind: str, key: str) -> str:
+    return f"DELETE FROM booking_counters WHERE kind = '{kind}' AND key = {key} AND count <= 0;"
+
+
+def _counter_trigger(name: str, event: str, old: bool, new: bool) -> str:
+    body = []
+    if old:
+        body += [
+            _counter_upsert("total", "''", -1),
+            _counter_upsert("destination", "COALESCE(old.destination, '')", -1),
+            _counter_upsert("customer", "COALESCE(old.customer_name, '')", -1),
+            _counter_prune("destination", "COALESCE(old.destination, '')"),
+            _counter_prune("customer", "COALESCE(old.customer_name, '')"),
+        ]
+    if new:
+        body += [
+            _counter_upsert("total", "''", 1),
+            _counter_upsert("destination", "COALESCE(new.destination, '')", 1),
+            _counter_upsert("customer", "COALESCE(new.customer_name, '')", 1),
+        ]
+    return f"CREATE TRIGGER IF NOT EXISTS {name} {event} ON travel_bookings BEGIN {' '.join(body)} END"
+
+
+BOOKING_SUMMARY = IndexSpec("booking_counters", (
+    "CREATE TABLE IF NOT EXISTS booking_counters ("
+    "kind TEXT NOT NULL, key TEXT NOT NULL, count INTEGER NOT NULL, "
+    "PRIMARY KEY (kind, key)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS idx_booking_counters_rank ON booking_counters(kind, count DESC)",
+    _counter_trigger("booking_counters_ai", "AFTER INSERT", old=False, new=True),
+    _counter_trigger("booking_counters_ad", "AFTER DELETE", old=True, new=False),
+    _counter_trigger(
+        "booking_counters_au", "AFTER UPDATE OF destination, customer_name", old=True, new=True
+    ),
+) + SUMMARY_REFRESH)
+
+# Diferenças entre os contadores e a tabela (linhas presentes em apenas um dos lados)
+SUMMARY_CHECK = """
+    WITH expected(kind, key, count) AS (
+        SELECT 'total', '', COUNT(*) FROM travel_bookings
+        UNION ALL
+        SELECT 'destination', COALESCE(destination, ''), COUNT(*) FROM travel_bookings GROUP BY 2
+        UNION ALL
+        SELECT 'customer', COALESCE(customer_name, ''), COUNT(*) FROM travel_bookings GROUP BY 2
+    ),
+    diff AS (
+        SELECT * FROM (SELECT * FROM expected EXCEPT SELECT kind, key, count FROM booking_counters)
+        UNION ALL
+        SELECT * FROM (SELECT kind, key, count FROM booking_counters EXCEPT SELECT * FROM expected)
+    )
+    SELECT kind, COUNT(*) FROM diff GROUP BY kind
+"""
+
+# Templates respondidos pelos contadores quando ``booking_counters`` existe
+SUMMARY_TEMPLATES = {
+    "count_bookings": "count_bookings_summary",
+    "top_destination": "top_destination_summary",
+    "top_customer": "top_customer_summary",
+}
+
+# Parâmetros de exemplo usados no EXPLAIN QUERY PLAN de cada template
+EXPLAIN_PARAMS = {
+    "latest_bookings": (5,),
+    "bookings_by_destination": ("paris",),
+    "bookings_by_destination_fts": ('"paris"',),
+}
+
+# Tamanho mínimo do termo para a busca por trigramas
+TRIGRAM_MIN_LENGTH = 3
+
+
+def escape_like(value: str) -> str:
+    """Escapa os curingas de LIKE para buscar o texto literalmente."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
 
 
 class DataAgent(BaseAgent):
@@ -15,6 +244,15 @@ class DataAgent(BaseAgent):
             description="Especialista em consultas e análise de dados do banco de dados"
         )
         self.db_path = os.getenv("DATABASE_PATH", "travel_agency.db")
+        self.templates = QUERY_TEMPLATES
+        self.fts_ready = False
+        self.summary_ready = False
+        self.index_report: Dict[str, Any] = {}
+        self.response_ttl = float(os.getenv("DATA_RESPONSE_TTL", "0"))
+
+    def cache_ttl(self, result: Dict[str, Any]) -> float:
+        """Dados mudam a cada reserva: só reutiliza com ``DATA_RESPONSE_TTL`` > 0."""
+        return self.response_ttl if result.get("success") else 0.0
 
     def get_capabilities(self) -> List[str]:
         return [
@@ -25,6 +263,101 @@ class DataAgent(BaseAgent):
             "Consultar banco de dados"
         ]
 
+    async def startup(self, http_client=None):
+        """Detecta os índices existentes e, com ``DATA_AUTO_INDEX``, cria os que faltam.
+
+        O banco é do usuário: por padrão nenhuma DDL é executada e apenas as
+        estruturas já presentes (FTS, contadores) passam a ser usadas.
+        """
+        await super().startup(http_client)
+        
+        if not os.path.exists(self.db_path):
+            return
+        
+        if os.getenv("DATA_AUTO_INDEX", "false").lower() == "true":
+            await self.ensure_indexes()
+            return
+        
+        try:
+            await get_executor().run(get_pool(self.db_path), self._detect_structures)
+        except Exception as e:
+            self.logger.warning(f"Não foi possível inspecionar o banco: {e}")
+    
+    async def ensure_indexes(self, summary: Optional[bool] = None) -> Dict[str, Any]:
+        """Cria os índices dos padrões de consulta no banco (altera o schema).
+        
+        Args:
+            summary: Cria também os contadores de resumo e seus triggers
+                (padrão: ``DATA_SUMMARY_COUNTERS`` ou false)
+            
+        Returns:
+            Relatório de ``apply_indexes`` (também guardado em ``index_report``)
+        """
+        if summary is None:
+            summary = os.getenv("DATA_SUMMARY_COUNTERS", "false").lower() == "true"
+        specs = BOOKING_INDEXES + [BOOKING_SUMMARY] if summary else BOOKING_INDEXES
+        
+        self.logger.warning(f"Criando índices ausentes em {self.db_path} (alteração de schema)")
+        try:
+            self.index_report = await get_executor().run(
+                get_pool(self.db_path, read_only=False),
+                lambda conn: self._ensure_indexes(conn, specs),
+                timeout=float(os.getenv("DATA_INDEX_TIMEOUT", "600"))
+            )
+        except Exception as e:
+            self.logger.warning(f"Não foi possível criar índices: {e}")
+        return self.index_report
+    
+    def _detect_structures(self, conn):
+        self.fts_ready = object_exists(conn, "travel_bookings_fts")
+        self.summary_ready = object_exists(conn, "booking_counters")
+    
+    def _ensure_indexes(self, conn, specs: List[IndexSpec]) -> Dict[str, Any]:
+        """Aplica ``specs`` e registra os planos antes/depois (chamada bloqueante)."""
+        probes = {
+            name: (self.templates.get(name).sql, EXPLAIN_PARAMS.get(name, ()))
+            for name in self.templates.names()
+        }
+        report = apply_indexes(conn, "travel_bookings", specs, probes)
+        self._detect_structures(conn)
+        
+        if report.get("created"):
+            created = ", ".join(report["created"])
+            self.logger.warning(f"Schema de {self.db_path} alterado: {created}")
+        for name, plans in report.get("plans", {}).items():
+            self.logger.info(f"Plano {name}: {' | '.join(plans['before'])} -> {' | '.join(plans['after'])}")
+        
+        return report
+
+    async def check_summary(self, repair: bool = False) -> Dict[str, int]:
+        """Compara os contadores de resumo com ``travel_bookings``.
+        
+        Args:
+            repair: Recalcula os contadores se houver divergência
+            
+        Returns:
+            Número de linhas divergentes por tipo de contador (vazio se consistente)
+        """
+        def check(conn) -> Dict[str, int]:
+            mismatches = dict(conn.execute(SUMMARY_CHECK).fetchall())
+            if mismatches and repair:
+                self._refresh_summary(conn)
+            return mismatches
+        
+        mismatches = await get_executor().run(get_pool(self.db_path, read_only=False), check)
+        if mismatches:
+            self.logger.warning(f"Contadores de resumo divergentes: {mismatches}")
+        return mismatches
+    
+    async def refresh_summary(self):
+        """Recalcula os contadores de resumo a partir de ``travel_bookings``."""
+        await get_executor().run(get_pool(self.db_path, read_only=False), self._refresh_summary)
+    
+    def _refresh_summary(self, conn):
+        with conn:
+            for statement in SUMMARY_REFRESH:
+                conn.execute(statement)
+
     async def execute(self, query: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         """Executa consulta ao banco de dados.
         
@@ -36,24 +369,30 @@ class DataAgent(BaseAgent):
             Dicionário com resultados da consulta
         """
         try:
-            # Determina tipo de consulta
-            sql_query = self._generate_sql(query)
+            # Determina o template de consulta e seus parâmetros
+            template, params = self._select_template(query)
             
-            if not sql_query:
+            if template is None:
                 return {
                     "success": False,
                     "agent": self.name,
                     "error": "Não foi possível gerar consulta SQL"
                 }
 
-            # Executa consulta
-            results = self._execute_query(sql_query)
+            # Executa consulta fora do event loop (pool de threads com timeout),
+            # lendo apenas a página solicitada no formato colunar
+            context = context or {}
+            page = await self._run_page(
+                template, params, context.get("page_size"), context.get("page_token")
+            )
             
             return {
                 "success": True,
                 "agent": self.name,
-                "query": sql_query,
-                "results": results
+                "template": template.name,
+                "query": template.sql,
+                "params": list(params),
+                **page
             }
             
         except Exception as e:
@@ -64,76 +403,92 @@ class DataAgent(BaseAgent):
                 "error": str(e)
             }
 
-    def _generate_sql(self, query: str) -> str:
-        """Gera SQL baseado na query do usuário."""
+    def _select_template(self, query: str) -> Tuple[Optional[QueryTemplate], Tuple]:
+        """Escolhe o template de consulta e os parâmetros a partir da query do usuário."""
         query_lower = query.lower()
         
         # Padrões comuns de consultas
         if "quantas reservas" in query_lower or "total" in query_lower:
-            return "SELECT COUNT(*) as total FROM travel_bookings"
+            return self._aggregate("count_bookings"), ()
         
         elif "destino mais popular" in query_lower or "mais vendido" in query_lower:
-            return """
-                SELECT destination, COUNT(*) as count 
-                FROM travel_bookings 
-                GROUP BY destination 
-                ORDER BY count DESC 
-                LIMIT 1
-            """
+            return self._aggregate("top_destination"), ()
         
         elif "últimas" in query_lower and "reservas" in query_lower:
             # Extrai número se houver (ex: "últimas 5 reservas")
-            import re
             match = re.search(r'(\d+)', query)
             limit = int(match.group(1)) if match else 5
-            
-            return f"""
-                SELECT customer_name, destination, booking_date 
-                FROM travel_bookings 
-                ORDER BY booking_date DESC 
-                LIMIT {limit}
-            """
+            return self.templates.get("latest_bookings"), (limit,)
         
         elif "reservas para" in query_lower:
             # Extrai destino
-            parts = query_lower.split("para")
-            if len(parts) > 1:
-                destination = parts[1].strip()
-                return f"""
-                    SELECT customer_name, booking_date 
-                    FROM travel_bookings 
-                    WHERE LOWER(destination) LIKE '%{destination}%'
-                """
+            destination = query_lower.split("para", 1)[1].strip()
+            if self.fts_ready and len(destination) >= TRIGRAM_MIN_LENGTH:
+                phrase = '"' + destination.replace('"', '""') + '"'
+                return self.templates.get("bookings_by_destination_fts"), (phrase,)
+            return self.templates.get("bookings_by_destination"), (escape_like(destination),)
         
         elif "cliente" in query_lower and "mais reservas" in query_lower:
-            return """
-                SELECT customer_name, COUNT(*) as bookings 
-                FROM travel_bookings 
-                GROUP BY customer_name 
-                ORDER BY bookings DESC 
-                LIMIT 1
-            """
+            return self._aggregate("top_customer"), ()
         
         # Consulta padrão
-        return "SELECT * FROM travel_bookings LIMIT 10"
+        return self.templates.get("sample_bookings"), ()
 
-    def _execute_query(self, sql: str) -> List[Dict[str, Any]]:
-        """Executa query SQL e retorna resultados."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute(sql)
-            rows = cursor.fetchall()
-            
-            # Converte para lista de dicionários
-            results = [
-                {key: row[key] for key in row.keys()}
-                for row in rows
-            ]
+    def _aggregate(self, name: str) -> QueryTemplate:
+        """Template de agregação, respondido pelos contadores de resumo se existirem."""
+        if self.summary_ready:
+            return self.templates.get(SUMMARY_TEMPLATES[name])
+        return self.templates.get(name)
+
+    async def _run_page(
+        self,
+        template: QueryTemplate,
+        params: Tuple,
+        page_size: Optional[int] = None,
+        page_token: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Lê uma página do template no pool de consultas, registrando suas métricas."""
+        def run(conn):
+            def fetch():
+                page = fetch_page(
+                    conn, template.sql, params,
+                    page_size=page_size, page_token=page_token, key=template.page_key
+                )
+                return page, page["count"]
             
-            return results
+            return self.templates.timed(template.name, fetch)
+        
+        return await get_executor().run(get_pool(self.db_path), run)
+
+    async def stream(self, query: str, page_size: int = None, max_pending: int = 2) -> AsyncIterator[Tuple]:
+        """Percorre todas as linhas da consulta com um único cursor.
+        
+        A consulta roda uma vez, em uma thread própria (sem ocupar o pool de
+        consultas), e os lotes chegam por uma fila limitada: a memória fica
+        limitada a ``max_pending`` lotes e o tempo limite vale por lote.
+        
+        Args:
+            query: Query do usuário
+            page_size: Linhas por lote (padrão: ``SQLITE_PAGE_SIZE`` ou 500)
+            max_pending: Lotes lidos e ainda não consumidos
             
+        Yields:
+            Linhas do resultado como tuplas
+        """
+        template, params = self._select_template(query)
+        batches = iter_batches(
+            get_pool(self.db_path),
+            template.sql,
+            params,
+            fetch_size=page_size or default_page_size(),
+            max_pending=max_pending,
+            timeout=get_executor().timeout,
+            on_finish=lambda seconds, rows: self.templates.record(template.name, seconds, rows)
+        )
+        try:
+            async for batch in batches:
+                for row in batch:
+                    # A chave de paginação é interna (última coluna)
+                    yield row[:-1] if template.page_key else row
         finally:
-            conn.close()
\ No newline at end of file
+            await batches.aclose()
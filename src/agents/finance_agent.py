@@ -1,7 +1,15 @@
 """Agente especializado em operações financeiras"""
 
+import os
 from typing import Dict, Any, List
 from src.agents.base_agent import BaseAgent
+from src.utils.exchange_rates import get_exchange_rate_store
+from src.utils.finance_batch import compound_interest_batch, compound_interest_schedule, convert_batch
+from src.utils.finance_parser import FinanceQuery, parse_finance_query
+
+
+def _as_list(value) -> List[str]:
+    return [value] if isinstance(value, str) else list(value)
 
 
 class FinanceAgent(BaseAgent):
@@ -12,12 +20,9 @@ class FinanceAgent(BaseAgent):
             name="finance_agent",
             description="Especialista em operações financeiras e cálculos monetários"
         )
-        # Taxas de câmbio simples (em produção, usar API real)
-        self.exchange_rates = {
-            "USD": {"BRL": 5.0, "EUR": 0.92},
-            "BRL": {"USD": 0.20, "EUR": 0.18},
-            "EUR": {"USD": 1.09, "BRL": 5.45}
-        }
+        # Taxas de câmbio compartilhadas com o MCP Server (API com cache e snapshot)
+        self.exchange_rates = get_exchange_rate_store()
+        self.response_ttl = float(os.getenv("FINANCE_RESPONSE_TTL", "86400"))
 
     def get_capabilities(self) -> List[str]:
         return [
@@ -25,33 +30,57 @@ class FinanceAgent(BaseAgent):
             "Cálculo de juros compostos",
             "Cálculo de juros simples",
             "Operações financeiras",
-            "Taxas de câmbio"
+            "Taxas de câmbio",
+            "Conversões e juros em lote"
         ]
 
+    def cache_ttl(self, result: Dict[str, Any]) -> float:
+        """Validade da resposta conforme a operação.
+        
+        Cálculos de juros são determinísticos (``FINANCE_RESPONSE_TTL``);
+        conversões valem enquanto a tabela de câmbio usada estiver válida e
+        não são reutilizadas se vieram do snapshot vencido ou do fallback.
+        """
+        if not result.get("success"):
+            return 0.0
+        operation = result.get("operation")
+        if operation == "interest_calculation":
+            return self.response_ttl
+        if operation in ("currency_conversion", "exchange_rate"):
+            return self.exchange_rates.remaining_ttl([self.exchange_rates.pivot, result["from_currency"]])
+        return 0.0
+
     async def execute(self, query: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         """Executa operação financeira.
         
         Args:
             query: Query do usuário
-            context: Contexto adicional
+            context: Contexto adicional; ``context["batch"]`` executa uma
+                operação em lote (ver ``_handle_batch``)
             
         Returns:
             Dicionário com resultado da operação
         """
         try:
-            query_lower = query.lower()
+            # Operações em lote (listas de valores no contexto)
+            batch = (context or {}).get("batch")
+            if batch:
+                return await self._handle_batch(batch)
+            
+            # Uma única passada extrai operação, valores, moedas, taxa e período
+            parsed = parse_finance_query(query)
             
             # Conversão de moeda
-            if "convert" in query_lower or "converta" in query_lower or "converter" in query_lower:
-                return await self._handle_currency_conversion(query)
+            if parsed.operation == "currency_conversion":
+                return await self._handle_currency_conversion(parsed)
             
             # Taxa de câmbio
-            elif "taxa" in query_lower and "câmbio" in query_lower:
-                return await self._handle_exchange_rate(query)
+            elif parsed.operation == "exchange_rate":
+                return await self._handle_exchange_rate(parsed)
             
             # Juros
-            elif "juros" in query_lower or "interest" in query_lower:
-                return await self._handle_interest_calculation(query)
+            elif parsed.operation == "interest_calculation":
+                return await self._handle_interest_calculation(parsed)
             
             else:
                 return {
@@ -68,31 +97,64 @@ class FinanceAgent(BaseAgent):
                 "error": str(e)
             }
 
-    async def _handle_currency_conversion(self, query: str) -> Dict[str, Any]:
-        """Converte valores entre moedas."""
-        import re
+    async def _handle_batch(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        """Executa uma operação em lote e devolve o resultado em colunas.
         
-        # Extrai valor e moedas da query
-        # Exemplo: "Converta 1000 USD para BRL"
-        match = re.search(r'(\d+(?:\.\d+)?)\s*(USD|BRL|EUR)\s*para\s*(USD|BRL|EUR)', query, re.IGNORECASE)
+        Args:
+            batch: ``operation`` e listas (ou escalares repetidos) de entrada:
+                - ``currency_conversion``: ``amounts``, ``from_currency``, ``to_currency``
+                - ``compound_interest``: ``principals``, ``rates``, ``periods``
+                - ``interest_schedule``: ``principals``, ``rates``, ``periods``
+        """
+        operation = batch.get("operation")
+        
+        if operation == "currency_conversion":
+            currencies = _as_list(batch["from_currency"]) + _as_list(batch["to_currency"])
+            rates = await self.exchange_rates.cross_rates(currencies, self._get_json)
+            result = convert_batch(batch["amounts"], batch["from_currency"], batch["to_currency"], rates)
+        elif operation == "compound_interest":
+            result = compound_interest_batch(batch["principals"], batch["rates"], batch["periods"])
+        elif operation == "interest_schedule":
+            result = compound_interest_schedule(batch["principals"], batch["rates"], batch["periods"])
+        else:
+            return {
+                "success": False,
+                "agent": self.name,
+                "error": f"Operação em lote não reconhecida: {operation}"
+            }
         
-        if not match:
+        return {
+            "success": True,
+            "agent": self.name,
+            "operation": f"batch_{operation}",
+            **result
+        }
+
+    async def _handle_currency_conversion(self, parsed: FinanceQuery) -> Dict[str, Any]:
+        """Converte valores entre moedas."""
+        # Exemplos: "Converta 1000 USD para BRL", "Converta R$ 1.000,50 para EUR"
+        if not parsed.amounts or len(parsed.currencies) < 2:
             return {
                 "success": False,
                 "agent": self.name,
                 "error": "Não foi possível extrair valor e moedas da query"
             }
         
-        amount = float(match.group(1))
-        from_currency = match.group(2).upper()
-        to_currency = match.group(3).upper()
+        amount = parsed.amounts[0]
+        from_currency, to_currency = parsed.currencies[0], parsed.currencies[1]
         
         # Busca taxa de câmbio
         if from_currency == to_currency:
             converted = amount
             rate = 1.0
         else:
-            rate = self.exchange_rates.get(from_currency, {}).get(to_currency, 1.0)
+            rate = await self.exchange_rates.rate(from_currency, to_currency, self._get_json)
+            if rate is None:
+                return {
+                    "success": False,
+                    "agent": self.name,
+                    "error": f"Taxa de câmbio {from_currency}/{to_currency} indisponível"
+                }
             converted = amount * rate
         
         return {
@@ -106,15 +168,9 @@ class FinanceAgent(BaseAgent):
             "exchange_rate": rate
         }
 
-    async def _handle_exchange_rate(self, query: str) -> Dict[str, Any]:
+    async def _handle_exchange_rate(self, parsed: FinanceQuery) -> Dict[str, Any]:
         """Retorna taxa de câmbio."""
-        query_upper = query.upper()
-        
-        # Detecta moedas mencionadas
-        currencies = []
-        for currency in ["USD", "BRL", "EUR"]:
-            if currency in query_upper:
-                currencies.append(currency)
+        currencies = parsed.currencies
         
         if len(currencies) < 2:
             currencies = ["USD", "BRL"]  # Padrão
@@ -122,7 +178,13 @@ class FinanceAgent(BaseAgent):
         from_curr = currencies[0]
         to_curr = currencies[1]
         
-        rate = self.exchange_rates.get(from_curr, {}).get(to_curr, 1.0)
+        rate = await self.exchange_rates.rate(from_curr, to_curr, self._get_json)
+        if rate is None:
+            return {
+                "success": False,
+                "agent": self.name,
+                "error": f"Taxa de câmbio {from_curr}/{to_curr} indisponível"
+            }
         
         return {
             "success": True,
@@ -134,33 +196,13 @@ class FinanceAgent(BaseAgent):
             "info": f"1 {from_curr} = {rate} {to_curr}"
         }
 
-    async def _handle_interest_calculation(self, query: str) -> Dict[str, Any]:
+    async def _handle_interest_calculation(self, parsed: FinanceQuery) -> Dict[str, Any]:
         """Calcula juros simples ou compostos."""
-        import re
-        
-        # Extrai valores da query
         # Exemplo: "Calcule juros compostos de 10000 a 0.5% por 12 meses"
-        
-        # Busca principal
-        principal_match = re.search(r'(\d+(?:\.\d+)?)', query)
-        principal = float(principal_match.group(1)) if principal_match else 1000.0
-        
-        # Busca taxa
-        rate_match = re.search(r'(\d+(?:\.\d+)?)%', query)
-        rate = float(rate_match.group(1)) / 100 if rate_match else 0.01
-        
-        # Busca período
-        period_match = re.search(r'(\d+)\s*(meses|anos|mes|ano)', query)
-        if period_match:
-            periods = int(period_match.group(1))
-            unit = period_match.group(2)
-            if "ano" in unit:
-                periods = periods * 12  # Converte para meses
-        else:
-            periods = 12
-        
-        # Determina se é juros compostos ou simples
-        is_compound = "compostos" in query.lower() or "compound" in query.lower()
+        principal = parsed.amounts[0] if parsed.amounts else 1000.0
+        rate = parsed.rate if parsed.rate is not None else 0.01
+        periods = parsed.periods if parsed.periods is not None else 12  # Em meses
+        is_compound = parsed.compound
         
         if is_compound:
             # Fórmula juros compostos: M = C * (1 + i)^n
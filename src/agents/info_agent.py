@@ -1,7 +1,9 @@
 """Agente especializado em informações gerais"""
 
+import os
 from typing import Dict, Any, List
 from src.agents.base_agent import BaseAgent
+from src.utils.knowledge_base import get_knowledge_base
 
 
 class InformationAgent(BaseAgent):
@@ -13,69 +15,15 @@ class InformationAgent(BaseAgent):
             description="Especialista em informações gerais e explicações conceituais"
         )
         
-        # Base de conhecimento simples
-        self.knowledge_base = {
-            "arquitetura hexagonal": {
-                "definition": "Arquitetura Hexagonal (ou Ports and Adapters) é um padrão arquitetural que promove o isolamento do domínio da aplicação das dependências externas.",
-                "key_concepts": [
-                    "Core da aplicação isolado",
-                    "Portas (interfaces) para comunicação",
-                    "Adaptadores implementam as portas",
-                    "Fácil teste e manutenção"
-                ],
-                "benefits": [
-                    "Testabilidade",
-                    "Manutenção simplificada",
-                    "Independência de frameworks",
-                    "Flexibilidade"
-                ]
-            },
-            "mcp": {
-                "definition": "Model Context Protocol (MCP) é um protocolo aberto que padroniza como as aplicações fornecem contexto para LLMs.",
-                "key_concepts": [
-                    "Protocolo padronizado",
-                    "Integração LLM-aplicação",
-                    "Ferramentas e recursos",
-                    "Cliente-servidor"
-                ],
-                "benefits": [
-                    "Interoperabilidade",
-                    "Reusabilidade",
-                    "Segurança",
-                    "Escalabilidade"
-                ]
-            },
-            "langgraph": {
-                "definition": "LangGraph é uma biblioteca para construir aplicações multi-agente com grafos de estados usando LLMs.",
-                "key_concepts": [
-                    "Grafos de estados",
-                    "Nós (agentes)",
-                    "Arestas (transições)",
-                    "Orquestração de agentes"
-                ],
-                "benefits": [
-                    "Workflows complexos",
-                    "Coordenação de agentes",
-                    "Estado persistente",
-                    "Flexível e extensível"
-                ]
-            },
-            "multi-agente": {
-                "definition": "Sistema multi-agente é uma arquitetura onde múltiplos agentes autônomos colaboram para resolver problemas complexos.",
-                "key_concepts": [
-                    "Agentes especializados",
-                    "Comunicação entre agentes",
-                    "Orquestrador central",
-                    "Especialização de domínio"
-                ],
-                "benefits": [
-                    "Modularidade",
-                    "Especialização",
-                    "Escalabilidade",
-                    "Manutenção facilitada"
-                ]
-            }
-        }
+        # Base de conhecimento em arquivos (knowledge/), compartilhada entre
+        # instâncias e carregada só na primeira consulta
+        self.knowledge = get_knowledge_base()
+        self.top_k = int(os.getenv("INFO_TOP_K", "3"))
+        self.response_ttl = float(os.getenv("INFO_RESPONSE_TTL", "21600"))
+
+    def cache_ttl(self, result: Dict[str, Any]) -> float:
+        """Conteúdo conceitual muda pouco: respostas valem ``INFO_RESPONSE_TTL`` segundos."""
+        return self.response_ttl if result.get("success") else 0.0
 
     def get_capabilities(self) -> List[str]:
         return [
@@ -97,17 +45,18 @@ class InformationAgent(BaseAgent):
             Dicionário com informações
         """
         try:
-            query_lower = query.lower()
-            
-            # Busca no knowledge base
-            for topic, info in self.knowledge_base.items():
-                if topic in query_lower:
-                    return {
-                        "success": True,
-                        "agent": self.name,
-                        "topic": topic,
-                        "information": info
-                    }
+            # Busca ranqueada (BM25) no índice da base de conhecimento
+            hits, information = await self.knowledge.asearch(query, k=self.top_k)
+            if hits:
+                best = hits[0]
+                return {
+                    "success": True,
+                    "agent": self.name,
+                    "topic": best.topic,
+                    "score": round(best.score, 4),
+                    "information": information,
+                    "related_topics": [hit.topic for hit in hits[1:]]
+                }
             
             # Resposta genérica se não encontrar
             return {
@@ -115,9 +64,15 @@ class InformationAgent(BaseAgent):
                 "agent": self.name,
                 "topic": "general",
                 "information": {
-                    "definition": "Sou o Information Agent, especializado em fornecer informações sobre diversos tópicos.",
-                    "available_topics": list(self.knowledge_base.keys()),
-                    "suggestion": "Pergunte sobre algum dos tópicos disponíveis para obter informações detalhadas."
+                    "definition": (
+                        "Sou o Information Agent, especializado em fornecer informações "
+                        "sobre diversos tópicos."
+                    ),
+                    "available_topics": (await self.knowledge.atopics())[:20],
+                    "suggestion": (
+                        "Pergunte sobre algum dos tópicos disponíveis para obter "
+                        "informações detalhadas."
+                    )
                 }
             }
             
@@ -1,9 +1,27 @@
 """Agente especializado em informações meteorológicas"""
 
+import asyncio
 import os
-import httpx
 from typing import Dict, Any, List
 from src.agents.base_agent import BaseAgent
+from src.utils.text import normalize_text
+from src.utils.weather_cache import get_observation_cache
+
+# Variáveis solicitadas à Open-Meteo (compartilhadas com o MCP Server para reaproveitar o cache)
+CURRENT_VARIABLES = "temperature_2m,relative_humidity_2m,weather_code,wind_speed_10m"
+
+CITY_COORDINATES = {
+    "são paulo": {"lat": -23.5505, "lon": -46.6333},
+    "rio de janeiro": {"lat": -22.9068, "lon": -43.1729},
+    "belo horizonte": {"lat": -19.9167, "lon": -43.9345},
+    "brasília": {"lat": -15.7939, "lon": -47.8828},
+    "curitiba": {"lat": -25.4284, "lon": -49.2733},
+    "porto alegre": {"lat": -30.0346, "lon": -51.2177},
+    "salvador": {"lat": -12.9714, "lon": -38.5014},
+    "fortaleza": {"lat": -3.7172, "lon": -38.5433},
+    "recife": {"lat": -8.0476, "lon": -34.8770},
+    "manaus": {"lat": -3.1190, "lon": -60.0217},
+}
 
 
 class WeatherAgent(BaseAgent):
@@ -18,18 +36,12 @@ class WeatherAgent(BaseAgent):
             "WEATHER_API_BASE_URL",
             "https://api.open-meteo.com/v1/forecast"
         )
-        self.city_coordinates = {
-            "são paulo": {"lat": -23.5505, "lon": -46.6333},
-            "rio de janeiro": {"lat": -22.9068, "lon": -43.1729},
-            "belo horizonte": {"lat": -19.9167, "lon": -43.9345},
-            "brasília": {"lat": -15.7939, "lon": -47.8828},
-            "curitiba": {"lat": -25.4284, "lon": -49.2733},
-            "porto alegre": {"lat": -30.0346, "lon": -51.2177},
-            "salvador": {"lat": -12.9714, "lon": -38.5014},
-            "fortaleza": {"lat": -3.7172, "lon": -38.5433},
-            "recife": {"lat": -8.0476, "lon": -34.8770},
-            "manaus": {"lat": -3.1190, "lon": -60.0217},
-        }
+        self.city_coordinates = CITY_COORDINATES
+        self._normalized_cities = {normalize_text(city): city for city in self.city_coordinates}
+
+    def cache_ttl(self, result: Dict[str, Any]) -> float:
+        """Respostas valem até o fim da janela de observações em cache."""
+        return get_observation_cache().remaining() if result.get("success") else 0.0
 
     def get_capabilities(self) -> List[str]:
         return [
@@ -51,17 +63,30 @@ class WeatherAgent(BaseAgent):
             Dicionário com dados meteorológicos
         """
         try:
-            # Extrai cidade da query
-            city = self._extract_city(query)
+            # Extrai cidades da query
+            cities = self._extract_cities(query)
             
-            if not city:
+            if not cities:
                 return {
                     "success": False,
                     "agent": self.name,
                     "error": "Não foi possível identificar a cidade na query"
                 }
 
+            # Várias cidades: uma única requisição em lote
+            if len(cities) > 1:
+                weather_by_city = await self._get_weather_batch(cities)
+                return {
+                    "success": True,
+                    "agent": self.name,
+                    "cities": [
+                        {"city": city, "data": weather_by_city[city]}
+                        for city in cities
+                    ]
+                }
+
             # Busca clima
+            city = cities[0]
             weather_data = await self._get_weather(city)
             
             return {
@@ -80,14 +105,21 @@ class WeatherAgent(BaseAgent):
             }
 
     def _extract_city(self, query: str) -> str:
-        """Extrai nome da cidade da query."""
-        query_lower = query.lower()
+        """Extrai nome da (primeira) cidade da query."""
+        cities = self._extract_cities(query)
+        return cities[0] if cities else None
+
+    def _extract_cities(self, query: str) -> List[str]:
+        """Extrai todas as cidades mencionadas, na ordem em que aparecem."""
+        query_normalized = f" {normalize_text(query)} "
         
-        for city in self.city_coordinates.keys():
-            if city in query_lower:
-                return city.title()
+        found = []
+        for normalized, city in self._normalized_cities.items():
+            position = query_normalized.find(f" {normalized} ")
+            if position >= 0:
+                found.append((position, city.title()))
         
-        return None
+        return [city for _, city in sorted(found)]
 
     async def _get_weather(self, city: str) -> Dict[str, Any]:
         """Busca dados meteorológicos da API."""
@@ -98,20 +130,81 @@ class WeatherAgent(BaseAgent):
         
         coords = self.city_coordinates[city_lower]
         
+        current = await get_observation_cache().get_or_fetch(
+            coords["lat"],
+            coords["lon"],
+            CURRENT_VARIABLES,
+            lambda: self._fetch_current(coords["lat"], coords["lon"])
+        )
+        
+        return self._format_weather(current)
+
+    async def _get_weather_batch(self, cities: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Busca o clima de várias cidades em uma única requisição.
+        
+        Cidades já presentes no cache de observações não são buscadas
+        novamente. As demais vão em uma requisição com listas de
+        latitude/longitude separadas por vírgula; se o lote falhar, as
+        cidades são buscadas em paralelo pelo pool HTTP.
+        
+        Args:
+            cities: Nomes das cidades (ex: ["São Paulo", "Recife"])
+            
+        Returns:
+            Dicionário cidade -> dados meteorológicos
+        """
+        cache = get_observation_cache()
+        results = {}
+        missing = []
+        
+        for city in cities:
+            if city.lower() not in self.city_coordinates:
+                raise ValueError(f"Cidade {city} não suportada")
+            coords = self.city_coordinates[city.lower()]
+            current = cache.get(coords["lat"], coords["lon"], CURRENT_VARIABLES)
+            if current is not None:
+                results[city] = self._format_weather(current)
+            else:
+                missing.append(city)
+        
+        if not missing:
+            return results
+        
+        coords_list = [self.city_coordinates[city.lower()] for city in missing]
+        try:
+            observations = await self._fetch_current_batch(coords_list)
+        except Exception as e:
+            self.logger.warning(f"Lote de clima falhou ({e}); buscando cidades em paralelo")
+            weather = await asyncio.gather(*(self._get_weather(city) for city in missing))
+            results.update(zip(missing, weather))
+            return results
+        
+        for city, coords, current in zip(missing, coords_list, observations):
+            cache.put(coords["lat"], coords["lon"], CURRENT_VARIABLES, current)
+            results[city] = self._format_weather(current)
+        
+        return results
+
+    async def _fetch_current_batch(self, coords_list: List[Dict[str, float]]) -> List[Dict[str, Any]]:
+        """Busca as condições atuais de vários pontos em uma requisição (sem cache)."""
         params = {
-            "latitude": coords["lat"],
-            "longitude": coords["lon"],
-            "current": "temperature_2m,relative_humidity_2m,weather_code,wind_speed_10m",
+            "latitude": ",".join(str(coords["lat"]) for coords in coords_list),
+            "longitude": ",".join(str(coords["lon"]) for coords in coords_list),
+            "current": CURRENT_VARIABLES,
             "timezone": "America/Sao_Paulo"
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(self.api_base_url, params=params)
-            response.raise_for_status()
-            data = response.json()
+        data = await self._get_json(self.api_base_url, params=params)
         
-        current = data.get("current", {})
+        # A Open-Meteo retorna um objeto para um ponto e uma lista para vários
+        locations = data if isinstance(data, list) else [data]
+        if len(locations) != len(coords_list):
+            raise ValueError(f"Esperados {len(coords_list)} pontos, recebidos {len(locations)}")
         
+        return [location.get("current", {}) for location in locations]
+
+    def _format_weather(self, current: Dict[str, Any]) -> Dict[str, Any]:
+        """Converte o bloco ``current`` da API no formato de resposta do agente."""
         return {
             "temperature": current.get("temperature_2m"),
             "humidity": current.get("relative_humidity_2m"),
@@ -125,6 +218,18 @@ class WeatherAgent(BaseAgent):
             }
         }
 
+    async def _fetch_current(self, latitude: float, longitude: float) -> Dict[str, Any]:
+        """Busca as condições atuais diretamente na API (sem cache)."""
+        params = {
+            "latitude": latitude,
+            "longitude": longitude,
+            "current": CURRENT_VARIABLES,
+            "timezone": "America/Sao_Paulo"
+        }
+        
+        data = await self._get_json(self.api_base_url, params=params)
+        return data.get("current", {})
+
     def _get_weather_condition(self, code: int) -> str:
         """Converte código de clima em descrição."""
         conditions = {
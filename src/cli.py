@@ -9,10 +9,12 @@ import click
 from rich.console import Console
 from rich.markdown import Markdown
 from rich.panel import Panel
+from rich.table import Table
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.orchestrator.main import Orchestrator
+from src.orchestrator.batch import run_batch
+from src.orchestrator.main import Orchestrator, get_orchestrator, shutdown_orchestrator
 
 console = Console()
 
@@ -69,11 +71,31 @@ async def interactive_mode(orchestrator: Orchestrator):
             console.print(f"[bold red]❌ Erro: {str(e)}[/bold red]")
 
 
-@click.command()
-@click.argument('query', required=False)
-@click.option('--interactive', '-i', is_flag=True, help='Modo interativo')
-@click.option('--verbose', '-v', is_flag=True, help='Modo verbose')
-def main(query: Optional[str], interactive: bool, verbose: bool):
+class DefaultGroup(click.Group):
+    """Grupo de comandos que usa ``query`` quando nenhum subcomando é informado.
+    
+    Mantém a forma antiga (``cli.py "pergunta"`` / ``cli.py --interactive``)
+    ao lado de subcomandos como ``cli.py batch entrada.jsonl``.
+    """
+
+    default_command = "query"
+
+    def parse_args(self, ctx, args):
+        if not args or (args[0] not in self.commands and args[0] != "--help"):
+            args = [self.default_command] + list(args)
+        return super().parse_args(ctx, args)
+
+
+def print_banner():
+    console.print(Panel(
+        "[bold cyan]🤖 Super Agent[/bold cyan]\n"
+        "Sistema Multi-Agente com LangGraph + MCP",
+        border_style="blue"
+    ))
+
+
+@click.group(cls=DefaultGroup)
+def main():
     """Super Agent - Sistema Multi-Agente CLI
     
     Exemplos:
@@ -83,19 +105,25 @@ def main(query: Optional[str], interactive: bool, verbose: bool):
         
         # Modo interativo
         python src/cli.py --interactive
+        
+        # Lote JSONL
+        python src/cli.py batch queries.jsonl -o respostas.jsonl
     """
-    # Banner
-    console.print(Panel(
-        "[bold cyan]🤖 Super Agent[/bold cyan]\n"
-        "Sistema Multi-Agente com LangGraph + MCP",
-        border_style="blue"
-    ))
+
+
+@main.command("query")
+@click.argument('query', required=False)
+@click.option('--interactive', '-i', is_flag=True, help='Modo interativo')
+@click.option('--verbose', '-v', is_flag=True, help='Modo verbose')
+def query_command(query: Optional[str], interactive: bool, verbose: bool):
+    """Executa uma query ou abre o modo interativo (comando padrão)."""
+    print_banner()
     
     if verbose:
         os.environ["LOG_LEVEL"] = "DEBUG"
     
     async def run():
-        orchestrator = Orchestrator()
+        orchestrator = get_orchestrator()
         
         try:
             await orchestrator.start()
@@ -109,10 +137,67 @@ def main(query: Optional[str], interactive: bool, verbose: bool):
                 console.print("\nUso: python src/cli.py [QUERY] ou --interactive")
         
         finally:
-            await orchestrator.stop()
+            await shutdown_orchestrator()
     
     asyncio.run(run())
 
 
+@main.command("batch")
+@click.argument('input_path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--output', '-o', 'output_path', required=True, type=click.Path(dir_okay=False),
+              help='Arquivo JSONL de respostas')
+@click.option('--concurrency', '-c', type=int, default=None,
+              help='Queries simultâneas (padrão: BATCH_CONCURRENCY ou 8)')
+@click.option('--unordered', is_flag=True, help='Grava cada resposta assim que fica pronta')
+@click.option('--checkpoint', 'checkpoint_path', type=click.Path(dir_okay=False), default=None,
+              help='Arquivo de checkpoint (padrão: <output>.ckpt)')
+@click.option('--no-resume', is_flag=True, help='Ignora o checkpoint e sobrescreve a saída')
+@click.option('--field', 'query_field', default='query', show_default=True,
+              help='Campo com a query em cada objeto JSON')
+def batch_command(
+    input_path: str,
+    output_path: str,
+    concurrency: Optional[int],
+    unordered: bool,
+    checkpoint_path: Optional[str],
+    no_resume: bool,
+    query_field: str
+):
+    """Processa um arquivo JSONL de queries com um único orquestrador."""
+    print_banner()
+    
+    async def run():
+        orchestrator = get_orchestrator()
+        
+        try:
+            await orchestrator.start()
+            return await run_batch(
+                orchestrator,
+                input_path,
+                output_path,
+                concurrency=concurrency,
+                ordered=not unordered,
+                checkpoint_path=checkpoint_path,
+                resume=not no_resume,
+                query_field=query_field
+            )
+        finally:
+            await shutdown_orchestrator()
+    
+    report = asyncio.run(run())
+    
+    table = Table(title="📦 Lote concluído")
+    table.add_column("Métrica")
+    table.add_column("Valor", justify="right")
+    table.add_row("Processadas", str(report.processed))
+    table.add_row("Sucesso / Falha", f"{report.succeeded} / {report.failed}")
+    table.add_row("Já gravadas (retomada)", str(report.skipped))
+    table.add_row("Tempo total", f"{report.elapsed_s:.2f}s")
+    table.add_row("Vazão", f"{report.throughput_qps:.2f} queries/s")
+    for name, value in report.latency_ms.items():
+        table.add_row(f"Latência {name}", f"{value:.1f}ms")
+    console.print(table)
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
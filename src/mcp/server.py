@@ -3,12 +3,26 @@ MCP Server - Servidor FastMCP puro para Sistema Multi-Agente
 """
 import asyncio
 import logging
+import os
 import sys
 from pathlib import Path
+from typing import Optional
+
+import httpx
 from fastmcp import FastMCP
 
-# Adicionar o diretório src ao path
-sys.path.insert(0, str(Path(__file__).parent.parent))
+# Adicionar a raiz do projeto ao path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.agents.weather_agent import CITY_COORDINATES, CURRENT_VARIABLES
+from src.utils.exchange_rates import get_exchange_rate_store
+from src.utils.finance_batch import compound_interest_batch, compound_interest_schedule, convert_batch
+from src.utils.geocoding import GeocodingCache
+from src.utils.http import create_http_client
+from src.utils.sqlite_executor import get_executor, shutdown_executor
+from src.utils.sqlite_pool import close_all_pools, get_pool
+from src.utils.sqlite_stream import fetch_page
+from src.utils.weather_cache import get_observation_cache
 
 # Configuração de logging
 logging.basicConfig(
@@ -25,12 +39,109 @@ mcp = FastMCP(
 
 logger.info("✅ MCP Server configurado")
 
+# URLs padrão das APIs externas (sobrescritas pelas variáveis de ambiente homônimas)
+DEFAULT_GEOCODING_API_URL = "https://geocoding-api.open-meteo.com/v1/search"
+DEFAULT_WEATHER_API_URL = "https://api.open-meteo.com/v1/forecast"
+
+# Banco consultado por query_database (sobrescrito por MCP_DATABASE_PATH)
+DEFAULT_DATABASE_PATH = Path(__file__).parent.parent.parent / "data" / "database.db"
+
+# Cliente HTTP compartilhado pelas ferramentas (criado sob demanda)
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Retorna o cliente HTTP com pool de conexões compartilhado pelas ferramentas."""
+    global _http_client
+    
+    if _http_client is None or _http_client.is_closed:
+        _http_client = create_http_client()
+    
+    return _http_client
+
+
+async def close_http_client():
+    """Fecha o cliente HTTP compartilhado."""
+    global _http_client
+    
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+async def _get_json(url: str, params: dict = None) -> dict:
+    """GET assíncrono via pool compartilhado."""
+    response = await get_http_client().get(url, params=params)
+    response.raise_for_status()
+    return response.json()
+
+
+# Cache de geocodificação (criado sob demanda e semeado com as cidades do WeatherAgent)
+_geocoding_cache: Optional[GeocodingCache] = None
+
+
+def get_geocoding_cache() -> GeocodingCache:
+    """Retorna o cache de geocodificação compartilhado pelas ferramentas."""
+    global _geocoding_cache
+    
+    if _geocoding_cache is None:
+        _geocoding_cache = GeocodingCache()
+        _geocoding_cache.seed(CITY_COORDINATES)
+    
+    return _geocoding_cache
+
+
+def close_geocoding_cache():
+    """Fecha o cache de geocodificação compartilhado."""
+    global _geocoding_cache
+    
+    if _geocoding_cache is not None:
+        _geocoding_cache.close()
+        _geocoding_cache = None
+
+
+async def _geocode(city: str, country: str) -> Optional[dict]:
+    """Resolve as coordenadas da cidade, consultando a API só em cache miss.
+    
+    As leituras e gravações no SQLite rodam em thread para não bloquear o event loop.
+    """
+    cache = get_geocoding_cache()
+    coords = await asyncio.to_thread(cache.lookup, city, country)
+    if coords is not None:
+        return coords
+    
+    geo_data = await _get_json(
+        os.getenv("GEOCODING_API_URL", DEFAULT_GEOCODING_API_URL),
+        params={"name": city, "count": 1, "language": "pt", "format": "json", "countryCode": country}
+    )
+    if not geo_data.get("results"):
+        return None
+    
+    result = geo_data["results"][0]
+    await asyncio.to_thread(cache.store, city, result["latitude"], result["longitude"], country)
+    return {"name": city, "latitude": result["latitude"], "longitude": result["longitude"]}
+
+
+async def _fetch_current(latitude: float, longitude: float) -> dict:
+    """Busca as condições atuais na API de clima (sem cache)."""
+    weather_data = await _get_json(
+        os.getenv("WEATHER_API_BASE_URL", DEFAULT_WEATHER_API_URL),
+        params={
+            "latitude": latitude,
+            "longitude": longitude,
+            "current": CURRENT_VARIABLES,
+            "timezone": "America/Sao_Paulo"
+        }
+    )
+    return weather_data["current"]
+
+
 # ============================================================================
 # FERRAMENTAS MCP - Definidas diretamente aqui
 # ============================================================================
 
 @mcp.tool()
-def get_weather(city: str, country: str = "BR") -> dict:
+async def get_weather(city: str, country: str = "BR") -> dict:
     """
     Obtém informações de clima para uma cidade.
     
@@ -41,30 +152,29 @@ def get_weather(city: str, country: str = "BR") -> dict:
     Returns:
         Dicionário com informações do clima
     """
-    import requests
-    
     try:
-        # Geocoding para obter coordenadas
-        geo_url = f"https://geocoding-api.open-meteo.com/v1/search?name={city}&count=1&language=pt&format=json"
-        geo_response = requests.get(geo_url)
-        geo_data = geo_response.json()
+        # Geocoding para obter coordenadas (cache local antes da API)
+        coords = await _geocode(city, country)
         
-        if not geo_data.get("results"):
+        if coords is None:
             return {"error": f"Cidade {city} não encontrada"}
         
-        latitude = geo_data["results"][0]["latitude"]
-        longitude = geo_data["results"][0]["longitude"]
+        latitude = coords["latitude"]
+        longitude = coords["longitude"]
         
-        # Obter clima
-        weather_url = f"https://api.open-meteo.com/v1/forecast?latitude={latitude}&longitude={longitude}&current=temperature_2m,relative_humidity_2m,wind_speed_10m&timezone=America/Sao_Paulo"
-        weather_response = requests.get(weather_url)
-        weather_data = weather_response.json()
+        # Obter clima (cache por janela de tempo, um fetch por chave)
+        current = await get_observation_cache().get_or_fetch(
+            latitude,
+            longitude,
+            CURRENT_VARIABLES,
+            lambda: _fetch_current(latitude, longitude)
+        )
         
         return {
             "city": city,
-            "temperature": weather_data["current"]["temperature_2m"],
-            "humidity": weather_data["current"]["relative_humidity_2m"],
-            "wind_speed": weather_data["current"]["wind_speed_10m"],
+            "temperature": current["temperature_2m"],
+            "humidity": current["relative_humidity_2m"],
+            "wind_speed": current["wind_speed_10m"],
             "unit": "°C"
         }
     except Exception as e:
@@ -73,47 +183,39 @@ def get_weather(city: str, country: str = "BR") -> dict:
 
 
 @mcp.tool()
-def query_database(sql: str) -> dict:
+async def query_database(sql: str, page_size: int = 500, page_token: Optional[str] = None) -> dict:
     """
     Executa uma query SQL no banco de dados.
     
     Args:
         sql: Query SQL a ser executada (apenas SELECT)
+        page_size: Máximo de linhas retornadas por chamada
+        page_token: Token ``next_page_token`` da página anterior
     
     Returns:
-        Resultado da query
+        Página do resultado: colunas, linhas e token da próxima página
     """
-    import sqlite3
-    
     try:
         # Validar que é apenas SELECT
         if not sql.strip().upper().startswith("SELECT"):
             return {"error": "Apenas queries SELECT são permitidas"}
         
-        # Conectar ao banco
-        db_path = Path(__file__).parent.parent.parent / "data" / "database.db"
-        conn = sqlite3.connect(str(db_path))
-        cursor = conn.cursor()
+        # Conexão persistente somente leitura do pool
+        db_path = os.getenv("MCP_DATABASE_PATH", str(DEFAULT_DATABASE_PATH))
         
-        # Executar query
-        cursor.execute(sql)
-        results = cursor.fetchall()
-        columns = [desc[0] for desc in cursor.description]
-        
-        conn.close()
-        
-        return {
-            "columns": columns,
-            "rows": results,
-            "count": len(results)
-        }
+        # Executar query fora do event loop (pool de threads com timeout),
+        # materializando apenas a página solicitada
+        return await get_executor().run(
+            get_pool(db_path),
+            lambda conn: fetch_page(conn, sql, page_size=page_size, page_token=page_token)
+        )
     except Exception as e:
         logger.error(f"Erro ao executar query: {e}")
         return {"error": str(e)}
 
 
 @mcp.tool()
-def convert_currency(amount: float, from_currency: str, to_currency: str) -> dict:
+async def convert_currency(amount: float, from_currency: str, to_currency: str) -> dict:
     """
     Converte valores entre moedas.
     
@@ -125,18 +227,13 @@ def convert_currency(amount: float, from_currency: str, to_currency: str) -> dic
     Returns:
         Resultado da conversão
     """
-    import requests
-    
     try:
-        # API de taxas de câmbio
-        url = f"https://api.exchangerate-api.com/v4/latest/{from_currency.upper()}"
-        response = requests.get(url)
-        data = response.json()
+        # Taxas compartilhadas (tabela por moeda base com TTL, triangulação e snapshot)
+        rate = await get_exchange_rate_store().rate(from_currency, to_currency, _get_json)
         
-        if to_currency.upper() not in data["rates"]:
+        if rate is None:
             return {"error": f"Moeda {to_currency} não encontrada"}
         
-        rate = data["rates"][to_currency.upper()]
         converted_amount = amount * rate
         
         return {
@@ -184,6 +281,82 @@ def calculate_compound_interest(
         return {"error": str(e)}
 
 
+@mcp.tool()
+async def convert_currency_batch(
+    amounts: list[float],
+    from_currencies: list[str],
+    to_currencies: list[str]
+) -> dict:
+    """
+    Converte uma lista de valores entre moedas.
+    
+    Args:
+        amounts: Valores a serem convertidos
+        from_currencies: Moeda de origem de cada valor (ou uma só para todos)
+        to_currencies: Moeda de destino de cada valor (ou uma só para todos)
+    
+    Returns:
+        Colunas amount, from_currency, to_currency, rate e converted_amount
+    """
+    try:
+        # Uma tabela (moeda pivô) responde a todos os pares por triangulação
+        rates = await get_exchange_rate_store().cross_rates(from_currencies + to_currencies, _get_json)
+        
+        return convert_batch(amounts, from_currencies, to_currencies, rates)
+    except Exception as e:
+        logger.error(f"Erro ao converter moedas em lote: {e}")
+        return {"error": str(e)}
+
+
+@mcp.tool()
+def calculate_compound_interest_batch(
+    principals: list[float],
+    rates: list[float],
+    periods: list[int]
+) -> dict:
+    """
+    Calcula juros compostos para vários cenários de uma vez.
+    
+    Args:
+        principals: Valores iniciais (ou um só para todos os cenários)
+        rates: Taxas por período em decimal (ou uma só para todos)
+        periods: Números de períodos (ou um só para todos)
+    
+    Returns:
+        Colunas principal, rate, periods, final_amount e interest_earned
+    """
+    try:
+        return compound_interest_batch(principals, rates, periods)
+    except Exception as e:
+        logger.error(f"Erro ao calcular juros em lote: {e}")
+        return {"error": str(e)}
+
+
+@mcp.tool()
+def compound_interest_schedule_table(
+    principals: list[float],
+    rates: list[float],
+    periods: list[int]
+) -> dict:
+    """
+    Gera a tabela período a período dos juros compostos de cada cenário.
+    
+    Args:
+        principals: Valores iniciais (ou um só para todos os cenários)
+        rates: Taxas por período em decimal (ou uma só para todos)
+        periods: Números de períodos de cada cenário (ou um só para todos)
+    
+    Returns:
+        Colunas scenario, period, opening_balance, interest, closing_balance
+        e cumulative_interest (uma linha por cenário e período)
+    """
+    try:
+        return compound_interest_schedule(principals, rates, periods)
+    except Exception as e:
+        logger.error(f"Erro ao gerar tabela de juros: {e}")
+        return {"error": str(e)}
+
+
 logger.info("✅ Ferramentas MCP registradas")
 
 # ============================================================================
@@ -202,6 +375,11 @@ async def main():
     except Exception as e:
         logger.error(f"❌ Erro ao iniciar MCP Server: {e}")
         raise
+    finally:
+        await close_http_client()
+        close_geocoding_cache()
+        shutdown_executor()
+        close_all_pools()
 
 
 if __name__ == "__main__":
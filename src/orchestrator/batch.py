@@ -0,0 +1,342 @@
+"""Processamento em lote de queries com concorrência limitada e checkpoint
+
+Uso pela CLI:
+
+    super-agent batch queries.jsonl -o respostas.jsonl --concurrency 16
+
+Cada linha do arquivo de entrada é um objeto JSON com a query (campo
+``query`` por padrão, ``context`` opcional) ou um texto simples. As
+respostas saem em JSONL com o número da linha de origem (``line``).
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Set
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Frequência (em respostas gravadas) de atualização do checkpoint
+CHECKPOINT_EVERY = 50
+
+
+@dataclass
+class BatchItem:
+    """Query de entrada com a posição de origem."""
+
+    index: int
+    query: str
+    context: Optional[Dict[str, Any]] = None
+    record: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+@dataclass
+class BatchResult:
+    """Resposta de uma query do lote."""
+
+    item: BatchItem
+    response: Dict[str, Any]
+    latency_ms: float
+
+
+@dataclass
+class BatchReport:
+    """Resumo de uma execução em lote."""
+
+    processed: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    skipped: int = 0
+    elapsed_s: float = 0.0
+    throughput_qps: float = 0.0
+    latency_ms: Dict[str, float] = field(default_factory=dict)
+
+
+async def iter_batch(
+    orchestrator,
+    items: Iterable[BatchItem],
+    concurrency: int = 8,
+    ordered: bool = True
+) -> AsyncIterator[BatchResult]:
+    """Executa as queries com no máximo ``concurrency`` em andamento.
+
+    A entrada é consumida sob demanda (no máximo ``4 * concurrency`` itens
+    lidos e ainda não entregues), então arquivos grandes não ficam em memória.
+
+    Args:
+        orchestrator: Objeto com ``process_query(query, context)`` (ex: ``Orchestrator``)
+        items: Queries a processar
+        concurrency: Máximo de queries simultâneas
+        ordered: ``True`` entrega na ordem de entrada; ``False`` na ordem de conclusão
+
+    Yields:
+        Resultado de cada item
+    """
+    pending: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+    done: asyncio.Queue = asyncio.Queue()
+    window = asyncio.Semaphore(4 * concurrency)
+
+    async def feed():
+        try:
+            for seq, item in enumerate(items):
+                await window.acquire()
+                await pending.put((seq, item))
+        finally:
+            for _ in range(concurrency):
+                await pending.put(None)
+
+    async def work():
+        try:
+            while True:
+                task = await pending.get()
+                if task is None:
+                    await done.put(None)
+                    return
+                seq, item = task
+                started = time.perf_counter()
+                if item.error is not None:
+                    response = {"success": False, "query": item.query, "error": item.error}
+                else:
+                    try:
+                        response = await orchestrator.process_query(item.query, item.context)
+                    except Exception as e:
+                        response = {"success": False, "query": item.query, "error": str(e)}
+                latency_ms = (time.perf_counter() - started) * 1000
+                await done.put((seq, BatchResult(item, response, latency_ms)))
+        except BaseException as e:
+            # Falha fatal (ex: cancelamento): interrompe o lote em vez de travar
+            done.put_nowait(e)
+            raise
+
+    tasks = [asyncio.create_task(feed())] + [asyncio.create_task(work()) for _ in range(concurrency)]
+    buffered: Dict[int, BatchResult] = {}
+    next_seq = 0
+    finished = 0
+    try:
+        while finished < concurrency:
+            entry = await done.get()
+            if entry is None:
+                finished += 1
+                continue
+            if isinstance(entry, BaseException):
+                raise entry
+            seq, result = entry
+            if not ordered:
+                window.release()
+                yield result
+                continue
+            buffered[seq] = result
+            while next_seq in buffered:
+                window.release()
+                yield buffered.pop(next_seq)
+                next_seq += 1
+        # Propaga erros do leitor de entrada
+        await tasks[0]
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _parse_line(index: int, line: str, query_field: str) -> Optional[BatchItem]:
+    """Converte uma linha do JSONL em item (``None`` para linhas vazias)."""
+    text = line.strip()
+    if not text:
+        return None
+    if not text.startswith("{"):
+        return BatchItem(index, text)
+    try:
+        record = json.loads(text)
+    except ValueError as e:
+        return BatchItem(index, text, error=f"JSON inválido: {e}")
+    query = record.get(query_field)
+    if not isinstance(query, str) or not query.strip():
+        return BatchItem(index, "", record=record, error=f"Campo '{query_field}' ausente")
+    context = record.get("context") if isinstance(record.get("context"), dict) else None
+    return BatchItem(index, query, context, record)
+
+
+def _output_record(result: BatchResult) -> Dict[str, Any]:
+    item, response = result.item, result.response
+    record = {"line": item.index}
+    if "id" in item.record:
+        record["id"] = item.record["id"]
+    record.update({
+        "query": item.query,
+        "success": bool(response.get("success")),
+        "agent": response.get("agent"),
+        "answer": response.get("answer"),
+        "error": response.get("error"),
+        "cached": response.get("cached"),
+        "latency_ms": round(result.latency_ms, 2)
+    })
+    return {key: value for key, value in record.items() if value is not None}
+
+
+class Checkpoint:
+    """Posição de retomada: todas as linhas antes de ``offset`` já foram gravadas.
+
+    Com saída fora de ordem, linhas posteriores já gravadas ficam em ``done``.
+    ``byte_offset`` permite retomar a leitura sem reler o início do arquivo e
+    ``output_size`` é o tamanho da saída no momento do checkpoint (respostas
+    gravadas depois dele são descartadas ao retomar, pois serão refeitas).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        offset: int = 0,
+        byte_offset: int = 0,
+        done: Optional[Set[int]] = None,
+        output_size: Optional[int] = None
+    ):
+        self.path = path
+        self.offset = offset
+        self.byte_offset = byte_offset
+        self.done: Set[int] = set(done or ())
+        self.output_size = output_size
+        self.loaded = False
+        self._starts: Dict[int, int] = {offset: byte_offset}
+
+    @classmethod
+    def load(cls, path: str) -> "Checkpoint":
+        """Lê o checkpoint (ou começa do zero se não existir/estiver corrompido)."""
+        if not os.path.exists(path):
+            return cls(path)
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            output_size = data.get("output_size")
+            checkpoint = cls(
+                path, int(data["offset"]), int(data["byte_offset"]), set(data.get("done", [])),
+                int(output_size) if output_size is not None else None
+            )
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Checkpoint {path} ignorado: {e}")
+            return cls(path)
+        checkpoint.loaded = True
+        return checkpoint
+
+    def read(self, handle, query_field: str) -> Iterator[BatchItem]:
+        """Lê as linhas a partir do checkpoint, pulando as já gravadas."""
+        handle.seek(self.byte_offset)
+        position = self.byte_offset
+        for index, raw in enumerate(handle, start=self.offset):
+            position += len(raw)
+            self._starts[index + 1] = position
+            item = None if index in self.done else _parse_line(index, raw.decode("utf-8", "replace"), query_field)
+            if item is None:
+                self.complete(index)
+                continue
+            yield item
+
+    def complete(self, index: int):
+        """Marca a linha como gravada e avança o offset contíguo."""
+        self.done.add(index)
+        while self.offset in self.done and self.offset + 1 in self._starts:
+            self.done.discard(self.offset)
+            del self._starts[self.offset]
+            self.offset += 1
+        self.byte_offset = self._starts[self.offset]
+
+    def save(self, output_size: Optional[int] = None):
+        """Grava o checkpoint (``output_size``: bytes da saída já no disco)."""
+        if output_size is not None:
+            self.output_size = output_size
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "offset": self.offset,
+                "byte_offset": self.byte_offset,
+                "done": sorted(self.done),
+                "output_size": self.output_size
+            }, f)
+        os.replace(tmp_path, self.path)
+
+
+def _percentiles(latencies: List[float]) -> Dict[str, float]:
+    if not latencies:
+        return {}
+    values = np.asarray(latencies)
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {
+        "mean": round(float(values.mean()), 2),
+        "p50": round(float(p50), 2),
+        "p90": round(float(p90), 2),
+        "p99": round(float(p99), 2),
+        "max": round(float(values.max()), 2)
+    }
+
+
+async def run_batch(
+    orchestrator,
+    input_path: str,
+    output_path: str,
+    concurrency: Optional[int] = None,
+    ordered: bool = True,
+    checkpoint_path: Optional[str] = None,
+    resume: bool = True,
+    query_field: str = "query"
+) -> BatchReport:
+    """Processa um arquivo JSONL de queries e grava as respostas em JSONL.
+
+    Args:
+        orchestrator: Orquestrador compartilhado por todas as queries
+        input_path: Arquivo de entrada (uma query por linha)
+        output_path: Arquivo de saída (acrescentado ao retomar de um checkpoint)
+        concurrency: Queries simultâneas (padrão: ``BATCH_CONCURRENCY`` ou 8)
+        ordered: Grava na ordem da entrada (``False``: na ordem de conclusão)
+        checkpoint_path: Arquivo de checkpoint (padrão: ``<output_path>.ckpt``)
+        resume: Retoma do checkpoint; ``False`` recomeça e sobrescreve a saída
+        query_field: Campo com a query nos objetos JSON
+
+    Returns:
+        Contagens, vazão e percentis de latência
+    """
+    if concurrency is None:
+        concurrency = int(os.getenv("BATCH_CONCURRENCY", "8"))
+    checkpoint_path = checkpoint_path or f"{output_path}.ckpt"
+    checkpoint = Checkpoint.load(checkpoint_path) if resume else Checkpoint(checkpoint_path)
+    report = BatchReport(skipped=checkpoint.offset + len(checkpoint.done))
+    if report.skipped:
+        logger.info(f"Retomando lote a partir da linha {checkpoint.offset} ({report.skipped} já gravadas)")
+
+    latencies: List[float] = []
+    started = time.perf_counter()
+    with open(input_path, "rb") as source, \
+            open(output_path, "a" if checkpoint.loaded else "w", encoding="utf-8") as output:
+        if checkpoint.output_size is not None:
+            # Respostas gravadas após o último checkpoint serão refeitas
+            if output.tell() > checkpoint.output_size:
+                output.truncate(checkpoint.output_size)
+                output.seek(checkpoint.output_size)
+            elif output.tell() < checkpoint.output_size:
+                logger.warning(f"Saída {output_path} menor que a registrada no checkpoint")
+        results = iter_batch(orchestrator, checkpoint.read(source, query_field), concurrency, ordered)
+        async for result in results:
+            output.write(json.dumps(_output_record(result), ensure_ascii=False) + "\n")
+            latencies.append(result.latency_ms)
+            report.processed += 1
+            if result.response.get("success"):
+                report.succeeded += 1
+            else:
+                report.failed += 1
+            checkpoint.complete(result.item.index)
+            if report.processed % CHECKPOINT_EVERY == 0:
+                # A saída vai para o disco antes do checkpoint que a referencia
+                output.flush()
+                checkpoint.save(output.tell())
+        output.flush()
+        checkpoint.save(output.tell())
+
+    report.elapsed_s = round(time.perf_counter() - started, 3)
+    report.throughput_qps = round(report.processed / report.elapsed_s, 2) if report.elapsed_s else 0.0
+    report.latency_ms = _percentiles(latencies)
+    logger.info(f"📦 Lote concluído: {asdict(report)}")
+    return report
@@ -0,0 +1,125 @@
+"""Micro-batching de chamadas assíncronas (ex: roteamento pelo LLM)
+
+Pedidos que chegam quase juntos são agrupados por até ``max_wait_ms``
+milissegundos ou ``max_batch`` itens e resolvidos por uma única chamada em
+lote. Itens que o lote não resolveu (resposta incompleta ou erro) caem na
+chamada individual, então o resultado para quem espera é o mesmo.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+BatchFn = Callable[[Sequence[Any]], Awaitable[Sequence[Optional[Any]]]]
+SingleFn = Callable[[Any], Awaitable[Any]]
+
+
+class MicroBatcher:
+    """Agrupa chamadas concorrentes de ``submit`` em chamadas de ``batch_fn``."""
+
+    def __init__(
+        self,
+        batch_fn: BatchFn,
+        single_fn: SingleFn,
+        max_batch: Optional[int] = None,
+        max_wait_ms: Optional[float] = None
+    ):
+        """Configura o agrupamento.
+
+        Args:
+            batch_fn: Resolve uma lista de itens; devolve um resultado por item
+                (``None`` onde não conseguiu)
+            single_fn: Resolve um item isolado (lotes de um item e fallback)
+            max_batch: Itens por lote (padrão: ``ROUTING_BATCH_SIZE`` ou 16)
+            max_wait_ms: Espera máxima pelo lote encher
+                (padrão: ``ROUTING_BATCH_WAIT_MS`` ou 5)
+        """
+        self.batch_fn = batch_fn
+        self.single_fn = single_fn
+        self.max_batch = max_batch or int(os.getenv("ROUTING_BATCH_SIZE", "16"))
+        if max_wait_ms is None:
+            max_wait_ms = float(os.getenv("ROUTING_BATCH_WAIT_MS", "5"))
+        self.max_wait = max_wait_ms / 1000
+
+        self.batches = 0
+        self.batched_items = 0
+        self.single_calls = 0
+        self.fallbacks = 0
+        self.failed_batches = 0
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+
+    async def submit(self, item: Any) -> Any:
+        """Enfileira o item e espera o resultado do lote em que ele entrar."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]):
+        items = [item for item, _ in batch]
+        results: Sequence[Optional[Any]] = [None] * len(items)
+
+        if len(items) > 1:
+            self.batches += 1
+            self.batched_items += len(items)
+            try:
+                results = await self.batch_fn(items)
+                if len(results) != len(items):
+                    raise ValueError(f"{len(results)} resultados para {len(items)} itens")
+            except Exception as e:
+                self.failed_batches += 1
+                logger.warning(f"Lote de {len(items)} itens falhou, usando chamadas individuais: {e}")
+                results = [None] * len(items)
+
+        async def resolve(item: Any, future: asyncio.Future, result: Optional[Any]):
+            if result is None:
+                if len(items) > 1:
+                    self.fallbacks += 1
+                self.single_calls += 1
+                try:
+                    result = await self.single_fn(item)
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                    return
+            if not future.done():
+                future.set_result(result)
+
+        await asyncio.gather(*(
+            resolve(item, future, result) for (item, future), result in zip(batch, results)
+        ))
+
+    async def close(self):
+        """Envia o que estiver pendente e espera os lotes em andamento."""
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna lotes enviados, tamanho médio e chamadas individuais."""
+        return {
+            "batches": self.batches,
+            "batched_items": self.batched_items,
+            "avg_batch_size": round(self.batched_items / self.batches, 2) if self.batches else 0.0,
+            "single_calls": self.single_calls,
+            "fallbacks": self.fallbacks,
+            "failed_batches": self.failed_batches
+        }
@@ -0,0 +1,50 @@
+"""Cache de decisões de roteamento do supervisor"""
+
+import os
+from typing import Optional
+
+from src.utils.cache import TTLCache
+from src.utils.text import normalize_text
+
+
+class RoutingCache(TTLCache):
+    """Cache de roteamento indexado pela forma normalizada da query.
+
+    Queries que diferem apenas em caixa, acentos, pontuação ou espaços
+    ("Como está o clima em São Paulo?" / "como esta o clima em sao paulo")
+    compartilham a mesma entrada.
+    """
+
+    def __init__(
+        self,
+        maxsize: Optional[int] = None,
+        ttl: Optional[float] = None,
+        path: Optional[str] = None
+    ):
+        """Inicializa o cache a partir dos argumentos ou do ambiente.
+
+        Args:
+            maxsize: Máximo de entradas (padrão: ``ROUTING_CACHE_SIZE`` ou 1024)
+            ttl: Validade em segundos (padrão: ``ROUTING_CACHE_TTL`` ou 3600)
+            path: Arquivo SQLite para persistência (padrão: ``ROUTING_CACHE_PATH``;
+                vazio mantém o cache apenas em memória)
+        """
+        super().__init__(
+            maxsize=maxsize if maxsize is not None else int(os.getenv("ROUTING_CACHE_SIZE", "1024")),
+            ttl=ttl if ttl is not None else float(os.getenv("ROUTING_CACHE_TTL", "3600")),
+            path=path if path is not None else os.getenv("ROUTING_CACHE_PATH") or None,
+            table="routing_cache"
+        )
+
+    @staticmethod
+    def make_key(query: str) -> str:
+        """Normaliza a query para uso como chave."""
+        return normalize_text(query)
+
+    def get_route(self, query: str) -> Optional[str]:
+        """Retorna o agente já decidido para a query, se houver."""
+        return self.get(self.make_key(query))
+
+    def set_route(self, query: str, agent: str):
+        """Registra a decisão de roteamento da query."""
+        self.set(self.make_key(query), agent)
@@ -0,0 +1,372 @@
+"""Limitador de chamadas ao LLM: janela de concorrência AIMD, token buckets e retry
+
+Sob rajadas, várias queries chegam ao provider ao mesmo tempo, recebem 429
+e repetem juntas. ``LimitedLLM`` envolve o ``ainvoke`` do cliente:
+
+- requisições e tokens por minuto são controlados por token buckets com os
+  limites do provider (``LLM_RPM``/``LLM_TPM``);
+- a concorrência segue uma janela AIMD: cresce ~1 a cada janela de sucessos
+  e cai pela metade a cada 429 (uma vez por rajada);
+- 429 e erros transitórios (5xx, timeout, conexão) são repetidos com backoff
+  exponencial com jitter (respeitando ``Retry-After``);
+- o tempo de espera na fila é medido (``get_stats``).
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Limites padrão por provider (camadas de entrada); sobrescritos por LLM_RPM,
+# LLM_TPM e LLM_MAX_CONCURRENCY
+PROVIDER_LIMITS = {
+    "openai": {"rpm": 500, "tpm": 200000, "max_concurrency": 32},
+    "anthropic": {"rpm": 50, "tpm": 40000, "max_concurrency": 8},
+    "google": {"rpm": 60, "tpm": 250000, "max_concurrency": 8},
+}
+
+# Estimativa de tokens por caractere do prompt (sem tokenizer do provider)
+CHARS_PER_TOKEN = 4
+
+# Quantidade de esperas recentes usadas nos percentis
+WAIT_SAMPLES = 1024
+
+
+def _provider_transient_errors() -> tuple:
+    """Timeouts e falhas de conexão dos clientes de cada provider instalado."""
+    errors = [asyncio.TimeoutError, TimeoutError, ConnectionError, httpx.TransportError]
+    try:
+        import openai
+        errors.append(openai.APIConnectionError)  # inclui APITimeoutError
+    except ImportError:
+        pass
+    try:
+        import anthropic
+        errors.append(anthropic.APIConnectionError)  # inclui APITimeoutError
+    except ImportError:
+        pass
+    try:
+        from google.api_core import exceptions as google_exceptions
+        errors.extend([google_exceptions.DeadlineExceeded, google_exceptions.ServiceUnavailable])
+    except ImportError:
+        pass
+    return tuple(errors)
+
+
+TRANSIENT_ERRORS = _provider_transient_errors()
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """Indica se o erro do provider é um 429 (limite de taxa)."""
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    name = type(error).__name__
+    return status == 429 or "RateLimit" in name or "ResourceExhausted" in name
+
+
+def is_transient(error: BaseException) -> bool:
+    """Indica se o erro é temporário (5xx, sobrecarga, timeout ou falha de conexão)."""
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return (isinstance(status, int) and status >= 500) or isinstance(error, TRANSIENT_ERRORS)
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        value = headers.get("retry-after")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def estimate_tokens(prompt: Any) -> int:
+    """Estima os tokens de entrada de um prompt (texto ou lista de mensagens)."""
+    if isinstance(prompt, str):
+        chars = len(prompt)
+    elif isinstance(prompt, (list, tuple)):
+        chars = sum(len(str(getattr(message, "content", message))) for message in prompt)
+    else:
+        chars = len(str(prompt))
+    return chars // CHARS_PER_TOKEN + 1
+
+
+class TokenBucket:
+    """Balde de ``capacity`` fichas reabastecido a ``rate_per_minute`` fichas por minuto."""
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep
+    ):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = self.capacity
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """Retira ``amount`` fichas, esperando o reabastecimento (ordem de chegada).
+
+        Pedidos maiores que a capacidade esperam o balde encher e deixam o
+        saldo negativo, atrasando os seguintes na mesma proporção.
+
+        Returns:
+            Segundos esperados
+        """
+        waited = 0.0
+        async with self._lock:
+            self._refill()
+            needed = min(amount, self.capacity)
+            while self.tokens < needed:
+                delay = (needed - self.tokens) / self.rate
+                await self.sleep(delay)
+                waited += delay
+                self._refill()
+            self.tokens -= amount
+        return waited
+
+    def adjust(self, amount: float):
+        """Corrige o saldo após conhecer o consumo real (positivo devolve fichas)."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class LLMLimiter:
+    """Controla concorrência, taxa e retentativas das chamadas ao LLM."""
+
+    def __init__(
+        self,
+        rpm: float,
+        tpm: float,
+        max_concurrency: int,
+        min_concurrency: int = 1,
+        initial_concurrency: Optional[int] = None,
+        max_retries: int = 5,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        expected_output_tokens: int = 16,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+        rng: Optional[random.Random] = None
+    ):
+        """Configura o limitador.
+
+        Args:
+            rpm: Requisições por minuto permitidas
+            tpm: Tokens (entrada + saída) por minuto permitidos
+            max_concurrency: Teto da janela de concorrência
+            min_concurrency: Piso da janela após reduções
+            initial_concurrency: Janela inicial (padrão: metade do teto)
+            max_retries: Retentativas por chamada em 429/erros transitórios
+            base_delay: Base do backoff exponencial, em segundos
+            max_delay: Teto do backoff, em segundos
+            expected_output_tokens: Tokens de saída reservados por chamada
+            clock: Fonte de tempo em segundos (injetável para testes)
+            sleep: Corrotina de espera (injetável para testes)
+            rng: Gerador do jitter (injetável para testes)
+        """
+        self.requests = TokenBucket(rpm, clock=clock, sleep=sleep)
+        self.tokens = TokenBucket(tpm, clock=clock, sleep=sleep)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = max(1, min(min_concurrency, max_concurrency))
+        if initial_concurrency is None:
+            initial_concurrency = max(self.min_concurrency, max_concurrency // 2)
+        self.limit = float(initial_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.expected_output_tokens = expected_output_tokens
+        self.clock = clock
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+
+        self.calls = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.failures = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.waiting = 0
+        self._decreased_at = float("-inf")
+        self._waits = deque(maxlen=WAIT_SAMPLES)
+        self._slot_waiters: "deque[asyncio.Future]" = deque()
+
+    @classmethod
+    def from_env(cls, provider: Optional[str] = None, **kwargs) -> "LLMLimiter":
+        """Cria o limitador com os limites do provider (``LLM_PROVIDER``) e do ambiente."""
+        provider = (provider or os.getenv("LLM_PROVIDER", "openai")).lower()
+        defaults = PROVIDER_LIMITS.get(provider, PROVIDER_LIMITS["openai"])
+        initial = os.getenv("LLM_INITIAL_CONCURRENCY")
+        return cls(
+            rpm=float(os.getenv("LLM_RPM", defaults["rpm"])),
+            tpm=float(os.getenv("LLM_TPM", defaults["tpm"])),
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", defaults["max_concurrency"])),
+            min_concurrency=int(os.getenv("LLM_MIN_CONCURRENCY", "1")),
+            initial_concurrency=int(initial) if initial else None,
+            max_retries=int(os.getenv("LLM_MAX_RETRIES", "5")),
+            base_delay=float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5")),
+            max_delay=float(os.getenv("LLM_RETRY_MAX_DELAY", "30")),
+            **kwargs
+        )
+
+    async def _acquire_slot(self):
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._slot_waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.cancelled():
+                    self._slot_waiters.remove(waiter)
+                else:
+                    # Já tinha sido acordado: repassa a vaga para o próximo
+                    self._wake_waiters()
+                raise
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def _release_slot(self):
+        # Síncrono: roda mesmo quando a chamada foi cancelada
+        self.in_flight -= 1
+        self._wake_waiters()
+
+    def _wake_waiters(self):
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._slot_waiters:
+            waiter = self._slot_waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    def _on_success(self):
+        # Aumento aditivo: +1 a cada ``limit`` sucessos
+        self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+
+    def _on_rate_limited(self, started_at: float):
+        self.rate_limited += 1
+        # Chamadas iniciadas antes da última redução pertencem à mesma rajada
+        if started_at <= self._decreased_at:
+            return
+        self.limit = max(float(self.min_concurrency), self.limit / 2)
+        self._decreased_at = self.clock()
+        logger.warning(f"⚠️ LLM limitado pelo provider: concorrência reduzida para {int(self.limit)}")
+
+    def _backoff(self, attempt: int, error: BaseException) -> float:
+        """Backoff exponencial com jitter total (ou ``Retry-After`` + jitter)."""
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            return min(self.max_delay, retry_after) + self.rng.uniform(0, self.base_delay)
+        return self.rng.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    async def call(self, invoke: Callable[[], Awaitable[Any]], tokens: int = 0) -> Any:
+        """Executa ``invoke`` respeitando taxa, concorrência e retentativas.
+
+        Args:
+            invoke: Fábrica da corrotina da chamada (recriada a cada tentativa)
+            tokens: Tokens estimados do prompt (a saída esperada é somada)
+
+        Returns:
+            Resultado da chamada
+        """
+        reserved = tokens + self.expected_output_tokens
+        attempt = 0
+        while True:
+            enqueued = self.clock()
+            self.waiting += 1
+            try:
+                await self.requests.acquire(1)
+                await self.tokens.acquire(reserved)
+                await self._acquire_slot()
+            finally:
+                self.waiting -= 1
+            self._waits.append(self.clock() - enqueued)
+
+            started = self.clock()
+            self.calls += 1
+            delay = None
+            try:
+                result = await invoke()
+            except Exception as e:
+                rate_limited = is_rate_limited(e)
+                if rate_limited:
+                    self._on_rate_limited(started)
+                if not (rate_limited or is_transient(e)) or attempt >= self.max_retries:
+                    self.failures += 1
+                    raise
+                delay = self._backoff(attempt, e)
+            finally:
+                # Libera a vaga também em cancelamentos (timeout, fan-out, shutdown)
+                self._release_slot()
+
+            if delay is not None:
+                # O backoff espera fora da janela; a próxima tentativa reserva
+                # as fichas de novo, então devolve as da tentativa que falhou
+                self.tokens.adjust(reserved)
+                attempt += 1
+                self.retries += 1
+                await self.sleep(delay)
+                continue
+
+            self._on_success()
+            self._wake_waiters()
+            usage = getattr(result, "usage_metadata", None) or {}
+            if usage.get("total_tokens"):
+                self.tokens.adjust(reserved - usage["total_tokens"])
+            return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna janela atual, contadores e percentis da espera na fila."""
+        waits = np.asarray(self._waits) * 1000 if self._waits else np.zeros(1)
+        p50, p95 = np.percentile(waits, [50, 95])
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "waiting": self.waiting,
+            "calls": self.calls,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "failures": self.failures,
+            "queue_wait_ms": {
+                "mean": round(float(waits.mean()), 2),
+                "p50": round(float(p50), 2),
+                "p95": round(float(p95), 2),
+                "max": round(float(waits.max()), 2)
+            }
+        }
+
+
+class LimitedLLM:
+    """Cliente LLM cujo ``ainvoke`` passa pelo ``LLMLimiter``.
+
+    Demais atributos são delegados ao cliente original.
+    """
+
+    def __init__(self, llm, limiter: LLMLimiter):
+        self.llm = llm
+        self.limiter = limiter
+
+    async def ainvoke(self, prompt: Any, *args, **kwargs) -> Any:
+        return await self.limiter.call(
+            lambda: self.llm.ainvoke(prompt, *args, **kwargs),
+            estimate_tokens(prompt)
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.llm, name)
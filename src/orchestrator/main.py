@@ -4,9 +4,12 @@ Orchestrator Main - Orquestrador LangGraph para Sistema Multi-Agente
 import asyncio
 import logging
 import os
+import re
+import time
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Sequence
 
+import httpx
 from dotenv import load_dotenv
 from src.orchestrator.state import AgentState
 
@@ -21,19 +24,40 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 
 from langgraph.graph import StateGraph, END
+from langgraph.types import Send
 from langchain_openai import ChatOpenAI
 from langchain_anthropic import ChatAnthropic
 from langchain_google_genai import ChatGoogleGenerativeAI
 
 # Importar agentes
+from src.agents.base_agent import BaseAgent
 from src.agents.weather_agent import WeatherAgent
-from src.agents.data_agent import DataAgent
+from src.agents.data_agent import QUERY_TEMPLATES, DataAgent
 from src.agents.finance_agent import FinanceAgent
 from src.agents.info_agent import InformationAgent
+from src.orchestrator.batcher import MicroBatcher
+from src.orchestrator.cache import RoutingCache
+from src.orchestrator.limiter import LimitedLLM, LLMLimiter
+from src.orchestrator.response_cache import ResponseCache
+from src.orchestrator.router import LocalRouter
+from src.orchestrator.supervisor import Supervisor
+from src.utils.exchange_rates import get_exchange_rate_store
+from src.utils.knowledge_base import get_knowledge_base
+from src.utils.http import create_http_client
+from src.utils.sqlite_executor import shutdown_executor
+from src.utils.sqlite_pool import close_all_pools
 
+VALID_AGENTS = ["weather_agent", "data_agent", "finance_agent", "info_agent"]
+DEFAULT_AGENT = "info_agent"
 
-def get_llm():
-    """Configura e retorna o LLM baseado nas variáveis de ambiente"""
+
+def get_llm(max_retries: Optional[int] = None):
+    """Configura e retorna o LLM baseado nas variáveis de ambiente
+    
+    Args:
+        max_retries: Retentativas internas do cliente (padrão do provider);
+            zero quando o ``LLMLimiter`` cuida das retentativas
+    """
     provider = os.getenv("LLM_PROVIDER", "openai").lower()
     api_key = os.getenv("LLM_API_KEY")
     model = os.getenv("LLM_MODEL", "gpt-4o-mini")
@@ -43,93 +67,251 @@ def get_llm():
     
     logger.info(f"✅ Configurando LLM: {provider} - {model}")
     
+    options = {"max_retries": max_retries} if max_retries is not None else {}
     if provider == "openai":
-        return ChatOpenAI(api_key=api_key, model=model, temperature=0)
+        return ChatOpenAI(api_key=api_key, model=model, temperature=0, **options)
     elif provider == "anthropic":
-        return ChatAnthropic(api_key=api_key, model=model, temperature=0)
+        return ChatAnthropic(api_key=api_key, model=model, temperature=0, **options)
     elif provider == "google":
-        return ChatGoogleGenerativeAI(api_key=api_key, model=model, temperature=0)
+        return ChatGoogleGenerativeAI(api_key=api_key, model=model, temperature=0, **options)
     else:
         raise ValueError(f"Provider não suportado: {provider}")
 
 
-def create_supervisor_node(llm):
-    """Cria o nó supervisor que decide qual agente usar"""
-    async def supervisor(state: AgentState) -> Dict[str, Any]:
-        query = state.get("query", "")
-        logger.info(f"🧠 Supervisor analisando query: {query}")
-        
-        prompt = f"""Você é um supervisor que coordena agentes especializados.
-
-Query do usuário: {query}
-
-Agentes disponíveis:
+AGENTS_PROMPT = """Agentes disponíveis:
 - weather_agent: Para consultas sobre clima, temperatura, previsão do tempo
 - data_agent: Para consultas sobre dados, banco de dados, reservas, estatísticas
 - finance_agent: Para conversão de moedas, cálculos financeiros, juros
-- information_agent: Para perguntas gerais, explicações, informações diversas
+- info_agent: Para perguntas gerais, explicações, informações diversas"""
+
+# Linha de resposta do roteamento em lote: "3: finance_agent" / "3. weather_agent, info_agent"
+NUMBERED_LINE_RE = re.compile(r"^\s*(\d+)\s*[:.)\-]\s*(.+)$")
+
+
+def extract_agents(text: str) -> List[str]:
+    """Extrai os nomes de agentes válidos (sem repetição) de uma resposta do LLM"""
+    agents = []
+    for name in text.replace(",", " ").lower().split():
+        if name in VALID_AGENTS and name not in agents:
+            agents.append(name)
+    return agents
+
+
+def parse_agents(text: str) -> List[str]:
+    """Como ``extract_agents``, mas cai no agente padrão se nenhum for válido"""
+    return extract_agents(text) or [DEFAULT_AGENT]
+
+
+async def route_with_llm(llm, query: str) -> List[str]:
+    """Pergunta ao LLM quais agentes devem atender a query"""
+    prompt = f"""Você é um supervisor que coordena agentes especializados.
+
+Query do usuário: {query}
+
+{AGENTS_PROMPT}
 
 Analise a query e responda APENAS com o nome do agente mais apropriado.
-Resposta (apenas o nome do agente):"""
+Se a query pedir coisas de áreas diferentes, responda com os nomes separados por vírgula.
+Resposta (apenas o(s) nome(s) do(s) agente(s)):"""
+
+    response = await llm.ainvoke(prompt)
+    return parse_agents(response.content.strip())
+
+
+async def route_batch_with_llm(llm, queries: Sequence[str]) -> List[Optional[List[str]]]:
+    """Roteia várias queries com um único prompt numerado
+    
+    Returns:
+        Agentes de cada query, na ordem recebida; ``None`` para as queries
+        cuja linha de resposta faltou ou não trouxe agente válido
+    """
+    numbered = "\n".join(f"{i}. {' '.join(query.split())}" for i, query in enumerate(queries, start=1))
+    prompt = f"""Você é um supervisor que coordena agentes especializados.
 
-        response = await llm.ainvoke(prompt)
-        agent_name = response.content.strip().lower()
+Queries dos usuários (numeradas):
+{numbered}
+
+{AGENTS_PROMPT}
+
+Para CADA query, responda uma linha no formato "<número>: <agente>", com o
+agente mais apropriado (ou vários separados por vírgula, se a query pedir
+coisas de áreas diferentes). Não escreva mais nada.
+Resposta:"""
+
+    response = await llm.ainvoke(prompt)
+    routes: Dict[int, List[str]] = {}
+    for line in response.content.splitlines():
+        match = NUMBERED_LINE_RE.match(line)
+        if match:
+            agents = extract_agents(match.group(2))
+            if agents:
+                routes.setdefault(int(match.group(1)), agents)
+    return [routes.get(i) for i in range(1, len(queries) + 1)]
+
+
+def create_routing_batcher(llm) -> MicroBatcher:
+    """Agrupa as consultas de roteamento ao LLM feitas quase ao mesmo tempo"""
+    return MicroBatcher(
+        batch_fn=lambda queries: route_batch_with_llm(llm, queries),
+        single_fn=lambda query: route_with_llm(llm, query)
+    )
+
+
+def create_supervisor_node(
+    llm,
+    router: Optional[LocalRouter] = None,
+    cache: Optional[RoutingCache] = None,
+    fan_out: Optional[bool] = None,
+    batcher: Optional[MicroBatcher] = None
+):
+    """Cria o nó supervisor que decide quais agentes usar
+    
+    A decisão é buscada primeiro no ``cache``; em seguida no ``router``
+    local, e o LLM só é consultado se a confiança do roteador ficar abaixo
+    do limiar configurado. Com ``fan_out`` (padrão: ``ROUTER_FAN_OUT``),
+    queries compostas são divididas e enviadas a vários agentes. Com
+    ``batcher``, consultas simultâneas ao LLM viram um único prompt.
+    """
+    if fan_out is None:
+        fan_out = os.getenv("ROUTER_FAN_OUT", "true").lower() == "true"
+    
+    async def supervisor(state: AgentState) -> Dict[str, Any]:
+        query = state.get("query", "")
+        logger.info(f"🧠 Supervisor analisando query: {query}")
+        
+        source = "cache"
+        cached = cache.get_route(query) if cache is not None else None
+        agents = cached.split(",") if cached else None
+        tasks: Dict[str, str] = {}
+        
+        if agents is None and router is not None:
+            tasks = router.split(query) if fan_out else {}
+            if tasks:
+                agents, source = list(tasks), "local"
+            else:
+                decision = router.route(query)
+                if router.is_confident(decision):
+                    agents, source = [decision.agent], "local"
         
-        valid_agents = ["weather_agent", "data_agent", "finance_agent", "information_agent"]
-        if agent_name not in valid_agents:
-            agent_name = "information_agent"
+        if agents is None:
+            if batcher is not None:
+                agents = await batcher.submit(query)
+            else:
+                agents = await route_with_llm(llm, query)
+            source = "llm"
         
-        logger.info(f"👉 Roteando para: {agent_name}")
+        if not fan_out:
+            agents = agents[:1]
+        elif len(agents) > 1 and not tasks and router is not None:
+            tasks = router.split(query)
+        
+        if router is not None:
+            router.record(source)
+        if cache is not None and source != "cache":
+            cache.set_route(query, ",".join(agents))
+        
+        logger.info(f"👉 Roteando para: {', '.join(agents)} ({source})")
         
         return {
-            "next_agent": agent_name,
-            "messages": state.get("messages", []) + [{"supervisor": f"Roteando para {agent_name}"}]
+            "next_agent": agents[0],
+            "next_agents": agents,
+            "tasks": {agent: tasks.get(agent, query) for agent in agents},
+            "messages": state.get("messages", []) + [{"supervisor": f"Roteando para {', '.join(agents)}"}]
         }
     
     return supervisor
 
 
-def create_orchestrator():
-    """Cria o grafo de orquestração do LangGraph"""
-    logger.info("🏗️  Criando orquestrador LangGraph...")
+def create_agent_node(agent: BaseAgent):
+    """Adapta ``BaseAgent.execute`` para a interface de nó do LangGraph
     
-    llm = get_llm()
+    O nó recebe a sub-query do agente (via ``Send``) e só acrescenta seu
+    resultado, para que vários agentes possam rodar no mesmo passo.
+    """
+    async def node(state: Dict[str, Any]) -> Dict[str, Any]:
+        result = await agent.execute(state.get("query", ""), state.get("context") or {})
+        return {"results": [result]}
     
-    weather_agent = WeatherAgent()
-    data_agent = DataAgent()
-    finance_agent = FinanceAgent()
-    information_agent = InformationAgent()
+    return node
+
+
+def create_merge_node(supervisor: Supervisor):
+    """Cria o nó que reúne os resultados dos agentes e sintetiza a resposta"""
+    async def merge(state: AgentState) -> Dict[str, Any]:
+        agents = state.get("next_agents") or []
+        order = {agent: position for position, agent in enumerate(agents)}
+        # A ordem de chegada depende de qual agente terminou primeiro
+        results = sorted(state.get("results", []), key=lambda r: order.get(r.get("agent"), len(order)))
+        return {
+            "current_agent": ",".join(agents),
+            "final_answer": await supervisor.synthesize_response(results)
+        }
     
-    supervisor = create_supervisor_node(llm)
+    return merge
+
+
+def create_agents() -> Dict[str, BaseAgent]:
+    """Instancia os agentes especializados indexados pelo nome"""
+    agents = [WeatherAgent(), DataAgent(), FinanceAgent(), InformationAgent()]
+    return {agent.name: agent for agent in agents}
+
+
+def create_orchestrator(
+    llm=None,
+    agents: Optional[Dict[str, BaseAgent]] = None,
+    router: Optional[LocalRouter] = None,
+    cache: Optional[RoutingCache] = None,
+    supervisor: Optional[Supervisor] = None,
+    batcher: Optional[MicroBatcher] = None
+):
+    """Cria o grafo de orquestração do LangGraph
+    
+    supervisor -> (Send) agentes em paralelo -> merge -> END. A latência
+    de uma query composta é a do agente mais lento, não a soma de todos.
+    
+    Args:
+        llm: LLM usado pelo supervisor (padrão: ``get_llm()``)
+        agents: Agentes já instanciados (padrão: ``create_agents()``)
+        router: Roteador local consultado antes do LLM (opcional)
+        cache: Cache de decisões de roteamento (opcional)
+        supervisor: Sintetizador da resposta final (padrão: ``Supervisor(llm)``)
+        batcher: Micro-batcher das consultas de roteamento ao LLM (opcional)
+    
+    Returns:
+        Grafo compilado
+    """
+    logger.info("🏗️  Criando orquestrador LangGraph...")
+    
+    if llm is None:
+        llm = get_llm()
+    if agents is None:
+        agents = create_agents()
+    if supervisor is None:
+        supervisor = Supervisor(llm=llm)
     
     workflow = StateGraph(AgentState)
     
-    workflow.add_node("supervisor", supervisor)
-    workflow.add_node("weather_agent", weather_agent.execute)
-    workflow.add_node("data_agent", data_agent.execute)
-    workflow.add_node("finance_agent", finance_agent.execute)
-    workflow.add_node("information_agent", information_agent.execute)
+    workflow.add_node("supervisor", create_supervisor_node(llm, router, cache, batcher=batcher))
+    for name, agent in agents.items():
+        workflow.add_node(name, create_agent_node(agent))
+    workflow.add_node("merge", create_merge_node(supervisor))
     
     workflow.set_entry_point("supervisor")
     
-    def route_to_agent(state: AgentState) -> str:
-        return state.get("next_agent", "information_agent")
-    
-    workflow.add_conditional_edges(
-        "supervisor",
-        route_to_agent,
-        {
-            "weather_agent": "weather_agent",
-            "data_agent": "data_agent",
-            "finance_agent": "finance_agent",
-            "information_agent": "information_agent"
-        }
-    )
+    def dispatch(state: AgentState) -> List[Send]:
+        query = state.get("query", "")
+        tasks = state.get("tasks") or {}
+        targets = [agent for agent in state.get("next_agents") or [] if agent in agents]
+        return [
+            Send(agent, {"query": tasks.get(agent, query), "context": state.get("context")})
+            for agent in targets or [DEFAULT_AGENT]
+        ]
+    
+    workflow.add_conditional_edges("supervisor", dispatch, list(agents))
     
-    workflow.add_edge("weather_agent", END)
-    workflow.add_edge("data_agent", END)
-    workflow.add_edge("finance_agent", END)
-    workflow.add_edge("information_agent", END)
+    for name in agents:
+        workflow.add_edge(name, "merge")
+    workflow.add_edge("merge", END)
     
     app = workflow.compile()
     
@@ -137,22 +319,231 @@ def create_orchestrator():
     return app
 
 
-async def process_query(query: str) -> str:
-    """Processa uma query através do orquestrador"""
-    logger.info(f"📥 Processando query: {query}")
-    
-    orchestrator = create_orchestrator()
-    
-    initial_state = {
+def create_initial_state(query: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Monta o estado inicial de uma execução do grafo"""
+    return {
         "query": query,
         "messages": [],
-        "result": None,
-        "next_agent": None
+        "context": context or {},
+        "results": [],
+        "next_agent": None,
+        "next_agents": [],
+        "tasks": {}
     }
+
+
+class Orchestrator:
+    """Orquestrador de longa duração.
     
-    result = await orchestrator.ainvoke(initial_state)
+    LLM, agentes e grafo são criados uma única vez em ``start()`` (warm-up)
+    e reutilizados por todas as queries até ``stop()``.
+    """
+
+    def __init__(self, llm=None):
+        """Inicializa o orquestrador sem construir o grafo.
+        
+        Args:
+            llm: LLM a ser usado pelo supervisor (opcional). Quando omitido,
+                é criado via ``get_llm()`` no ``start()``.
+        """
+        self._llm = llm
+        self.llm = None
+        self.limiter: Optional[LLMLimiter] = None
+        self.agents: Dict[str, BaseAgent] = {}
+        self.supervisor: Optional[Supervisor] = None
+        self.router: Optional[LocalRouter] = None
+        self.routing_cache: Optional[RoutingCache] = None
+        self.routing_batcher: Optional[MicroBatcher] = None
+        self.response_cache: Optional[ResponseCache] = None
+        self.http_client: Optional[httpx.AsyncClient] = None
+        self.app = None
+        self._start_lock = asyncio.Lock()
+
+    @property
+    def is_running(self) -> bool:
+        """Indica se o grafo já foi compilado."""
+        return self.app is not None
+
+    async def start(self):
+        """Aquece o orquestrador: cria LLM, agentes e compila o grafo."""
+        async with self._start_lock:
+            if self.app is not None:
+                return
+            
+            started = time.perf_counter()
+            limited = os.getenv("LLM_LIMITER_ENABLED", "true").lower() == "true"
+            llm = self._llm if self._llm is not None else get_llm(max_retries=0 if limited else None)
+            if limited:
+                # Concorrência, taxa e retentativas das chamadas ao provider
+                self.limiter = LLMLimiter.from_env()
+                llm = LimitedLLM(llm, self.limiter)
+            self.llm = llm
+            self.http_client = create_http_client()
+            self.agents = create_agents()
+            for agent in self.agents.values():
+                await agent.startup(self.http_client)
+            self.supervisor = Supervisor(llm=self.llm)
+            self.router = LocalRouter.from_cards()
+            self.routing_cache = RoutingCache()
+            if os.getenv("ROUTING_BATCH_ENABLED", "true").lower() == "true":
+                self.routing_batcher = create_routing_batcher(self.llm)
+            if os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true":
+                self.response_cache = ResponseCache()
+            self.app = create_orchestrator(
+                self.llm, self.agents, self.router, self.routing_cache, self.supervisor,
+                self.routing_batcher
+            )
+            
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            logger.info(f"🔥 Orquestrador aquecido em {elapsed_ms:.1f}ms")
+
+    async def stop(self):
+        """Libera o grafo e os recursos associados."""
+        async with self._start_lock:
+            if self.app is None:
+                return
+            
+            logger.info(f"📊 Roteamento: {self.router.get_stats()}")
+            if self.limiter is not None:
+                logger.info(f"📊 Limitador do LLM: {self.limiter.get_stats()}")
+            logger.info(f"📊 Cache de roteamento: {self.routing_cache.get_stats()}")
+            if self.routing_batcher is not None:
+                logger.info(f"📊 Roteamento em lote: {self.routing_batcher.get_stats()}")
+                await self.routing_batcher.close()
+            logger.info(f"📊 Consultas SQL: {QUERY_TEMPLATES.get_stats()}")
+            self.routing_cache.close()
+            if self.response_cache is not None:
+                logger.info(f"📊 Cache de respostas: {self.response_cache.get_stats()}")
+                self.response_cache.close()
+            for agent in self.agents.values():
+                await agent.shutdown()
+            await self.http_client.aclose()
+            self.http_client = None
+            shutdown_executor()
+            close_all_pools()
+            self.app = None
+            self.supervisor = None
+            self.agents = {}
+            self.router = None
+            self.routing_cache = None
+            self.routing_batcher = None
+            self.response_cache = None
+            self.llm = None
+            self.limiter = None
+            logger.info("🛑 Orquestrador encerrado")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna métricas do orquestrador (ex: uso de cada caminho de roteamento)."""
+        return {
+            "routing": self.router.get_stats() if self.router else {},
+            "routing_cache": self.routing_cache.get_stats() if self.routing_cache else {},
+            "llm_limiter": self.limiter.get_stats() if self.limiter else {},
+            "routing_batcher": self.routing_batcher.get_stats() if self.routing_batcher else {},
+            "response_cache": self.response_cache.get_stats() if self.response_cache else {},
+            "query_templates": QUERY_TEMPLATES.get_stats(),
+            "exchange_rates": get_exchange_rate_store().get_stats(),
+            "knowledge_base": get_knowledge_base().get_stats()
+        }
+
+    def _response_ttl(self, results: List[Dict[str, Any]]) -> float:
+        """Menor validade entre os resultados (cada agente define a sua)."""
+        ttls = [
+            self.agents[result["agent"]].cache_ttl(result) if result.get("agent") in self.agents else 0.0
+            for result in results
+        ]
+        return min(ttls) if ttls else 0.0
+
+    async def process_query(self, query: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Processa uma query reutilizando o grafo compilado.
+        
+        Respostas de queries sem ``context`` são guardadas no cache de
+        respostas pelo tempo que os agentes envolvidos permitirem; uma query
+        igual (após normalização) ou, se configurado, muito parecida é
+        respondida direto do cache, com ``cached`` = ``"exact"``/``"similar"``.
+        
+        Args:
+            query: Query do usuário
+            context: Contexto adicional repassado aos agentes
+            
+        Returns:
+            Dicionário com ``success``, ``answer`` e resultados dos agentes
+        """
+        if self.app is None:
+            await self.start()
+        
+        logger.info(f"📥 Processando query: {query}")
+        
+        cache = self.response_cache if not context else None
+        if cache is not None:
+            cached = cache.lookup(query)
+            if cached is not None:
+                logger.info(f"⚡ Resposta em cache ({cached['cache']})")
+                return {
+                    "success": True,
+                    "query": query,
+                    "agent": cached["agent"],
+                    "answer": cached["answer"],
+                    "results": cached["results"],
+                    "cached": cached["cache"]
+                }
+        
+        try:
+            final_state = await self.app.ainvoke(create_initial_state(query, context))
+            results = final_state.get("results", [])
+            answer = final_state.get("final_answer")
+            agent = final_state.get("current_agent")
+            
+            if cache is not None:
+                cache.store(
+                    query,
+                    {"agent": agent, "answer": answer, "results": results},
+                    self._response_ttl(results)
+                )
+            
+            return {
+                "success": True,
+                "query": query,
+                "agent": agent,
+                "answer": answer,
+                "results": results
+            }
+            
+        except Exception as e:
+            logger.error(f"❌ Erro ao processar query: {e}")
+            return {
+                "success": False,
+                "query": query,
+                "error": str(e)
+            }
+
+
+_shared_orchestrator: Optional[Orchestrator] = None
+
+
+def get_orchestrator() -> Orchestrator:
+    """Retorna o orquestrador compartilhado pelo processo"""
+    global _shared_orchestrator
+    
+    if _shared_orchestrator is None:
+        _shared_orchestrator = Orchestrator()
+    
+    return _shared_orchestrator
+
+
+async def shutdown_orchestrator():
+    """Encerra o orquestrador compartilhado, se existir"""
+    global _shared_orchestrator
     
-    final_result = result.get("result", "Sem resultado")
+    if _shared_orchestrator is not None:
+        await _shared_orchestrator.stop()
+        _shared_orchestrator = None
+
+
+async def process_query(query: str) -> str:
+    """Processa uma query através do orquestrador compartilhado"""
+    result = await get_orchestrator().process_query(query)
+    
+    final_result = result.get("answer") or result.get("error", "Sem resultado")
     logger.info(f"✅ Resultado: {final_result}")
     
     return final_result
@@ -170,6 +561,9 @@ async def main():
     except Exception as e:
         logger.error(f"❌ Erro no orquestrador: {e}")
         raise
+    
+    finally:
+        await shutdown_orchestrator()
 
 
 if __name__ == "__main__":
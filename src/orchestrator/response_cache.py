@@ -0,0 +1,237 @@
+"""Cache de respostas finais do orquestrador, com busca exata e por similaridade"""
+
+import json
+import logging
+import os
+import re
+import zlib
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from src.utils.cache import TTLCache
+from src.utils.text import normalize_text
+
+logger = logging.getLogger(__name__)
+
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)*")
+
+# Primo de Mersenne 2^31 - 1: (a * x + b) cabe em 64 bits para x < 2^32
+_PRIME = (1 << 31) - 1
+
+
+class MinHasher:
+    """Assinaturas MinHash de shingles de caracteres, com bandas para LSH.
+
+    A fração de posições iguais entre duas assinaturas estima a similaridade
+    de Jaccard entre os conjuntos de shingles. Com ``bands`` bandas de
+    ``num_perm / bands`` linhas, pares com Jaccard acima de
+    ``(1 / bands) ** (bands / num_perm)`` caem no mesmo bucket em pelo menos
+    uma banda com alta probabilidade.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, shingle_size: int = 4, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm deve ser múltiplo de bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=num_perm, dtype=np.uint64)
+
+    def shingles(self, text: str) -> Set[str]:
+        size = self.shingle_size
+        if len(text) <= size:
+            return {text}
+        return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+    def signature(self, text: str) -> np.ndarray:
+        """Assinatura de ``num_perm`` posições (hashes determinísticos via CRC32)."""
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in self.shingles(text)),
+            dtype=np.uint64
+        )
+        return ((np.outer(hashes, self._a) + self._b) % _PRIME).min(axis=0)
+
+    def band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        """Chaves de bucket (banda, valores da banda) da assinatura."""
+        return [(band, rows.tobytes()) for band, rows in enumerate(np.split(signature, self.bands))]
+
+    @staticmethod
+    def similarity(first: np.ndarray, second: np.ndarray) -> float:
+        return float(np.mean(first == second))
+
+
+class ResponseCache(TTLCache):
+    """Respostas completas de ``process_query`` indexadas pela query normalizada.
+
+    Cada resposta fica válida pelo tempo informado pelos agentes que a
+    produziram (``BaseAgent.cache_ttl``). Com ``similarity`` > 0, uma query
+    sem entrada exata pode reutilizar a resposta de uma query quase idêntica
+    (MinHash + LSH sobre shingles), desde que os números das duas sejam os
+    mesmos ("100 USD" nunca reutiliza "1000 USD").
+    """
+
+    def __init__(
+        self,
+        maxsize: Optional[int] = None,
+        similarity: Optional[float] = None,
+        path: Optional[str] = None,
+        **kwargs
+    ):
+        """Inicializa o cache a partir dos argumentos ou do ambiente.
+
+        Args:
+            maxsize: Máximo de respostas (padrão: ``RESPONSE_CACHE_SIZE`` ou 1024)
+            similarity: Similaridade mínima (0-1) para reutilizar a resposta de
+                uma query parecida (padrão: ``RESPONSE_CACHE_SIMILARITY`` ou 0,
+                desativado)
+            path: Arquivo SQLite para persistência (padrão: ``RESPONSE_CACHE_PATH``;
+                vazio mantém o cache apenas em memória)
+            **kwargs: Repassados ao ``TTLCache`` (ex: ``clock``)
+        """
+        if similarity is None:
+            similarity = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0"))
+        self.similarity = similarity
+        self.hasher = MinHasher()
+        self.near_hits = 0
+        self.agent_stats: Dict[str, Dict[str, int]] = {}
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._buckets: Dict[Tuple[int, bytes], Set[str]] = {}
+
+        super().__init__(
+            maxsize=maxsize if maxsize is not None else int(os.getenv("RESPONSE_CACHE_SIZE", "1024")),
+            path=path if path is not None else os.getenv("RESPONSE_CACHE_PATH") or None,
+            table="response_cache",
+            **kwargs
+        )
+        if self._conn is not None and self.similarity > 0:
+            self._load_persisted()
+
+    @staticmethod
+    def make_key(query: str) -> str:
+        """Normaliza a query para uso como chave."""
+        return normalize_text(query)
+
+    def _agent_counters(self, response: Dict[str, Any]) -> List[Dict[str, int]]:
+        """Contadores de cada agente da resposta (fan-out grava ``"a,b"``)."""
+        agents = [agent.strip() for agent in (response.get("agent") or "").split(",")]
+        return [
+            self.agent_stats.setdefault(
+                agent, {"hits": 0, "near_hits": 0, "misses": 0, "uncacheable": 0}
+            )
+            for agent in [agent for agent in agents if agent] or ["unknown"]
+        ]
+
+    def _load_persisted(self):
+        """Carrega as entradas válidas do SQLite e as indexa para busca por similaridade.
+
+        O ``TTLCache`` só lê o disco por chave exata; sem isso, respostas
+        persistidas antes de um restart nunca seriam candidatas a hit similar.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, value, expires_at FROM {self.table} WHERE expires_at > ? "
+                "ORDER BY expires_at DESC LIMIT ?",
+                (self.clock(), self.maxsize)
+            ).fetchall()
+            # Do mais próximo de expirar ao mais distante (este fica por último no LRU)
+            for key, value, expires_at in reversed(rows):
+                self._remember(key, json.loads(value), expires_at)
+        if rows:
+            logger.info(f"Cache de respostas: {len(rows)} entradas carregadas do disco")
+
+    def _remember(self, key: str, value: Any, expires_at: float):
+        super()._remember(key, value, expires_at)
+        if self.similarity > 0 and key in self._entries and key not in self._signatures:
+            signature = self.hasher.signature(key)
+            self._signatures[key] = signature
+            for band_key in self.hasher.band_keys(signature):
+                self._buckets.setdefault(band_key, set()).add(key)
+
+    def _on_remove(self, key: str):
+        signature = self._signatures.pop(key, None)
+        if signature is None:
+            return
+        for band_key in self.hasher.band_keys(signature):
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def _nearest(self, key: str) -> Optional[str]:
+        """Chave em cache mais parecida com ``key`` (mesmos números, acima do limiar)."""
+        signature = self.hasher.signature(key)
+        numbers = _NUMBER_RE.findall(key)
+        best_key, best_similarity = None, self.similarity
+        with self._lock:
+            candidates = set()
+            for band_key in self.hasher.band_keys(signature):
+                candidates.update(self._buckets.get(band_key, ()))
+            for candidate in candidates:
+                similarity = self.hasher.similarity(signature, self._signatures[candidate])
+                if similarity >= best_similarity and _NUMBER_RE.findall(candidate) == numbers:
+                    best_key, best_similarity = candidate, similarity
+        return best_key
+
+    def lookup(self, query: str) -> Optional[Dict[str, Any]]:
+        """Retorna a resposta em cache para a query (exata ou similar), se houver.
+
+        Returns:
+            Resposta armazenada com ``cache`` = ``"exact"`` ou ``"similar"``, ou ``None``
+        """
+        key = self.make_key(query)
+        response = self.get(key)
+        match = "exact"
+
+        if response is None and self.similarity > 0:
+            nearest = self._nearest(key)
+            if nearest is not None:
+                response = self.get(nearest)
+                if response is not None:
+                    # O get acima contou um miss e um hit para a mesma consulta
+                    self.misses -= 1
+                    self.near_hits += 1
+                    match = "similar"
+
+        if response is None:
+            return None
+
+        for counter in self._agent_counters(response):
+            counter["hits" if match == "exact" else "near_hits"] += 1
+        return {**response, "cache": match}
+
+    def store(self, query: str, response: Dict[str, Any], ttl: float):
+        """Armazena a resposta de uma query que não estava em cache.
+
+        Args:
+            query: Query original
+            response: Resposta de ``process_query`` (``agent``, ``answer``, ``results``)
+            ttl: Validade em segundos; zero ou negativo não armazena
+        """
+        counters = self._agent_counters(response)
+        for counter in counters:
+            counter["misses"] += 1
+        if ttl <= 0:
+            for counter in counters:
+                counter["uncacheable"] += 1
+            return
+        self.set(self.make_key(query), response, ttl=ttl)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores gerais e, por agente, a taxa de acerto."""
+        stats = super().get_stats()
+        stats["near_hits"] = self.near_hits
+        stats["agents"] = {
+            agent: {
+                **counter,
+                "hit_rate": round(
+                    (counter["hits"] + counter["near_hits"])
+                    / ((counter["hits"] + counter["near_hits"] + counter["misses"]) or 1), 4
+                )
+            }
+            for agent, counter in self.agent_stats.items()
+        }
+        return stats
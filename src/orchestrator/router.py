@@ -0,0 +1,211 @@
+"""Roteador local (sem LLM) construído a partir dos agent cards"""
+
+import json
+import logging
+import math
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.utils.text import normalize_text, tokenize
+
+logger = logging.getLogger(__name__)
+
+AGENT_CARDS_DIR = Path(__file__).resolve().parent.parent.parent / "agent_cards"
+
+# Peso da evidência por palavra-chave em relação ao classificador de exemplos
+KEYWORD_WEIGHT = 0.6
+CLASSIFIER_WEIGHT = 0.4
+
+# Separadores de pedidos em uma query composta ("clima em Recife e converta 100 USD").
+# Vírgula só com espaço em seguida, para não quebrar valores como "1.000,50"
+CLAUSE_SEPARATOR_RE = re.compile(
+    r"\s*(?:,\s+|;|\be\b|\band\b|\btamb[eé]m\b|\bal[eé]m disso\b)\s*",
+    re.IGNORECASE
+)
+
+
+@dataclass
+class RouteDecision:
+    """Decisão de roteamento com confiança e origem."""
+    agent: str
+    confidence: float
+    source: str
+    scores: Dict[str, float] = field(default_factory=dict)
+
+
+def _keyword_pattern(keyword: str) -> str:
+    """Converte uma palavra-chave do card em padrão regex.
+
+    Palavras longas casam pelo radical (``converter`` -> ``convert\\w*``),
+    palavras curtas e expressões casam exatamente, aceitando plural.
+    """
+    if " " in keyword or len(keyword) < 6:
+        return re.escape(keyword) + r"(?:s|es)?"
+    suffix = 2 if len(keyword) >= 8 else 1
+    return re.escape(keyword[:-suffix]) + r"\w*"
+
+
+def _ngrams(text: str) -> List[str]:
+    """Extrai palavras e n-gramas de caracteres (3 a 5) de um texto."""
+    features = []
+    for token in tokenize(text):
+        features.append(f"w:{token}")
+        padded = f" {token} "
+        for n in (3, 4, 5):
+            features.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+    return features
+
+
+class LocalRouter:
+    """Roteador com pontuação de confiança baseado nos agent cards.
+
+    Combina um autômato de palavras-chave (uma única regex compilada) com um
+    classificador TF-IDF de n-gramas sobre os ``examples`` de cada card. O
+    LLM só é necessário quando a confiança fica abaixo de ``threshold``.
+    """
+
+    def __init__(self, cards: List[Dict], threshold: Optional[float] = None):
+        """Compila o roteador.
+
+        Args:
+            cards: Agent cards (dicionários com name, keywords, examples)
+            threshold: Confiança mínima para dispensar o LLM
+                (padrão: ``ROUTER_CONFIDENCE_THRESHOLD`` ou 0.6)
+        """
+        if threshold is None:
+            threshold = float(os.getenv("ROUTER_CONFIDENCE_THRESHOLD", "0.6"))
+
+        self.threshold = threshold
+        self.agents = [card["name"] for card in cards]
+        self.stats = Counter()
+
+        groups = []
+        for index, card in enumerate(cards):
+            keywords = sorted({normalize_text(k) for k in card.get("keywords", [])}, key=len, reverse=True)
+            if keywords:
+                groups.append(f"(?P<a{index}>{'|'.join(_keyword_pattern(k) for k in keywords)})")
+        self._keyword_re = re.compile(r"\b(?:" + "|".join(groups) + r")\b") if groups else None
+
+        self._build_classifier(cards)
+        logger.info(f"Roteador local compilado para {len(self.agents)} agentes (limiar={self.threshold})")
+
+    @classmethod
+    def from_cards(cls, cards_dir: Optional[Path] = None, threshold: Optional[float] = None) -> "LocalRouter":
+        """Carrega os agent cards de um diretório (padrão: ``agent_cards/``)."""
+        cards_dir = Path(cards_dir or AGENT_CARDS_DIR)
+        cards = []
+        for path in sorted(cards_dir.glob("*.json")):
+            with open(path, encoding="utf-8") as fh:
+                cards.append(json.load(fh))
+        return cls(cards, threshold=threshold)
+
+    def _build_classifier(self, cards: List[Dict]):
+        """Monta centróides TF-IDF normalizados por agente."""
+        documents = []
+        for card in cards:
+            texts = card.get("examples", []) + card.get("keywords", []) + card.get("capabilities", [])
+            documents.append(Counter(f for text in texts for f in _ngrams(text)))
+
+        total = len(documents)
+        document_frequency = Counter(f for doc in documents for f in doc)
+        self._idf = {f: math.log((1 + total) / (1 + df)) + 1 for f, df in document_frequency.items()}
+        self._centroids = [self._vectorize(doc) for doc in documents]
+
+    def _vectorize(self, counts: Counter) -> Dict[str, float]:
+        vector = {f: (1 + math.log(tf)) * self._idf[f] for f, tf in counts.items() if f in self._idf}
+        norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+        return {f: v / norm for f, v in vector.items()}
+
+    def score(self, query: str) -> Dict[str, float]:
+        """Calcula a distribuição de probabilidade entre os agentes."""
+        normalized = normalize_text(query)
+
+        hits = Counter()
+        if self._keyword_re is not None:
+            for match in self._keyword_re.finditer(normalized):
+                hits[self.agents[int(match.lastgroup[1:])]] += 1
+
+        vector = self._vectorize(Counter(_ngrams(normalized)))
+        similarities = {
+            agent: sum(weight * centroid.get(f, 0.0) for f, weight in vector.items())
+            for agent, centroid in zip(self.agents, self._centroids)
+        }
+        total_similarity = sum(similarities.values())
+        total_hits = sum(hits.values())
+
+        scores = {}
+        for agent in self.agents:
+            classifier = similarities[agent] / total_similarity if total_similarity else 0.0
+            if total_hits:
+                scores[agent] = KEYWORD_WEIGHT * hits[agent] / total_hits + CLASSIFIER_WEIGHT * classifier
+            else:
+                scores[agent] = classifier
+        return scores
+
+    def route(self, query: str) -> RouteDecision:
+        """Decide o agente mais provável para a query (sem registrar estatística)."""
+        scores = self.score(query)
+        agent = max(scores, key=scores.get)
+        return RouteDecision(agent=agent, confidence=scores[agent], source="local", scores=scores)
+
+    def split(self, query: str) -> Dict[str, str]:
+        """Divide uma query composta em sub-queries, uma por agente.
+
+        Cada trecho entre separadores é roteado isoladamente; trechos sem
+        confiança suficiente continuam o pedido anterior ("converta 100 USD
+        para BRL e EUR"). Trechos vizinhos do mesmo agente voltam a ser um só
+        pedaço do texto original.
+
+        Returns:
+            Sub-query por agente, na ordem em que aparecem; vazio se a query
+            não pede nada a mais de um agente com confiança
+        """
+        bounds = [0]
+        for match in CLAUSE_SEPARATOR_RE.finditer(query):
+            bounds.extend((match.start(), match.end()))
+        bounds.append(len(query))
+
+        segments: List[List] = []
+        for start, end in zip(bounds[::2], bounds[1::2]):
+            if start >= end:
+                continue
+            decision = self.route(query[start:end])
+            if self.is_confident(decision):
+                agent = decision.agent
+            elif segments:
+                agent = segments[-1][0]
+            else:
+                agent = None
+            if segments and segments[-1][0] in (agent, None):
+                segments[-1][0], segments[-1][2] = agent, end
+            else:
+                segments.append([agent, start, end])
+
+        tasks: Dict[str, List[str]] = {}
+        for agent, start, end in segments:
+            if agent is not None:
+                tasks.setdefault(agent, []).append(query[start:end])
+        if len(tasks) < 2:
+            return {}
+        return {agent: " e ".join(parts) for agent, parts in tasks.items()}
+
+    def is_confident(self, decision: RouteDecision) -> bool:
+        """Indica se a decisão dispensa o LLM."""
+        return decision.confidence >= self.threshold
+
+    def record(self, source: str):
+        """Registra qual caminho de roteamento foi usado (``cache``, ``local`` ou ``llm``)."""
+        self.stats[source] += 1
+
+    def get_stats(self) -> Dict[str, float]:
+        """Retorna contagens e proporção de cada caminho de roteamento."""
+        total = sum(self.stats.values())
+        report = {"total": total}
+        for source in ("cache", "local", "llm"):
+            report[source] = self.stats[source]
+            report[f"{source}_ratio"] = round(self.stats[source] / total, 4) if total else 0.0
+        return report
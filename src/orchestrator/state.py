@@ -1,6 +1,7 @@
 """Gerenciamento de estado para LangGraph"""
 
-from typing import TypedDict, List, Dict, Any
+import operator
+from typing import Annotated, TypedDict, List, Dict, Any
 
 
 class AgentState(TypedDict):
@@ -8,7 +9,12 @@ class AgentState(TypedDict):
     query: str
     messages: List[Dict[str, Any]]
     current_agent: str
+    next_agent: str
+    # Agentes escolhidos pelo supervisor e a sub-query de cada um (fan-out)
+    next_agents: List[str]
+    tasks: Dict[str, str]
     context: Dict[str, Any]
-    results: List[Dict[str, Any]]
+    # Agentes executados em paralelo acrescentam seus resultados (reducer)
+    results: Annotated[List[Dict[str, Any]], operator.add]
     final_answer: str
-    error: str
\ No newline at end of file
+    error: str
@@ -13,11 +13,22 @@ logger = logging.getLogger(__name__)
 class Supervisor:
     """Supervisor que roteia queries para agentes apropriados."""
 
-    def __init__(self):
+    def __init__(self, llm=None):
+        """Inicializa o supervisor.
+
+        Args:
+            llm: Cliente LLM já configurado (opcional). Quando informado, é
+                reutilizado em vez de criar um novo cliente.
+        """
         self.provider = os.getenv("LLM_PROVIDER", "openai")
         self.model_name = os.getenv("LLM_MODEL", "gpt-4o-mini")
         self.api_key = os.getenv("LLM_API_KEY")
         
+        if llm is not None:
+            self.llm = llm
+            logger.info("Supervisor inicializado com LLM compartilhado")
+            return
+        
         if not self.api_key:
             raise ValueError("LLM_API_KEY não configurada")
         
@@ -77,17 +88,23 @@ class Supervisor:
                 agent = result.get("agent", "unknown")
                 
                 if agent == "weather_agent":
-                    data = result.get("data", {})
-                    city = result.get("city", "")
-                    response_parts.append(
-                        f"🌤️ Clima em {city}: {data.get('temperature')}°C, "
-                        f"{data.get('condition')}, Umidade: {data.get('humidity')}%"
-                    )
+                    cities = result.get("cities") or [
+                        {"city": result.get("city", ""), "data": result.get("data", {})}
+                    ]
+                    for item in cities:
+                        data = item.get("data", {})
+                        response_parts.append(
+                            f"🌤️ Clima em {item.get('city')}: {data.get('temperature')}°C, "
+                            f"{data.get('condition')}, Umidade: {data.get('humidity')}%"
+                        )
                 
                 elif agent == "data_agent":
-                    results_data = result.get("results", [])
+                    columns = result.get("columns", [])
+                    results_data = [dict(zip(columns, row)) for row in result.get("rows", [])]
                     if results_data:
                         response_parts.append(f"📊 Dados: {results_data}")
+                    if result.get("next_page_token"):
+                        response_parts.append("📄 Há mais resultados disponíveis")
                 
                 elif agent == "finance_agent":
                     operation = result.get("operation", "")
@@ -101,6 +118,8 @@ class Supervisor:
                             f"💵 Juros: {result.get('interest')}, "
                             f"Total: {result.get('final_amount')}"
                         )
+                    elif operation.startswith("batch_"):
+                        response_parts.append(f"💰 Lote {operation[6:]}: {result.get('count')} linhas calculadas")
                 
                 elif agent == "info_agent":
                     info = result.get("information", {})
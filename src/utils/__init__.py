@@ -0,0 +1,5 @@
+"""Utilitários compartilhados entre agentes, orquestrador e MCP Server"""
+
+from src.utils.text import normalize_text, tokenize
+
+__all__ = ["normalize_text", "tokenize"]
@@ -0,0 +1,190 @@
+"""Cache em memória com despejo LRU/TTL e persistência opcional em SQLite"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# Frequência (em gravações) da poda do SQLite para respeitar ``maxsize``
+TRIM_EVERY = 64
+
+
+class TTLCache:
+    """Cache limitado por tamanho (LRU) e por idade (TTL).
+
+    Quando ``path`` é informado, as entradas também são gravadas em uma
+    tabela SQLite e recuperadas após um restart (leitura sob demanda).
+    Valores persistidos precisam ser serializáveis em JSON.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 3600.0,
+        path: Optional[str] = None,
+        table: str = "cache",
+        clock: Callable[[], float] = time.time
+    ):
+        """Inicializa o cache.
+
+        Args:
+            maxsize: Número máximo de entradas em memória (e em disco)
+            ttl: Tempo de vida padrão das entradas, em segundos
+            path: Caminho do arquivo SQLite (opcional)
+            table: Nome da tabela usada no SQLite
+            clock: Fonte de tempo em segundos (injetável para testes)
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.table = table
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._writes = 0
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+        if path:
+            self._open_store(path)
+
+    def _open_store(self, path: str):
+        """Abre (ou cria) a tabela de persistência e remove entradas expiradas."""
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{self.table}_expires_at ON {self.table} (expires_at)"
+        )
+        self._conn.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (self.clock(),))
+        self._conn.commit()
+        logger.info(f"Cache '{self.table}' persistido em {path}")
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Retorna o valor da chave ou ``default`` se ausente/expirado."""
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self._on_remove(key)
+
+            value = self._load(key, now)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Armazena um valor com TTL próprio (padrão: ``self.ttl``)."""
+        expires_at = self.clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._remember(key, value, expires_at)
+            if self._conn is not None:
+                self._conn.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), expires_at)
+                )
+                self._writes += 1
+                if self._writes % TRIM_EVERY == 0:
+                    self._trim_store()
+                self._conn.commit()
+
+    def delete(self, key: str):
+        """Remove uma chave do cache (memória e disco)."""
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._on_remove(key)
+            if self._conn is not None:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self._conn.commit()
+
+    def clear(self):
+        """Esvazia o cache (memória e disco)."""
+        with self._lock:
+            for key in list(self._entries):
+                self._on_remove(key)
+            self._entries.clear()
+            if self._conn is not None:
+                self._conn.execute(f"DELETE FROM {self.table}")
+                self._conn.commit()
+
+    def close(self):
+        """Fecha a conexão SQLite, se houver."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry[1] > self.clock()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna contadores de acertos, falhas e despejos."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+    def _remember(self, key: str, value: Any, expires_at: float):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            evicted, _ = self._entries.popitem(last=False)
+            self.evictions += 1
+            self._on_remove(evicted)
+
+    def _on_remove(self, key: str):
+        """Chamado quando uma chave sai da memória (despejo, expiração ou remoção)."""
+
+    def _load(self, key: str, now: float) -> Any:
+        """Busca a chave no SQLite e a promove para a memória."""
+        if self._conn is None:
+            return _MISSING
+
+        row = self._conn.execute(
+            f"SELECT value, expires_at FROM {self.table} WHERE key = ? AND expires_at > ?",
+            (key, now)
+        ).fetchone()
+        if row is None:
+            return _MISSING
+
+        value = json.loads(row[0])
+        self._remember(key, value, row[1])
+        return value
+
+    def _trim_store(self):
+        """Mantém o SQLite dentro de ``maxsize`` removendo as entradas mais próximas de expirar."""
+        self._conn.execute(
+            f"DELETE FROM {self.table} WHERE key IN ("
+            f"SELECT key FROM {self.table} ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.maxsize,)
+        )
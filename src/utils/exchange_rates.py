@@ -0,0 +1,283 @@
+"""Cache compartilhado de taxas de câmbio com triangulação e snapshot em disco"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# API pública de taxas (sobrescrita por EXCHANGE_RATE_API_URL)
+DEFAULT_EXCHANGE_RATE_API_URL = "https://api.exchangerate-api.com/v4/latest"
+
+# Snapshot padrão (sobrescrito por EXCHANGE_RATE_SNAPSHOT_PATH)
+DEFAULT_SNAPSHOT_PATH = os.path.join("data", "cache", "exchange_rates.json")
+
+# Taxas usadas quando não há API nem snapshot disponíveis
+FALLBACK_RATES = {
+    "USD": {"BRL": 5.0, "EUR": 0.92},
+    "BRL": {"USD": 0.20, "EUR": 0.18},
+    "EUR": {"USD": 1.09, "BRL": 5.45}
+}
+
+GetJson = Callable[[str], Awaitable[Dict[str, Any]]]
+
+
+class ExchangeRateStore:
+    """Tabelas de câmbio por moeda base, com TTL, triangulação e snapshot.
+
+    Uma única tabela (da moeda ``pivot``, USD por padrão) responde a qualquer
+    par por triangulação: ``taxa(A -> B) = tabela[B] / tabela[A]``. Tabelas
+    diretas já em cache têm prioridade. Cada tabela baixada é gravada no
+    snapshot, que é carregado na inicialização; se a API estiver fora do ar,
+    tabelas vencidas do snapshot e, por fim, ``FALLBACK_RATES`` são usadas.
+    """
+
+    def __init__(
+        self,
+        ttl: Optional[float] = None,
+        pivot: Optional[str] = None,
+        snapshot_path: Optional[str] = None,
+        retry_after: Optional[float] = None,
+        clock: Callable[[], float] = time.time
+    ):
+        """Inicializa o cache e carrega o snapshot, se existir.
+
+        Args:
+            ttl: Validade de cada tabela em segundos (padrão: ``EXCHANGE_RATE_TTL`` ou 3600)
+            pivot: Moeda base usada na triangulação (padrão: ``EXCHANGE_RATE_PIVOT`` ou USD)
+            snapshot_path: Arquivo JSON do snapshot (padrão: ``EXCHANGE_RATE_SNAPSHOT_PATH``
+                ou data/cache/exchange_rates.json; vazio desativa)
+            retry_after: Segundos sem nova tentativa após falha da API
+                (padrão: ``EXCHANGE_RATE_RETRY_SECONDS`` ou 60)
+            clock: Fonte de tempo em segundos (injetável para testes)
+        """
+        self.ttl = ttl or float(os.getenv("EXCHANGE_RATE_TTL", "3600"))
+        self.pivot = (pivot or os.getenv("EXCHANGE_RATE_PIVOT", "USD")).upper()
+        if snapshot_path is None:
+            snapshot_path = os.getenv("EXCHANGE_RATE_SNAPSHOT_PATH", DEFAULT_SNAPSHOT_PATH)
+        self.snapshot_path = snapshot_path
+        self.retry_after = retry_after or float(os.getenv("EXCHANGE_RATE_RETRY_SECONDS", "60"))
+        self.clock = clock
+
+        self.fetches = 0
+        self.hits = 0
+        self.stale = 0
+        self._tables: Dict[str, Tuple[Dict[str, float], float]] = {}
+        self._failed_at: Dict[str, float] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._snapshot_lock = threading.Lock()
+        self._snapshot_version = 0
+        self._written_version = 0
+        self._load_snapshot()
+
+    def _load_snapshot(self):
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return
+        try:
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                data = json.load(f)
+            for base, entry in data.items():
+                self._tables[base] = (entry["rates"], entry["fetched_at"])
+            logger.info(f"Snapshot de câmbio carregado: {', '.join(sorted(self._tables))}")
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Snapshot de câmbio ignorado ({self.snapshot_path}): {e}")
+
+    def _snapshot_data(self) -> Tuple[int, Dict[str, Any]]:
+        """Versão e conteúdo atual do snapshot (copiados no event loop)."""
+        self._snapshot_version += 1
+        data = {base: {"rates": rates, "fetched_at": at} for base, (rates, at) in self._tables.items()}
+        return self._snapshot_version, data
+
+    def _write_snapshot(self, version: int, data: Dict[str, Any]):
+        """Grava o snapshot (bloqueante); versões mais antigas que a gravada são descartadas."""
+        with self._snapshot_lock:
+            if version <= self._written_version:
+                return
+            tmp_path = f"{self.snapshot_path}.tmp"
+            try:
+                os.makedirs(os.path.dirname(self.snapshot_path) or ".", exist_ok=True)
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.snapshot_path)
+                self._written_version = version
+            except OSError as e:
+                logger.warning(f"Não foi possível gravar o snapshot de câmbio: {e}")
+
+    def _save_snapshot(self):
+        if self.snapshot_path:
+            self._write_snapshot(*self._snapshot_data())
+
+    async def _save_snapshot_async(self):
+        # Fora do event loop: o fetch não espera o disco
+        if self.snapshot_path:
+            await asyncio.to_thread(self._write_snapshot, *self._snapshot_data())
+
+    def _is_fresh(self, base: str) -> bool:
+        entry = self._tables.get(base)
+        return entry is not None and self.clock() - entry[1] < self.ttl
+
+    def remaining_ttl(self, bases: Iterable[str]) -> float:
+        """Segundos até a mais recente das tabelas informadas vencer (zero se nenhuma está válida)."""
+        now = self.clock()
+        remaining = [
+            self.ttl - (now - self._tables[base][1])
+            for base in {base.upper() for base in bases} if base in self._tables
+        ]
+        return max([0.0] + remaining)
+
+    def set_table(self, base: str, rates: Dict[str, float], fetched_at: Optional[float] = None):
+        """Armazena a tabela completa de uma moeda base e atualiza o snapshot."""
+        self._store_table(base, rates, fetched_at)
+        self._save_snapshot()
+
+    def _store_table(self, base: str, rates: Dict[str, float], fetched_at: Optional[float] = None):
+        base = base.upper()
+        rates = {code.upper(): float(rate) for code, rate in rates.items()}
+        rates[base] = 1.0
+        self._tables[base] = (rates, self.clock() if fetched_at is None else fetched_at)
+
+    async def _fetch(self, base: str, get_json: GetJson):
+        """Baixa a tabela da base (um fetch por base, mesmo com chamadas concorrentes)."""
+        inflight = self._inflight.get(base)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[base] = future
+        try:
+            base_url = os.getenv("EXCHANGE_RATE_API_URL", DEFAULT_EXCHANGE_RATE_API_URL)
+            data = await get_json(f"{base_url}/{base}")
+            self.fetches += 1
+            self._store_table(base, data["rates"])
+            self._failed_at.pop(base, None)
+            await self._save_snapshot_async()
+        except Exception as e:
+            self._failed_at[base] = self.clock()
+            logger.warning(f"Falha ao buscar taxas de {base}: {e}")
+        finally:
+            # Também no cancelamento de quem buscava: os demais seguem com o que houver em cache
+            self._inflight.pop(base, None)
+            if not future.done():
+                future.set_result(None)
+
+    async def _ensure(self, base: str, get_json: Optional[GetJson]):
+        """Garante a tabela da base em cache, respeitando TTL e o intervalo após falhas."""
+        if self._is_fresh(base):
+            return
+        failed_at = self._failed_at.get(base)
+        if get_json is None or (failed_at is not None and self.clock() - failed_at < self.retry_after):
+            return
+        await self._fetch(base, get_json)
+
+    def _lookup(self, source: str, target: str, fresh_only: bool) -> Optional[float]:
+        """Taxa direta ou triangulada a partir das tabelas em memória."""
+        if source == target:
+            return 1.0
+
+        def usable(base: str) -> bool:
+            return base in self._tables and (not fresh_only or self._is_fresh(base))
+
+        if usable(source) and target in self._tables[source][0]:
+            return self._tables[source][0][target]
+
+        bases = [self.pivot] + [base for base in self._tables if base != self.pivot]
+        for base in bases:
+            if usable(base):
+                rates = self._tables[base][0]
+                if source in rates and target in rates and rates[source]:
+                    return rates[target] / rates[source]
+        return None
+
+    async def rate(self, from_currency: str, to_currency: str, get_json: Optional[GetJson] = None) -> Optional[float]:
+        """Retorna a taxa de conversão ``from_currency -> to_currency``.
+
+        Args:
+            from_currency: Moeda de origem
+            to_currency: Moeda de destino
+            get_json: Corrotina que faz GET de uma URL e devolve o JSON; sem
+                ela, apenas o cache, o snapshot e ``FALLBACK_RATES`` são usados
+
+        Returns:
+            Taxa de câmbio ou ``None`` se o par for desconhecido
+        """
+        source, target = from_currency.upper(), to_currency.upper()
+
+        rate = self._lookup(source, target, fresh_only=True)
+        if rate is not None:
+            self.hits += 1
+            return rate
+
+        await self._ensure(self.pivot, get_json)
+        rate = self._lookup(source, target, fresh_only=True)
+        if rate is None and source not in self._tables.get(self.pivot, ({}, 0))[0]:
+            # Origem ausente da tabela pivô: busca a tabela da própria origem
+            await self._ensure(source, get_json)
+            rate = self._lookup(source, target, fresh_only=True)
+        if rate is not None:
+            return rate
+
+        rate = self._lookup(source, target, fresh_only=False)
+        if rate is not None:
+            self.stale += 1
+            return rate
+
+        return FALLBACK_RATES.get(source, {}).get(target)
+
+    async def cross_rates(
+        self,
+        currencies: Iterable[str],
+        get_json: Optional[GetJson] = None
+    ) -> Dict[str, Dict[str, float]]:
+        """Matriz de taxas entre todas as moedas informadas (pares desconhecidos omitidos).
+
+        Moedas presentes na tabela pivô são cruzadas direto dela (uma busca
+        para a matriz inteira); só as ausentes caem em ``rate`` par a par.
+        """
+        codes = sorted({currency.upper() for currency in currencies})
+        await self._ensure(self.pivot, get_json)
+        fresh = self._is_fresh(self.pivot)
+        pivot_rates = self._tables.get(self.pivot, ({}, 0))[0]
+        covered = {code for code in codes if pivot_rates.get(code)}
+
+        matrix: Dict[str, Dict[str, float]] = {}
+        for source in codes:
+            for target in codes:
+                if source in covered and target in covered:
+                    rate = pivot_rates[target] / pivot_rates[source] if source != target else 1.0
+                    if fresh:
+                        self.hits += 1
+                    else:
+                        self.stale += 1
+                else:
+                    rate = await self.rate(source, target, get_json)
+                if rate is not None:
+                    matrix.setdefault(source, {})[target] = rate
+        return matrix
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna tabelas em cache e contadores de uso."""
+        return {
+            "bases": sorted(self._tables),
+            "fresh": sorted(base for base in self._tables if self._is_fresh(base)),
+            "hits": self.hits,
+            "fetches": self.fetches,
+            "stale": self.stale
+        }
+
+
+_store: Optional[ExchangeRateStore] = None
+
+
+def get_exchange_rate_store() -> ExchangeRateStore:
+    """Retorna o cache de câmbio compartilhado pelo processo."""
+    global _store
+
+    if _store is None:
+        _store = ExchangeRateStore()
+
+    return _store
@@ -0,0 +1,160 @@
+"""Cálculos financeiros em lote com NumPy (resultados em formato colunar)"""
+
+import math
+from typing import Any, Dict, Mapping, Sequence, Union
+
+import numpy as np
+
+ArrayLike = Union[float, int, str, Sequence[Any], np.ndarray]
+
+
+def _broadcast(**columns: ArrayLike) -> Dict[str, np.ndarray]:
+    """Converte escalares/listas em arrays 1-D de mesmo tamanho.
+
+    Raises:
+        ValueError: Se os tamanhos forem incompatíveis
+    """
+    arrays = {name: np.atleast_1d(np.asarray(value)) for name, value in columns.items()}
+    try:
+        shaped = np.broadcast_arrays(*arrays.values())
+    except ValueError as e:
+        sizes = {name: len(array) for name, array in arrays.items()}
+        raise ValueError(f"Listas com tamanhos incompatíveis: {sizes}") from e
+    return dict(zip(arrays, shaped))
+
+
+def _column(values: np.ndarray, decimals: int = None) -> list:
+    """Array -> lista JSON (NaN vira ``None``)."""
+    if values.dtype.kind == "f":
+        if decimals is not None:
+            values = np.round(values, decimals)
+        if np.isnan(values).any():
+            return [None if math.isnan(v) else v for v in values.tolist()]
+    return values.tolist()
+
+
+def convert_batch(
+    amounts: ArrayLike,
+    from_currencies: ArrayLike,
+    to_currencies: ArrayLike,
+    rates: Mapping[str, Mapping[str, float]]
+) -> Dict[str, Any]:
+    """Converte vários valores de uma vez.
+
+    Cada par de moedas distinto é resolvido uma única vez; a conversão é uma
+    multiplicação vetorizada. Escalares são repetidos para todas as linhas
+    (ex: lista de preços em USD para BRL).
+
+    Args:
+        amounts: Valores a converter
+        from_currencies: Moeda de origem (uma ou uma por valor)
+        to_currencies: Moeda de destino (uma ou uma por valor)
+        rates: Taxas por moeda base (``{"USD": {"BRL": 5.0, ...}, ...}``)
+
+    Returns:
+        Colunas ``amount``, ``from_currency``, ``to_currency``, ``rate`` e
+        ``converted_amount`` (``None`` quando não há taxa), ``count`` e
+        ``missing_pairs``
+    """
+    columns = _broadcast(amount=amounts, source=from_currencies, target=to_currencies)
+    amount = columns["amount"].astype(float)
+    source = np.char.upper(columns["source"].astype(str))
+    target = np.char.upper(columns["target"].astype(str))
+
+    pairs, inverse = np.unique(np.char.add(np.char.add(source, "/"), target), return_inverse=True)
+    pair_rates = np.empty(len(pairs))
+    missing = []
+    for index, pair in enumerate(pairs.tolist()):
+        base, quote = pair.split("/")
+        rate = 1.0 if base == quote else rates.get(base, {}).get(quote)
+        if rate is None:
+            missing.append(pair)
+            rate = np.nan
+        pair_rates[index] = rate
+
+    rate = pair_rates[inverse.reshape(-1)]
+
+    return {
+        "amount": _column(amount),
+        "from_currency": source.tolist(),
+        "to_currency": target.tolist(),
+        "rate": _column(rate),
+        "converted_amount": _column(amount * rate, 2),
+        "count": len(amount),
+        "missing_pairs": missing
+    }
+
+
+def compound_interest_batch(principals: ArrayLike, rates: ArrayLike, periods: ArrayLike) -> Dict[str, Any]:
+    """Juros compostos ``M = C * (1 + i)^n`` para vários cenários.
+
+    Args:
+        principals: Valores iniciais
+        rates: Taxas por período (decimal)
+        periods: Números de períodos
+
+    Returns:
+        Colunas ``principal``, ``rate``, ``periods``, ``final_amount`` e
+        ``interest_earned``, além de ``count``
+    """
+    columns = _broadcast(principal=principals, rate=rates, periods=periods)
+    principal = columns["principal"].astype(float)
+    rate = columns["rate"].astype(float)
+    n = columns["periods"].astype(int)
+
+    final_amount = principal * np.power(1 + rate, n)
+
+    return {
+        "principal": _column(principal),
+        "rate": _column(rate),
+        "periods": n.tolist(),
+        "final_amount": _column(final_amount, 2),
+        "interest_earned": _column(final_amount - principal, 2),
+        "count": len(principal)
+    }
+
+
+def compound_interest_schedule(principals: ArrayLike, rates: ArrayLike, periods: ArrayLike) -> Dict[str, Any]:
+    """Evolução período a período dos juros compostos de um ou mais cenários.
+
+    O resultado é "longo": uma linha por (cenário, período), calculada de uma
+    vez com ``np.repeat``, sem laço por período.
+
+    Args:
+        principals: Valores iniciais
+        rates: Taxas por período (decimal)
+        periods: Números de períodos de cada cenário
+
+    Returns:
+        Colunas ``scenario``, ``period``, ``opening_balance``, ``interest``,
+        ``closing_balance`` e ``cumulative_interest``, além de ``count``
+
+    Raises:
+        ValueError: Se algum número de períodos for negativo
+    """
+    columns = _broadcast(principal=principals, rate=rates, periods=periods)
+    principal = columns["principal"].astype(float)
+    rate = columns["rate"].astype(float)
+    n = columns["periods"].astype(int)
+    if (n < 0).any():
+        raise ValueError("Número de períodos não pode ser negativo")
+
+    scenario = np.repeat(np.arange(len(n)), n)
+    # Período dentro do cenário: posição global menos o início do cenário
+    starts = np.repeat(np.cumsum(n) - n, n)
+    period = np.arange(len(scenario)) - starts + 1
+
+    scenario_principal = principal[scenario]
+    growth = 1 + rate[scenario]
+    opening = scenario_principal * np.power(growth, period - 1)
+    closing = opening * growth
+
+    return {
+        "scenario": scenario.tolist(),
+        "period": period.tolist(),
+        "opening_balance": _column(opening, 2),
+        "interest": _column(closing - opening, 2),
+        "closing_balance": _column(closing, 2),
+        "cumulative_interest": _column(closing - scenario_principal, 2),
+        "count": len(scenario)
+    }
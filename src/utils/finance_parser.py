@@ -0,0 +1,167 @@
+"""Parser de queries financeiras: operação, valores, moedas, taxa e período em uma passada"""
+
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+# Códigos ISO 4217 em circulação
+ISO_4217 = frozenset("""
+    AED AFN ALL AMD ANG AOA ARS AUD AWG AZN BAM BBD BDT BGN BHD BIF BMD BND BOB BOV
+    BRL BSD BTN BWP BYN BZD CAD CDF CHE CHF CHW CLF CLP CNY COP COU CRC CUC CUP CVE
+    CZK DJF DKK DOP DZD EGP ERN ETB EUR FJD FKP GBP GEL GHS GIP GMD GNF GTQ GYD HKD
+    HNL HTG HUF IDR ILS INR IQD IRR ISK JMD JOD JPY KES KGS KHR KMF KPW KRW KWD KYD
+    KZT LAK LBP LKR LRD LSL LYD MAD MDL MGA MKD MMK MNT MOP MRU MUR MVR MWK MXN MXV
+    MYR MZN NAD NGN NIO NOK NPR NZD OMR PAB PEN PGK PHP PKR PLN PYG QAR RON RSD RUB
+    RWF SAR SBD SCR SDG SEK SGD SHP SLE SLL SOS SRD SSP STN SVC SYP SZL THB TJS TMT
+    TND TOP TRY TTD TWD TZS UAH UGX USD USN UYI UYU UYW UZS VED VES VND VUV WST XAF
+    XAG XAU XBA XBB XBC XBD XCD XDR XOF XPD XPF XPT XSU XTS XUA XXX YER ZAR ZMW ZWL
+""".split())
+
+# Códigos aceitos também em minúsculas em qualquer posição; os demais só em
+# maiúsculas ou em contexto de moeda (ver ``CODE_CONNECTORS``), para não
+# confundir palavras comuns como "all", "top" ou "try" com moedas
+COMMON_CODES = frozenset("""
+    USD BRL EUR GBP JPY ARS CAD AUD CHF CNY MXN CLP COP UYU PYG PEN BOB
+""".split())
+
+CURRENCY_SYMBOLS = {"R$": "BRL", "US$": "USD", "$": "USD", "€": "EUR", "£": "GBP", "¥": "JPY"}
+
+CURRENCY_NAMES = {
+    "dolar": "USD", "dolares": "USD", "dólar": "USD", "dólares": "USD",
+    "real": "BRL", "reais": "BRL",
+    "euro": "EUR", "euros": "EUR",
+    "libra": "GBP", "libras": "GBP",
+    "iene": "JPY", "ienes": "JPY",
+    "franco": "CHF", "francos": "CHF",
+    "yuan": "CNY", "yuans": "CNY",
+}
+
+# Palavra -> ("currency", código) ou ("keyword", marcador). Códigos ISO são
+# procurados com a caixa original; nomes, palavras-chave e COMMON_CODES
+# também em minúsculas. Demais códigos em minúsculas dependem do contexto.
+WORDS = {code: ("currency", code) for code in ISO_4217}
+WORDS.update({code.lower(): ("currency", code) for code in COMMON_CODES})
+WORDS.update({name: ("currency", code) for name, code in CURRENCY_NAMES.items()})
+WORDS.update({
+    "câmbio": ("keyword", "exchange"), "cambio": ("keyword", "exchange"),
+    "taxa": ("keyword", "rate"),
+    "juros": ("keyword", "interest"), "interest": ("keyword", "interest"),
+    "composto": ("keyword", "compound"), "compostos": ("keyword", "compound"),
+    "compound": ("keyword", "compound"),
+})
+
+# Palavras que ligam valores e moedas ("100 sek para chf"): um código ISO em
+# minúsculas é aceito logo após um valor ou um conector, ou logo antes de um conector
+CODE_CONNECTORS = frozenset({"para", "pra", "em", "to", "in", "into"})
+
+PERIOD_UNITS = {"mes": 1, "mês": 1, "meses": 1, "ano": 12, "anos": 12}
+
+_NUMBER = r"\d{1,3}(?:[.,]\d{3})+(?:[.,]\d+)?|\d+(?:[.,]\d+)?"
+
+# Um único padrão; ``findall`` percorre a query uma vez. Sufixos (``%``,
+# meses/anos) e símbolos de moeda ficam no mesmo token do número, então cada
+# token é classificado sem olhar para os vizinhos.
+TOKEN_PATTERN = re.compile(
+    rf"(?P<number>{_NUMBER})(?:\s*(?P<suffix>(?i:%|meses|m[eê]s|anos?))(?!\w))?"
+    rf"|(?P<symbol>[Rr]\$|US\$|[$€£¥])\s*(?P<money>{_NUMBER})"
+    r"|(?P<word>[^\W\d_]+)"
+)
+
+_THOUSANDS = re.compile(r"[1-9]\d{0,2}(?:([.,])\d{3})+")
+
+
+def parse_number(text: str) -> float:
+    """Converte números em formato brasileiro ou americano.
+
+    ``1.000,50`` e ``1,000.50`` viram 1000.5; com um único separador seguido
+    de grupos de 3 dígitos (``1.000``, ``12,500``) ele é tratado como milhar,
+    caso contrário como decimal (``0,5``, ``1000.75``).
+    """
+    if text.isdigit():
+        return float(text)
+    if "." in text and "," in text:
+        decimal = "." if text.rfind(".") > text.rfind(",") else ","
+        thousands = "," if decimal == "." else "."
+        return float(text.replace(thousands, "").replace(decimal, "."))
+
+    match = _THOUSANDS.fullmatch(text)
+    if match:
+        return float(text.replace(match.group(1), ""))
+    return float(text.replace(",", "."))
+
+
+@dataclass
+class FinanceQuery:
+    """Resultado do parsing de uma query financeira."""
+
+    operation: Optional[str] = None
+    amounts: List[float] = field(default_factory=list)
+    currencies: List[str] = field(default_factory=list)
+    rate: Optional[float] = None
+    periods: Optional[int] = None
+    compound: bool = False
+
+
+def parse_finance_query(query: str) -> FinanceQuery:
+    """Extrai operação, valores, moedas, taxa (decimal) e período (meses).
+
+    Args:
+        query: Query do usuário (ex: "Converta R$ 1.000,50 para USD")
+
+    Returns:
+        ``FinanceQuery``; ``operation`` é ``currency_conversion``,
+        ``exchange_rate``, ``interest_calculation`` ou ``None``
+    """
+    result = FinanceQuery()
+    seen = set()
+    # Token anterior ("amount"/"connector") e código em minúsculas à espera de um conector
+    previous, pending = None, None
+
+    for number, suffix, symbol, money, word in TOKEN_PATTERN.findall(query):
+        context, previous = previous, None
+        candidate, pending = pending, None
+        if number:
+            if not suffix:
+                result.amounts.append(parse_number(number))
+                previous = "amount"
+            elif suffix == "%":
+                if result.rate is None:
+                    result.rate = parse_number(number) / 100
+            elif result.periods is None:
+                result.periods = int(parse_number(number)) * PERIOD_UNITS[suffix.lower()]
+        elif symbol:
+            result.currencies.append(CURRENCY_SYMBOLS[symbol.upper()])
+            result.amounts.append(parse_number(money))
+            previous = "amount"
+        else:
+            lowered = word.lower()
+            if lowered in CODE_CONNECTORS:
+                if candidate:
+                    result.currencies.append(candidate)
+                previous = "connector"
+            entry = WORDS.get(word) or WORDS.get(lowered)
+            if entry is None and word.upper() in ISO_4217:
+                if context:
+                    entry = ("currency", word.upper())
+                else:
+                    pending = word.upper()
+            if entry is None:
+                if lowered.startswith(("convert", "convers")):
+                    seen.add("convert")
+            elif entry[0] == "currency":
+                result.currencies.append(entry[1])
+            else:
+                seen.add(entry[1])
+
+    result.compound = "compound" in seen
+    if "convert" in seen:
+        result.operation = "currency_conversion"
+    elif "rate" in seen and "exchange" in seen:
+        result.operation = "exchange_rate"
+    elif "interest" in seen:
+        result.operation = "interest_calculation"
+    elif result.amounts and len(result.currencies) >= 2:
+        # "Quanto é 100 dólares em reais?"
+        result.operation = "currency_conversion"
+
+    return result
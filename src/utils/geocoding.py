@@ -0,0 +1,98 @@
+"""Cache persistente de geocodificação (nome de cidade -> coordenadas)"""
+
+import logging
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Optional
+
+from src.utils.text import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Arquivo padrão (sobrescrito por GEOCODING_CACHE_PATH)
+DEFAULT_GEOCODING_CACHE_PATH = os.path.join("data", "cache", "geocoding_cache.db")
+
+
+class GeocodingCache:
+    """Tabela SQLite de coordenadas indexada pelo nome normalizado da cidade.
+
+    A chave primária é ``(nome normalizado, país)``, então "São Paulo",
+    "sao paulo" e "SÃO PAULO" são resolvidos em uma única busca pela chave.
+    Coordenadas de cidades não mudam, portanto as entradas não expiram.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """Abre (ou cria) a tabela de geocodificação.
+
+        Args:
+            path: Arquivo SQLite (padrão: ``GEOCODING_CACHE_PATH`` ou
+                ``data/cache/geocoding_cache.db``; use ``:memory:`` para não persistir)
+        """
+        self.path = path or os.getenv("GEOCODING_CACHE_PATH", DEFAULT_GEOCODING_CACHE_PATH)
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS geocoding ("
+            "key TEXT NOT NULL, country TEXT NOT NULL, name TEXT NOT NULL, "
+            "latitude REAL NOT NULL, longitude REAL NOT NULL, "
+            "PRIMARY KEY (key, country)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def seed(self, coordinates: Dict[str, Dict[str, float]], country: str = "BR"):
+        """Pré-carrega coordenadas conhecidas (ex: ``CITY_COORDINATES``).
+
+        Args:
+            coordinates: Mapa cidade -> {"lat": ..., "lon": ...}
+            country: Código do país das cidades
+        """
+        rows = [
+            (normalize_text(city), country.upper(), city.title(), coords["lat"], coords["lon"])
+            for city, coords in coordinates.items()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO geocoding (key, country, name, latitude, longitude) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    def lookup(self, city: str, country: str = "BR") -> Optional[Dict[str, Any]]:
+        """Busca as coordenadas da cidade (sem diferenciar acentos ou caixa)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT name, latitude, longitude FROM geocoding WHERE key = ? AND country = ?",
+                (normalize_text(city), country.upper())
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return {"name": row[0], "latitude": row[1], "longitude": row[2]}
+
+    def store(self, city: str, latitude: float, longitude: float, country: str = "BR"):
+        """Grava as coordenadas obtidas da API de geocodificação."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO geocoding (key, country, name, latitude, longitude) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (normalize_text(city), country.upper(), city, latitude, longitude)
+            )
+            self._conn.commit()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Retorna acertos e falhas de busca."""
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        """Fecha a conexão SQLite."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,45 @@
+"""Cliente HTTP assíncrono compartilhado com pool de conexões"""
+
+import importlib.util
+import logging
+import os
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+def create_http_client(**overrides) -> httpx.AsyncClient:
+    """Cria um ``httpx.AsyncClient`` com pool de conexões configurável.
+    
+    Limites e timeouts vêm do ambiente (``HTTP_MAX_CONNECTIONS``,
+    ``HTTP_MAX_KEEPALIVE``, ``HTTP_KEEPALIVE_EXPIRY``, ``HTTP_TIMEOUT``,
+    ``HTTP_CONNECT_TIMEOUT`` e ``HTTP2``) e podem ser sobrescritos por
+    argumentos nomeados repassados ao cliente.
+    
+    Returns:
+        Cliente que deve ser fechado com ``aclose()`` pelo dono do ciclo de vida
+    """
+    limits = httpx.Limits(
+        max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE", "20")),
+        keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+    )
+    timeout = httpx.Timeout(
+        float(os.getenv("HTTP_TIMEOUT", "10")),
+        connect=float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+    )
+    
+    http2 = os.getenv("HTTP2", "false").lower() == "true"
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP2=true mas o pacote 'h2' não está instalado; usando HTTP/1.1")
+        http2 = False
+    
+    options = {"limits": limits, "timeout": timeout, "http2": http2}
+    options.update(overrides)
+    
+    logger.info(
+        f"Pool HTTP criado (max_connections={limits.max_connections}, "
+        f"keepalive={limits.max_keepalive_connections}, http2={options['http2']})"
+    )
+    return httpx.AsyncClient(**options)
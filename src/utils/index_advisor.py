@@ -0,0 +1,110 @@
+"""Criação de índices para padrões de consulta conhecidos, com relatório de planos"""
+
+import logging
+import re
+import sqlite3
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+_CREATE_RE = re.compile(
+    r"^\s*CREATE\s+(?:UNIQUE\s+|VIRTUAL\s+|TEMP(?:ORARY)?\s+)?(?:TABLE|INDEX|TRIGGER|VIEW)\s+"
+    r"(?:IF\s+NOT\s+EXISTS\s+)?[\"`\[]?(\w+)",
+    re.IGNORECASE
+)
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """Índice (ou estrutura auxiliar) criado sob demanda.
+
+    Attributes:
+        name: Nome do objeto principal no ``sqlite_master``
+        statements: DDL executada em ordem, em uma única transação, para criá-lo
+    """
+
+    name: str
+    statements: Tuple[str, ...]
+
+    @property
+    def objects(self) -> Tuple[str, ...]:
+        """Nomes de todos os objetos criados pela DDL (``name`` primeiro)."""
+        names = [self.name]
+        for statement in self.statements:
+            match = _CREATE_RE.match(statement)
+            if match and match.group(1) not in names:
+                names.append(match.group(1))
+        return tuple(names)
+
+
+def object_exists(conn: sqlite3.Connection, name: str) -> bool:
+    """Indica se a tabela, índice ou trigger existe no banco."""
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone()
+    return row is not None
+
+
+def explain(conn: sqlite3.Connection, sql: str, params: Sequence[Any] = ()) -> List[str]:
+    """Retorna as linhas de ``EXPLAIN QUERY PLAN`` da consulta."""
+    try:
+        return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+    except sqlite3.Error as e:
+        return [f"indisponível: {e}"]
+
+
+def apply_indexes(
+    conn: sqlite3.Connection,
+    table: str,
+    specs: Sequence[IndexSpec],
+    probes: Dict[str, Tuple[str, Sequence[Any]]]
+) -> Dict[str, Any]:
+    """Cria os índices ausentes e compara os planos das consultas.
+
+    Args:
+        conn: Conexão com permissão de escrita
+        table: Tabela que precisa existir para os índices serem criados
+        specs: Índices desejados
+        probes: Consultas representativas por nome (SQL e parâmetros de exemplo)
+
+    Returns:
+        Dicionário com ``created`` (nomes criados), ``failed`` (nome -> erro)
+        e ``plans`` (nome -> planos ``before``/``after``); vazio se a tabela
+        não existir
+    """
+    if not object_exists(conn, table):
+        logger.info(f"Tabela {table} não encontrada; índices não criados")
+        return {}
+
+    before = {name: explain(conn, sql, params) for name, (sql, params) in probes.items()}
+
+    created, failed = [], {}
+    for spec in specs:
+        # Um objeto faltando (ex: trigger) deixa a estrutura sem manutenção:
+        # a spec é reaplicada inteira (a DDL usa IF NOT EXISTS)
+        if all(object_exists(conn, name) for name in spec.objects):
+            continue
+        try:
+            # BEGIN explícito: no modo legado do sqlite3 cada DDL faria commit sozinha
+            conn.execute("BEGIN")
+            try:
+                for statement in spec.statements:
+                    conn.execute(statement)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            created.append(spec.name)
+        except sqlite3.Error as e:
+            failed[spec.name] = str(e)
+            logger.warning(f"Não foi possível criar {spec.name}: {e}")
+
+    if created:
+        conn.execute("PRAGMA optimize")
+
+    after = {name: explain(conn, sql, params) for name, (sql, params) in probes.items()}
+
+    return {
+        "created": created,
+        "failed": failed,
+        "plans": {name: {"before": before[name], "after": after[name]} for name in probes}
+    }
@@ -0,0 +1,340 @@
+"""Base de conhecimento em arquivos, carregada sob demanda e recarregada quando muda
+
+Os documentos ficam em arquivos ``.json``/``.md`` (por padrão no diretório
+``knowledge/``). Nada é lido na inicialização: o primeiro acesso varre os
+arquivos e constrói o índice BM25; os seguintes só comparam ``mtime`` e
+tamanho de cada arquivo (no máximo a cada ``reload_interval`` segundos) e
+reprocessam apenas os arquivos cujo hash de conteúdo mudou; documentos
+inalterados reaproveitam a tokenização anterior e só os pesos BM25 são
+recalculados.
+
+No event loop use ``asearch``/``atopics``: a verificação e a reconstrução
+rodam em uma thread e o índice novo substitui o atual de uma vez, enquanto
+as buscas seguem no índice anterior.
+
+Com ``index_path``, o índice é gravado em disco junto com as impressões
+digitais dos arquivos de origem e aberto via mmap; se nada mudou desde a
+última execução, nenhum arquivo é reprocessado. Uso:
+
+    python -m src.utils.knowledge_base knowledge/ --output knowledge.idx
+"""
+
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field, replace
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.utils.search_index import (
+    BM25Index, DocumentTerms, SearchHit, analyze_document, iter_document_files, parse_document
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_KNOWLEDGE_PATH = Path(__file__).parent.parent.parent / "knowledge"
+
+
+@dataclass
+class SourceFile:
+    """Impressão digital de um arquivo de origem e os tópicos que ele define."""
+
+    mtime_ns: int
+    size: int
+    digest: str
+    topics: List[str] = field(default_factory=list)
+
+
+class KnowledgeBase:
+    """Corpus de documentos em arquivos com índice BM25 construído sob demanda."""
+
+    def __init__(
+        self,
+        paths: Optional[Sequence[str]] = None,
+        index_path: Optional[str] = None,
+        reload_interval: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """Configura a base sem ler nenhum arquivo.
+
+        Args:
+            paths: Arquivos ou diretórios com documentos (padrão: ``INFO_KNOWLEDGE_PATH``,
+                separados por ``os.pathsep``, ou ``knowledge/``)
+            index_path: Arquivo do índice persistido (padrão: ``INFO_INDEX_PATH``;
+                vazio mantém o índice só em memória)
+            reload_interval: Segundos entre verificações de mudança nos arquivos
+                (padrão: ``INFO_RELOAD_INTERVAL`` ou 2; negativo desativa)
+            clock: Fonte de tempo em segundos (injetável para testes)
+        """
+        if paths is None:
+            env_paths = os.getenv("INFO_KNOWLEDGE_PATH")
+            paths = env_paths.split(os.pathsep) if env_paths else [str(DEFAULT_KNOWLEDGE_PATH)]
+        self.paths = [str(path) for path in paths]
+        self.index_path = index_path if index_path is not None else os.getenv("INFO_INDEX_PATH") or None
+        if reload_interval is None:
+            reload_interval = float(os.getenv("INFO_RELOAD_INTERVAL", "2"))
+        self.reload_interval = reload_interval
+        self.clock = clock
+
+        self.reloads = 0
+        self.parsed_files = 0
+        self.analyzed_documents = 0
+        self.last_build_ms = 0.0
+        self._index: Optional[BM25Index] = None
+        self._sources: Dict[str, SourceFile] = {}
+        # Tokenização dos documentos do índice atual, reaproveitada nas reconstruções
+        self._analyzed: Dict[str, DocumentTerms] = {}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._refresh_task: Optional[asyncio.Future] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._index is not None
+
+    def _open_persisted(self):
+        """Abre o índice persistido e as impressões digitais gravadas nele."""
+        if not self.index_path or not os.path.exists(self.index_path):
+            return
+        try:
+            index = BM25Index.load(self.index_path)
+            sources = {
+                path: SourceFile(**source)
+                for path, source in index.metadata.get("sources", {}).items()
+            }
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Índice {self.index_path} ignorado: {e}")
+            return
+        self._index, self._sources, self._analyzed = index, sources, {}
+
+    def _stat_files(self) -> Dict[str, os.stat_result]:
+        stats = {}
+        for path in iter_document_files(self.paths):
+            try:
+                stats[path] = os.stat(path)
+            except OSError:
+                continue
+        return stats
+
+    def refresh(self) -> bool:
+        """Sincroniza o índice com os arquivos.
+
+        Arquivos com ``mtime`` e tamanho inalterados não são lidos; os demais
+        são lidos e só reprocessados se o hash do conteúdo mudou. Documentos
+        de arquivos inalterados vêm do índice atual.
+
+        Returns:
+            ``True`` se o índice foi reconstruído
+        """
+        with self._lock:
+            if self._index is None:
+                self._open_persisted()
+
+            stats = self._stat_files()
+            sources: Dict[str, SourceFile] = {}
+            parsed: Dict[str, Dict[str, Dict[str, Any]]] = {}
+            contents: Dict[str, str] = {}
+
+            for path, stat in stats.items():
+                previous = self._sources.get(path)
+                if previous and (previous.mtime_ns, previous.size) == (stat.st_mtime_ns, stat.st_size):
+                    sources[path] = previous
+                    continue
+                try:
+                    with open(path, "rb") as f:
+                        data = f.read()
+                except OSError as e:
+                    logger.warning(f"Documento ignorado ({path}): {e}")
+                    continue
+                digest = hashlib.sha1(data).hexdigest()
+                if previous and previous.digest == digest:
+                    # Só o mtime mudou (ex: touch); conteúdo idêntico
+                    sources[path] = replace(previous, mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+                    continue
+                sources[path] = SourceFile(stat.st_mtime_ns, stat.st_size, digest)
+                contents[path] = data.decode("utf-8", errors="replace")
+
+            removed = set(self._sources) - set(sources)
+            if self._index is not None and not contents and not removed:
+                self._sources = sources
+                self._checked_at = self.clock()
+                return False
+
+            # Tópicos de arquivos alterados ou removidos podem estar sobrepondo
+            # os de arquivos inalterados: esses também são relidos
+            stale_topics = {
+                topic for path in list(contents) + list(removed) if path in self._sources
+                for topic in self._sources[path].topics
+            }
+            for path, source in sources.items():
+                if path not in contents and stale_topics.intersection(source.topics):
+                    try:
+                        with open(path, encoding="utf-8", errors="replace") as f:
+                            contents[path] = f.read()
+                    except OSError as e:
+                        logger.warning(f"Documento ignorado ({path}): {e}")
+
+            for path, text in contents.items():
+                try:
+                    parsed[path] = parse_document(path, text)
+                except ValueError as e:
+                    logger.warning(f"Documento ignorado ({path}): {e}")
+                    parsed[path] = {}
+                sources[path] = replace(sources[path], topics=list(parsed[path]))
+
+            self._rebuild(stats, sources, parsed)
+            self._checked_at = self.clock()
+            return True
+
+    def _rebuild(
+        self,
+        stats: Dict[str, os.stat_result],
+        sources: Dict[str, SourceFile],
+        parsed: Dict[str, Dict[str, Dict[str, Any]]]
+    ):
+        """Constrói o novo índice (na ordem dos arquivos, o último tópico vence).
+
+        Só os documentos de arquivos reprocessados são tokenizados; os demais
+        reaproveitam a análise anterior.
+        """
+        started = time.perf_counter()
+        analyzed: Dict[str, DocumentTerms] = {}
+        for path in stats:
+            if path in parsed:
+                for topic, info in parsed[path].items():
+                    analyzed[topic] = analyze_document(topic, info)
+                    self.analyzed_documents += 1
+            elif path in sources and self._index is not None:
+                for topic in sources[path].topics:
+                    analysis = self._analyzed.get(topic)
+                    if analysis is None:
+                        # Índice aberto do disco: a análise ainda não está em memória
+                        document = self._index.get(topic)
+                        if document is None:
+                            continue
+                        analysis = analyze_document(topic, document)
+                        self.analyzed_documents += 1
+                    analyzed[topic] = analysis
+
+        index = BM25Index.from_analyzed(analyzed)
+        index.metadata = {"sources": {path: asdict(source) for path, source in sources.items()}}
+        if self.index_path:
+            index.save(self.index_path)
+            index = BM25Index.load(self.index_path)
+
+        self._index, self._sources, self._analyzed = index, sources, analyzed
+        self.reloads += 1
+        self.parsed_files += len(parsed)
+        self.last_build_ms = (time.perf_counter() - started) * 1000
+        logger.info(
+            f"Base de conhecimento carregada: {len(index)} documentos "
+            f"({len(parsed)} arquivo(s) processado(s), {self.last_build_ms:.1f}ms)"
+        )
+
+    def _ensure(self) -> BM25Index:
+        """Carrega na primeira chamada e verifica mudanças a cada ``reload_interval``."""
+        if self._index is None:
+            self.refresh()
+        elif self.reload_interval >= 0 and self.clock() - self._checked_at >= self.reload_interval:
+            self.refresh()
+        return self._index
+
+    def _refresh_in_background(self) -> asyncio.Future:
+        """Agenda ``refresh`` em uma thread (uma verificação por vez)."""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._checked_at = self.clock()
+            self._refresh_task = asyncio.ensure_future(asyncio.to_thread(self.refresh))
+            self._refresh_task.add_done_callback(self._log_refresh_error)
+        return self._refresh_task
+
+    @staticmethod
+    def _log_refresh_error(task: asyncio.Future):
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Falha ao recarregar a base de conhecimento: {task.exception()}")
+
+    async def _aensure(self) -> BM25Index:
+        """Como ``_ensure``, sem bloquear o event loop.
+
+        Só a primeira carga é aguardada; depois, mudanças nos arquivos são
+        verificadas em segundo plano e as buscas usam o índice atual até o
+        novo ficar pronto.
+        """
+        if self._index is None:
+            await asyncio.shield(self._refresh_in_background())
+        elif self.reload_interval >= 0 and self.clock() - self._checked_at >= self.reload_interval:
+            self._refresh_in_background()
+        return self._index
+
+    @staticmethod
+    def _search(index: BM25Index, query: str, k: int) -> Tuple[List[SearchHit], Optional[Dict[str, Any]]]:
+        hits = index.search(query, k)
+        return hits, (index.document(hits[0].doc_id) if hits else None)
+
+    def search(self, query: str, k: int = 5) -> Tuple[List[SearchHit], Optional[Dict[str, Any]]]:
+        """Busca ranqueada.
+
+        Returns:
+            Resultados (BM25) e o documento do melhor resultado (``None`` se não houver)
+        """
+        return self._search(self._ensure(), query, k)
+
+    async def asearch(self, query: str, k: int = 5) -> Tuple[List[SearchHit], Optional[Dict[str, Any]]]:
+        """``search`` para o event loop (recarga dos arquivos fora do loop)."""
+        return self._search(await self._aensure(), query, k)
+
+    def get(self, topic: str) -> Optional[Dict[str, Any]]:
+        """Retorna o documento de um tópico ou ``None``."""
+        return self._ensure().get(topic)
+
+    def topics(self) -> List[str]:
+        """Tópicos disponíveis."""
+        return list(self._ensure().topics)
+
+    async def atopics(self) -> List[str]:
+        """``topics`` para o event loop."""
+        return list((await self._aensure()).topics)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna tamanho da base e contadores de recarga."""
+        return {
+            "loaded": self.loaded,
+            "documents": len(self._index) if self._index is not None else 0,
+            "files": len(self._sources),
+            "reloads": self.reloads,
+            "parsed_files": self.parsed_files,
+            "analyzed_documents": self.analyzed_documents,
+            "last_build_ms": round(self.last_build_ms, 2)
+        }
+
+
+_knowledge_base: Optional[KnowledgeBase] = None
+
+
+def get_knowledge_base() -> KnowledgeBase:
+    """Retorna a base de conhecimento compartilhada pelo processo."""
+    global _knowledge_base
+
+    if _knowledge_base is None:
+        _knowledge_base = KnowledgeBase()
+
+    return _knowledge_base
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Constrói o índice BM25 da base de conhecimento")
+    parser.add_argument("paths", nargs="+", help="Arquivos ou diretórios com documentos .json/.md")
+    parser.add_argument("--output", default="knowledge.idx", help="Arquivo de índice gerado")
+    args = parser.parse_args()
+
+    knowledge = KnowledgeBase(args.paths, index_path=args.output)
+    knowledge.refresh()
+    stats = knowledge.get_stats()
+    print(f"{stats['documents']} documentos de {stats['files']} arquivo(s) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Registro de consultas SQL parametrizadas com estatísticas de execução"""
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class QueryTemplate:
+    """Consulta SQL nomeada com placeholders ``?``.
+
+    O texto SQL é fixo, então o cache de statements do ``sqlite3`` reaproveita
+    a mesma instrução preparada a cada execução, mudando apenas os parâmetros.
+    Com ``page_key``, a última coluna do SELECT é uma chave única e crescente
+    (ex: ``rowid``) usada na paginação por chave e omitida do resultado.
+    """
+
+    name: str
+    sql: str
+    description: str = ""
+    page_key: Optional[str] = None
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Percentil por ranking mais próximo (``samples`` já ordenadas)."""
+    if not samples:
+        return 0.0
+    index = min(len(samples) - 1, max(0, round(fraction * len(samples)) - 1))
+    return samples[index]
+
+
+class QueryTemplateRegistry:
+    """Templates de consulta indexados por nome, com métricas por template.
+
+    Guarda as últimas ``max_samples`` latências de cada template para calcular
+    p50/p99, além do total de execuções e de linhas retornadas. Pode ser
+    usado a partir das threads do executor de consultas.
+    """
+
+    def __init__(self, max_samples: int = 1024, clock: Callable[[], float] = time.perf_counter):
+        """Inicializa o registro.
+
+        Args:
+            max_samples: Latências mantidas por template para os percentis
+            clock: Fonte de tempo em segundos (injetável para testes)
+        """
+        self.max_samples = max_samples
+        self.clock = clock
+        self._templates: Dict[str, QueryTemplate] = {}
+        self._counts: Dict[str, int] = {}
+        self._rows: Dict[str, int] = {}
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def register(
+        self,
+        name: str,
+        sql: str,
+        description: str = "",
+        page_key: Optional[str] = None
+    ) -> QueryTemplate:
+        """Registra um template (o nome deve ser único).
+
+        Raises:
+            ValueError: Se já existir um template com o mesmo nome
+        """
+        if name in self._templates:
+            raise ValueError(f"Template de consulta duplicado: {name}")
+
+        template = QueryTemplate(
+            name=name, sql=" ".join(sql.split()), description=description, page_key=page_key
+        )
+        self._templates[name] = template
+        self._counts[name] = 0
+        self._rows[name] = 0
+        self._latencies[name] = deque(maxlen=self.max_samples)
+        return template
+
+    def get(self, name: str) -> QueryTemplate:
+        """Retorna o template pelo nome.
+
+        Raises:
+            KeyError: Se o template não existir
+        """
+        return self._templates[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._templates
+
+    def names(self) -> List[str]:
+        """Nomes dos templates registrados."""
+        return list(self._templates)
+
+    def record(self, name: str, elapsed: float, rows: int):
+        """Registra uma execução do template."""
+        with self._lock:
+            self._counts[name] += 1
+            self._rows[name] += rows
+            self._latencies[name].append(elapsed)
+
+    def timed(self, name: str, fn: Callable[[], Tuple[Any, int]]) -> Any:
+        """Executa ``fn`` medindo a latência e registra a execução.
+
+        Args:
+            name: Nome do template executado
+            fn: Função que executa a consulta e devolve (resultado, linhas)
+
+        Returns:
+            Resultado devolvido por ``fn``
+        """
+        started = self.clock()
+        result, rows = fn()
+        self.record(name, self.clock() - started, rows)
+        return result
+
+    def get_stats(self, name: Optional[str] = None) -> Dict[str, Any]:
+        """Retorna execuções, p50/p99 (ms) e linhas retornadas por template."""
+        with self._lock:
+            names = [name] if name else list(self._templates)
+            stats = {}
+            for key in names:
+                samples = sorted(self._latencies[key])
+                stats[key] = {
+                    "count": self._counts[key],
+                    "p50_ms": round(percentile(samples, 0.50) * 1000, 3),
+                    "p99_ms": round(percentile(samples, 0.99) * 1000, 3),
+                    "rows": self._rows[key]
+                }
+            return stats[name] if name else stats
@@ -0,0 +1,487 @@
+"""Índice invertido com ranking BM25 para a base de conhecimento
+
+O índice é construído a partir de documentos (dicionários com ``definition``,
+``key_concepts``, ``benefits``...) lidos de arquivos JSON e Markdown, e pode
+ser gravado em um arquivo único mapeável em memória:
+
+    [magic][tamanho do cabeçalho][cabeçalho JSON][arrays alinhados em 64 bytes]
+
+O cabeçalho guarda o vocabulário e os tópicos; as listas de postings, os
+pesos BM25 pré-calculados e os documentos serializados ficam nos arrays,
+lidos sob demanda via ``np.memmap``. A base de conhecimento em arquivos fica
+em ``src.utils.knowledge_base``.
+"""
+
+import json
+import logging
+import os
+import struct
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from src.utils.text import tokenize
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"BM25IDX1"
+ALIGNMENT = 64
+
+# Termos presentes em mais de 1/DENSE_RATIO dos documentos são "frequentes"
+# na busca (ver ``BM25Index.search``)
+DENSE_RATIO = 8
+
+# Peso de cada campo na frequência do termo (BM25F simplificado)
+FIELD_WEIGHTS = {"topic": 3.0, "definition": 1.0, "key_concepts": 1.5}
+
+# Palavras sem valor de busca (já normalizadas, sem acentos)
+STOPWORDS = frozenset("""
+    a ao aos as com como da das de do dos e em explique fale isso me mim na nas
+    no nos o os ou para pela pelo por qual quais que quem sao se sobre um uma
+    the of is what and to in on for about
+""".split())
+
+
+@lru_cache(maxsize=65536)
+def _normalize_word(word: str) -> Tuple[str, ...]:
+    if word.isascii() and word.isalnum():
+        return () if word in STOPWORDS else (word,)
+    # Acentos e pontuação colada ("agentes," / "multi-agente")
+    return tuple(token for token in tokenize(word) if token not in STOPWORDS)
+
+
+def query_terms(text: str) -> Dict[str, int]:
+    """Tokens normalizados de ``text`` (sem stopwords) com suas contagens.
+
+    Equivale a ``tokenize`` seguido do filtro de stopwords, mas normaliza
+    cada palavra distinta uma única vez (cache), o que domina o tempo de
+    construção de índices grandes.
+    """
+    terms: Dict[str, int] = {}
+    for word in unicodedata.normalize("NFC", text).casefold().split():
+        for token in _normalize_word(word):
+            terms[token] = terms.get(token, 0) + 1
+    return terms
+
+
+def _field_text(value: Any) -> str:
+    if isinstance(value, (list, tuple)):
+        return " ".join(str(item) for item in value)
+    return str(value) if value else ""
+
+
+@dataclass(frozen=True)
+class DocumentTerms:
+    """Análise de um documento: frequências ponderadas dos termos e documento serializado.
+
+    Não depende dos demais documentos, então pode ser reaproveitada entre
+    construções do índice (só ``idf`` e o tamanho médio mudam).
+    """
+
+    frequencies: Dict[str, float]
+    length: float
+    blob: bytes
+
+
+def analyze_document(
+    topic: str,
+    info: Dict[str, Any],
+    field_weights: Mapping[str, float] = FIELD_WEIGHTS
+) -> DocumentTerms:
+    """Tokeniza os campos do documento (a etapa mais cara da construção do índice)."""
+    frequencies: Dict[str, float] = {}
+    for field, weight in field_weights.items():
+        value = topic if field == "topic" else info.get(field)
+        for term, count in query_terms(_field_text(value)).items():
+            frequencies[term] = frequencies.get(term, 0.0) + count * weight
+    return DocumentTerms(
+        frequencies, sum(frequencies.values()), json.dumps(info, ensure_ascii=False).encode("utf-8")
+    )
+
+
+@dataclass
+class SearchHit:
+    """Resultado de uma busca."""
+
+    topic: str
+    score: float
+    doc_id: int
+
+
+class BM25Index:
+    """Índice invertido com pesos BM25 pré-calculados por posting.
+
+    Como ``k1``, ``b`` e o tamanho médio dos documentos são fixos após a
+    construção, o peso ``idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl / avgdl))``
+    de cada par (termo, documento) é calculado uma vez. A busca só soma os
+    pesos das listas dos termos da query e seleciona o top-k.
+    """
+
+    def __init__(
+        self,
+        vocabulary: Dict[str, int],
+        topics: List[str],
+        arrays: Dict[str, np.ndarray],
+        k1: float,
+        b: float,
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        self.vocabulary = vocabulary
+        self.topics = topics
+        self.k1 = k1
+        self.b = b
+        # Informações livres gravadas no cabeçalho (ex: arquivos de origem)
+        self.metadata = metadata or {}
+        self._positions = {topic: doc_id for doc_id, topic in enumerate(topics)}
+        self.term_offsets = arrays["term_offsets"]
+        self.posting_docs = arrays["posting_docs"]
+        self.posting_weights = arrays["posting_weights"]
+        self.term_max_weights = arrays["term_max_weights"]
+        self.doc_offsets = arrays["doc_offsets"]
+        self.doc_blob = arrays["doc_blob"]
+
+    def __len__(self) -> int:
+        return len(self.topics)
+
+    def __contains__(self, topic: str) -> bool:
+        return topic in self._positions
+
+    @classmethod
+    def build(
+        cls,
+        documents: Mapping[str, Dict[str, Any]],
+        k1: float = 1.2,
+        b: float = 0.75,
+        field_weights: Mapping[str, float] = FIELD_WEIGHTS
+    ) -> "BM25Index":
+        """Constrói o índice em memória.
+
+        Args:
+            documents: Tópico -> documento (``definition``, ``key_concepts``...)
+            k1: Saturação da frequência do termo
+            b: Normalização pelo tamanho do documento
+            field_weights: Campos indexados e seus pesos
+
+        Returns:
+            Índice pronto para busca ou para ``save``
+        """
+        analyzed = {
+            topic: analyze_document(topic, info, field_weights) for topic, info in documents.items()
+        }
+        return cls.from_analyzed(analyzed, k1, b)
+
+    @classmethod
+    def from_analyzed(
+        cls,
+        analyzed: Mapping[str, DocumentTerms],
+        k1: float = 1.2,
+        b: float = 0.75
+    ) -> "BM25Index":
+        """Monta o índice a partir de documentos já analisados (``analyze_document``).
+
+        Args:
+            analyzed: Tópico -> análise do documento, na ordem do índice
+            k1: Saturação da frequência do termo
+            b: Normalização pelo tamanho do documento
+
+        Returns:
+            Índice pronto para busca ou para ``save``
+        """
+        topics = list(analyzed)
+        n_docs = len(topics)
+        lengths = np.zeros(n_docs, dtype=np.float64)
+        blobs = []
+        # Postings em listas planas (termo, documento, frequência), ordenadas depois
+        term_ids: Dict[str, int] = {}
+        flat_terms, flat_docs, flat_frequencies = [], [], []
+
+        for doc_id, topic in enumerate(topics):
+            analysis = analyzed[topic]
+            lengths[doc_id] = analysis.length
+            for term in analysis.frequencies:
+                flat_terms.append(term_ids.setdefault(term, len(term_ids)))
+            flat_docs.extend([doc_id] * len(analysis.frequencies))
+            flat_frequencies.extend(analysis.frequencies.values())
+            blobs.append(analysis.blob)
+
+        # Vocabulário em ordem alfabética (arquivo determinístico)
+        terms = sorted(term_ids)
+        rank = np.empty(len(terms), dtype=np.int64)
+        rank[[term_ids[term] for term in terms]] = np.arange(len(terms))
+        term_of_posting = rank[np.array(flat_terms, dtype=np.int64)]
+        order = np.argsort(term_of_posting, kind="stable")
+
+        posting_docs = np.array(flat_docs, dtype=np.int32)[order]
+        frequencies = np.array(flat_frequencies, dtype=np.float64)[order]
+        counts = np.bincount(term_of_posting, minlength=len(terms))
+        term_offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(counts, out=term_offsets[1:])
+
+        average_length = lengths.mean() if n_docs else 0.0
+        idf = np.log1p((n_docs - counts + 0.5) / (counts + 0.5))
+        norm = k1 * (1 - b + b * lengths[posting_docs] / (average_length or 1.0))
+        weights = np.repeat(idf, counts) * frequencies * (k1 + 1) / (frequencies + norm)
+
+        doc_offsets = np.zeros(n_docs + 1, dtype=np.int64)
+        np.cumsum([len(blob) for blob in blobs], out=doc_offsets[1:])
+
+        arrays = {
+            "term_offsets": term_offsets,
+            "posting_docs": posting_docs,
+            "posting_weights": weights.astype(np.float32),
+            "term_max_weights": (
+                np.maximum.reduceat(weights, term_offsets[:-1]).astype(np.float32)
+                if len(terms) else np.zeros(0, dtype=np.float32)
+            ),
+            "doc_offsets": doc_offsets,
+            "doc_blob": np.frombuffer(b"".join(blobs), dtype=np.uint8),
+        }
+        vocabulary = {term: index for index, term in enumerate(terms)}
+        return cls(vocabulary, topics, arrays, k1, b)
+
+    def save(self, path: str):
+        """Grava o índice em um arquivo único (escrita atômica)."""
+        arrays = {
+            "term_offsets": self.term_offsets,
+            "posting_docs": self.posting_docs,
+            "posting_weights": self.posting_weights,
+            "term_max_weights": self.term_max_weights,
+            "doc_offsets": self.doc_offsets,
+            "doc_blob": self.doc_blob,
+        }
+        layout, offset = {}, 0
+        for name, array in arrays.items():
+            offset = -(-offset // ALIGNMENT) * ALIGNMENT
+            layout[name] = {"dtype": array.dtype.str, "length": len(array), "offset": offset}
+            offset += array.nbytes
+
+        header = json.dumps({
+            "k1": self.k1,
+            "b": self.b,
+            "vocabulary": self.vocabulary,
+            "topics": self.topics,
+            "metadata": self.metadata,
+            "arrays": layout
+        }, ensure_ascii=False).encode("utf-8")
+        data_start = -(-(len(MAGIC) + 8 + len(header)) // ALIGNMENT) * ALIGNMENT
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC + struct.pack("<Q", len(header)) + header)
+            for name, array in arrays.items():
+                f.seek(data_start + layout[name]["offset"])
+                f.write(np.ascontiguousarray(array).tobytes())
+            f.truncate(data_start + offset)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        """Abre um índice gravado por ``save`` sem copiar os arrays para a memória.
+
+        Raises:
+            ValueError: Se o arquivo não for um índice válido
+        """
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Arquivo de índice inválido: {path}")
+            (header_length,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_length).decode("utf-8"))
+        data_start = -(-(len(MAGIC) + 8 + header_length) // ALIGNMENT) * ALIGNMENT
+
+        raw = np.memmap(path, dtype=np.uint8, mode="r")
+        arrays = {}
+        for name, spec in header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            start = data_start + spec["offset"]
+            arrays[name] = raw[start:start + spec["length"] * dtype.itemsize].view(dtype)
+
+        try:
+            return cls(
+                header["vocabulary"], header["topics"], arrays, header["k1"], header["b"],
+                header.get("metadata")
+            )
+        except KeyError as e:
+            raise ValueError(f"Arquivo de índice incompleto ({path}): {e}") from e
+
+    def document(self, doc_id: int) -> Dict[str, Any]:
+        """Desserializa um documento (apenas os bytes dele são lidos)."""
+        start, end = self.doc_offsets[doc_id], self.doc_offsets[doc_id + 1]
+        return json.loads(self.doc_blob[start:end].tobytes().decode("utf-8"))
+
+    def get(self, topic: str) -> Optional[Dict[str, Any]]:
+        """Retorna o documento de um tópico ou ``None``."""
+        doc_id = self._positions.get(topic)
+        return None if doc_id is None else self.document(doc_id)
+
+    def _postings(self, query: str) -> List[Tuple[np.ndarray, np.ndarray, float]]:
+        """Listas (documentos, pesos, peso máximo) dos termos da query presentes no índice."""
+        postings = []
+        for term, count in query_terms(query).items():
+            term_id = self.vocabulary.get(term)
+            if term_id is not None:
+                start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+                postings.append((
+                    self.posting_docs[start:end],
+                    self.posting_weights[start:end] * count,
+                    float(self.term_max_weights[term_id]) * count
+                ))
+        return postings
+
+    def _accumulate(self, postings) -> Tuple[np.ndarray, np.ndarray]:
+        """Soma os pesos por documento: (documentos candidatos, scores)."""
+        if len(postings) == 1:
+            return postings[0][0], postings[0][1]
+
+        docs = np.concatenate([item[0] for item in postings])
+        weights = np.concatenate([item[1] for item in postings])
+        if len(docs) * DENSE_RATIO > len(self.topics):
+            # Muitos postings: vetor denso (O(documentos)) em vez de deduplicar
+            dense = np.bincount(docs, weights=weights, minlength=len(self.topics))
+            return np.arange(len(dense)), dense
+        candidates, inverse = np.unique(docs, return_inverse=True)
+        return candidates, np.bincount(inverse, weights=weights)
+
+    def search(self, query: str, k: int = 5) -> List[SearchHit]:
+        """Retorna os ``k`` documentos mais relevantes para a query.
+
+        Termos frequentes (mais de 1/``DENSE_RATIO`` dos documentos) não geram
+        candidatos: os candidatos vêm dos termos seletivos e recebem os pesos
+        dos frequentes por busca binária. Se o k-ésimo score superar a soma dos
+        pesos máximos dos termos frequentes, nenhum outro documento pode
+        entrar no top-k (MaxScore); senão, todos os termos são acumulados.
+
+        Args:
+            query: Texto livre (normalizado como no índice)
+            k: Número máximo de resultados
+
+        Returns:
+            Resultados em ordem decrescente de score (empates pela ordem dos documentos)
+        """
+        postings = self._postings(query)
+        if not postings or k <= 0:
+            return []
+
+        limit = len(self.topics) // DENSE_RATIO
+        selective = [item for item in postings if len(item[0]) <= limit]
+        frequent = [item for item in postings if len(item[0]) > limit]
+
+        candidates = scores = None
+        if selective and frequent:
+            candidates, scores = self._accumulate(selective)
+            scores = scores.astype(np.float64)
+            for docs, weights, _ in frequent:
+                positions = np.minimum(np.searchsorted(docs, candidates), len(docs) - 1)
+                found = docs[positions] == candidates
+                scores[found] += weights[positions[found]]
+            bound = sum(item[2] for item in frequent)
+            if len(scores) < k or np.partition(scores, len(scores) - k)[len(scores) - k] <= bound:
+                candidates = None
+
+        if candidates is None:
+            candidates, scores = self._accumulate(postings)
+
+        # Todos os empatados com o k-ésimo score entram antes do corte, para
+        # que o desempate seja sempre pela ordem dos documentos
+        threshold = np.partition(scores, len(scores) - k)[len(scores) - k] if len(scores) > k else 0
+        top = np.flatnonzero((scores >= threshold) & (scores > 0))
+        top = top[np.lexsort((candidates[top], -scores[top]))][:k]
+
+        return [
+            SearchHit(self.topics[doc_id], float(score), int(doc_id))
+            for doc_id, score in zip(candidates[top], scores[top])
+        ]
+
+
+def _parse_markdown(text: str, fallback_topic: str) -> Dict[str, Dict[str, Any]]:
+    """Markdown -> documento.
+
+    ``# Título`` vira o tópico, o primeiro parágrafo a ``definition`` e cada
+    seção ``## ...`` com itens ``- ...`` uma lista (``Conceitos``/``Concepts``
+    -> ``key_concepts``, ``Benefícios``/``Benefits`` -> ``benefits``).
+    """
+    topic, paragraph, section = fallback_topic, [], None
+    info: Dict[str, Any] = {}
+
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("## "):
+            heading = stripped[3:].strip().lower()
+            if heading.startswith(("conceito", "concept", "key")):
+                section = "key_concepts"
+            elif heading.startswith(("benef", "vantage")):
+                section = "benefits"
+            else:
+                section = heading
+            info.setdefault(section, [])
+        elif stripped.startswith("# "):
+            topic = stripped[2:].strip().lower()
+        elif stripped.startswith(("- ", "* ")) and section:
+            info[section].append(stripped[2:].strip())
+        elif stripped and section is None:
+            paragraph.append(stripped)
+        elif not stripped and paragraph and "definition" not in info:
+            info["definition"] = " ".join(paragraph)
+
+    if paragraph and "definition" not in info:
+        info["definition"] = " ".join(paragraph)
+    return {topic: info}
+
+
+def _parse_json(data: Any, fallback_topic: str) -> Dict[str, Dict[str, Any]]:
+    """JSON -> documentos: um documento, uma lista deles ou um mapa tópico -> documento."""
+    if isinstance(data, list):
+        documents = {}
+        for item in data:
+            documents.update(_parse_json(item, fallback_topic))
+        return documents
+    if isinstance(data, dict) and "definition" in data:
+        info = dict(data)
+        return {str(info.pop("topic", fallback_topic)).lower(): info}
+    if isinstance(data, dict):
+        return {str(topic).lower(): dict(info) for topic, info in data.items()}
+    raise ValueError("formato JSON não reconhecido")
+
+
+def parse_document(path: str, text: str) -> Dict[str, Dict[str, Any]]:
+    """Documentos por tópico do conteúdo de um arquivo ``.json`` ou ``.md``.
+
+    Raises:
+        ValueError: Se o conteúdo for inválido
+    """
+    fallback_topic = os.path.splitext(os.path.basename(path))[0].replace("_", " ").lower()
+    if path.endswith(".json"):
+        return _parse_json(json.loads(text), fallback_topic)
+    return _parse_markdown(text, fallback_topic)
+
+
+def load_document_file(path: str) -> Dict[str, Dict[str, Any]]:
+    """Lê um arquivo ``.json`` ou ``.md`` e retorna seus documentos por tópico."""
+    with open(path, encoding="utf-8") as f:
+        return parse_document(path, f.read())
+
+
+def iter_document_files(paths: Iterable[str]) -> Iterable[str]:
+    """Arquivos ``.json``/``.md`` dos caminhos informados (diretórios recursivamente)."""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in sorted(os.walk(path)):
+                for name in sorted(names):
+                    if name.endswith((".json", ".md")):
+                        yield os.path.join(root, name)
+        elif path.endswith((".json", ".md")):
+            yield path
+
+
+def load_documents(paths: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Carrega documentos de arquivos e diretórios (arquivos inválidos são ignorados)."""
+    documents: Dict[str, Dict[str, Any]] = {}
+    for path in iter_document_files(paths):
+        try:
+            documents.update(load_document_file(path))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Documento ignorado ({path}): {e}")
+    return documents
+
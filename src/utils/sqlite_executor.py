@@ -0,0 +1,124 @@
+"""Execução de consultas SQLite fora do event loop, com timeout e cancelamento"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+from src.utils.sqlite_pool import SQLitePool
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Número de instruções da VM do SQLite entre verificações de timeout/cancelamento
+PROGRESS_INTERVAL = 1000
+
+
+class QueryTimeoutError(TimeoutError):
+    """Consulta interrompida por exceder o tempo limite."""
+
+
+class SQLiteExecutor:
+    """Executa consultas em um pool limitado de threads.
+
+    Cada consulta recebe um prazo; um progress handler do SQLite interrompe
+    a execução quando o prazo vence ou quando a corrotina que aguarda é
+    cancelada, liberando a thread para as próximas consultas.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, timeout: Optional[float] = None):
+        """Inicializa o executor.
+
+        Args:
+            max_workers: Threads de consulta (padrão: ``SQLITE_MAX_WORKERS`` ou 4)
+            timeout: Tempo limite por consulta em segundos
+                (padrão: ``SQLITE_QUERY_TIMEOUT`` ou 30)
+        """
+        self.max_workers = max_workers or int(os.getenv("SQLITE_MAX_WORKERS", "4"))
+        self.timeout = timeout or float(os.getenv("SQLITE_QUERY_TIMEOUT", "30"))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="sqlite")
+        self._active = set()
+
+    async def run(
+        self,
+        pool: SQLitePool,
+        fn: Callable[[sqlite3.Connection], T],
+        timeout: Optional[float] = None
+    ) -> T:
+        """Executa ``fn(conn)`` em uma thread do pool com a conexão daquela thread.
+
+        Args:
+            pool: Pool de onde vem a conexão da thread de execução
+            fn: Função que executa a consulta e devolve o resultado
+            timeout: Tempo limite desta consulta (padrão: ``self.timeout``)
+
+        Returns:
+            Valor retornado por ``fn``
+
+        Raises:
+            QueryTimeoutError: Se a consulta exceder o tempo limite
+        """
+        timeout = timeout or self.timeout
+        deadline = time.monotonic() + timeout
+        cancelled = threading.Event()
+
+        def interrupt() -> int:
+            return 1 if cancelled.is_set() or time.monotonic() > deadline else 0
+
+        def job() -> T:
+            if cancelled.is_set():
+                raise asyncio.CancelledError()
+
+            conn = pool.connection()
+            conn.set_progress_handler(interrupt, PROGRESS_INTERVAL)
+            try:
+                return fn(conn)
+            except sqlite3.OperationalError as e:
+                if "interrupted" in str(e) and not cancelled.is_set():
+                    raise QueryTimeoutError(f"Consulta excedeu o tempo limite de {timeout:g}s") from e
+                raise
+            finally:
+                conn.set_progress_handler(None, 0)
+
+        self._active.add(cancelled)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, job)
+        except asyncio.CancelledError:
+            cancelled.set()
+            logger.info("Consulta SQLite cancelada")
+            raise
+        finally:
+            self._active.discard(cancelled)
+
+    def shutdown(self):
+        """Encerra as threads de consulta (consultas em andamento são interrompidas)."""
+        for cancelled in list(self._active):
+            cancelled.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_executor: Optional[SQLiteExecutor] = None
+
+
+def get_executor() -> SQLiteExecutor:
+    """Retorna o executor de consultas compartilhado pelo processo."""
+    global _executor
+
+    if _executor is None:
+        _executor = SQLiteExecutor()
+
+    return _executor
+
+
+def shutdown_executor():
+    """Encerra o executor compartilhado, se existir."""
+    global _executor
+
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
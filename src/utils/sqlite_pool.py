@@ -0,0 +1,144 @@
+"""Pool de conexões SQLite persistentes (uma conexão por thread)"""
+
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+from urllib.parse import quote
+
+logger = logging.getLogger(__name__)
+
+
+class SQLitePool:
+    """Mantém uma conexão SQLite aberta por thread para um mesmo arquivo.
+
+    Evita reabrir o arquivo e reprocessar o schema a cada consulta, e
+    preserva o page cache entre consultas. Conexões somente leitura usam URI
+    ``mode=ro`` e ``PRAGMA query_only``; o banco é colocado em modo WAL uma
+    única vez para que leitores não bloqueiem escritores.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        read_only: bool = True,
+        cache_size_kb: int = None,
+        mmap_size: int = None,
+        cached_statements: int = None
+    ):
+        """Configura o pool (as conexões são abertas sob demanda).
+
+        Args:
+            path: Caminho do arquivo SQLite
+            read_only: Abre conexões somente leitura
+            cache_size_kb: Page cache por conexão em KiB (padrão: ``SQLITE_CACHE_SIZE_KB`` ou 16384)
+            mmap_size: Bytes mapeados em memória (padrão: ``SQLITE_MMAP_SIZE`` ou 256 MiB)
+            cached_statements: Statements preparados mantidos por conexão
+                (padrão: ``SQLITE_CACHED_STATEMENTS`` ou 256)
+        """
+        self.path = path
+        self.read_only = read_only
+        self.cache_size_kb = cache_size_kb or int(os.getenv("SQLITE_CACHE_SIZE_KB", "16384"))
+        if mmap_size is None:
+            mmap_size = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+        self.mmap_size = mmap_size
+        self.cached_statements = cached_statements or int(os.getenv("SQLITE_CACHED_STATEMENTS", "256"))
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+        self._wal_checked = False
+
+    def _enable_wal(self):
+        """Coloca o banco em modo WAL (persistente no arquivo), se possível."""
+        if self._wal_checked:
+            return
+        self._wal_checked = True
+
+        if os.getenv("SQLITE_WAL", "true").lower() != "true" or not Path(self.path).exists():
+            return
+
+        try:
+            conn = sqlite3.connect(self.path)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Não foi possível ativar WAL em {self.path}: {e}")
+
+    def connect(self) -> sqlite3.Connection:
+        """Abre uma conexão avulsa com a configuração do pool.
+
+        Não fica associada a nenhuma thread nem é fechada por ``close``:
+        quem abre fecha (ex: leitura em streaming em uma thread própria).
+        """
+        with self._lock:
+            self._enable_wal()
+
+        if self.read_only:
+            uri = f"file:{quote(str(Path(self.path).resolve()))}?mode=ro"
+            conn = sqlite3.connect(
+                uri, uri=True, check_same_thread=False, cached_statements=self.cached_statements
+            )
+            conn.execute("PRAGMA query_only=ON")
+        else:
+            conn = sqlite3.connect(
+                self.path, check_same_thread=False, cached_statements=self.cached_statements
+            )
+
+        conn.execute(f"PRAGMA cache_size=-{self.cache_size_kb}")
+        conn.execute(f"PRAGMA mmap_size={self.mmap_size}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = self.connect()
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        """Retorna a conexão da thread atual (abrindo-a na primeira chamada)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    def execute(self, sql: str, params: Sequence[Any] = ()) -> sqlite3.Cursor:
+        """Executa SQL na conexão da thread atual e retorna o cursor."""
+        return self.connection().execute(sql, params)
+
+    def close(self):
+        """Fecha todas as conexões abertas pelo pool."""
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+            self._local = threading.local()
+
+
+_pools: Dict[Tuple[str, bool], SQLitePool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path: str, read_only: bool = True) -> SQLitePool:
+    """Retorna o pool compartilhado do arquivo (um por caminho e modo)."""
+    key = (str(Path(path).resolve()), read_only)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = SQLitePool(path, read_only=read_only)
+            _pools[key] = pool
+        return pool
+
+
+def close_all_pools():
+    """Fecha todos os pools compartilhados."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
@@ -0,0 +1,366 @@
+"""Leitura de resultados SQLite em streaming e paginação por token"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from src.utils.sqlite_executor import PROGRESS_INTERVAL, QueryTimeoutError
+from src.utils.sqlite_pool import SQLitePool
+
+# Fim do stream na fila entre a thread de leitura e o event loop
+_END = object()
+
+
+def default_fetch_size() -> int:
+    """Linhas lidas por ``fetchmany`` (``SQLITE_FETCH_SIZE`` ou 256)."""
+    return int(os.getenv("SQLITE_FETCH_SIZE", "256"))
+
+
+def default_page_size() -> int:
+    """Linhas por página de resultado (``SQLITE_PAGE_SIZE`` ou 500)."""
+    return int(os.getenv("SQLITE_PAGE_SIZE", "500"))
+
+
+def iter_rows(cursor: sqlite3.Cursor, fetch_size: Optional[int] = None) -> Iterator[Tuple]:
+    """Percorre o cursor em lotes de ``fetch_size`` linhas e fecha-o ao final.
+
+    Apenas um lote fica em memória por vez, independente do total de linhas.
+    """
+    fetch_size = fetch_size or default_fetch_size()
+    try:
+        while True:
+            batch = cursor.fetchmany(fetch_size)
+            if not batch:
+                return
+            yield from batch
+    finally:
+        cursor.close()
+
+
+def stream_query(
+    conn: sqlite3.Connection,
+    sql: str,
+    params: Sequence[Any] = (),
+    fetch_size: Optional[int] = None
+) -> Tuple[List[str], Iterator[Tuple]]:
+    """Executa a consulta e devolve as colunas e um gerador das linhas.
+
+    Args:
+        conn: Conexão onde a consulta é executada
+        sql: Consulta SQL
+        params: Parâmetros posicionais da consulta
+        fetch_size: Linhas lidas por ``fetchmany``
+
+    Returns:
+        Tupla (colunas, gerador de tuplas)
+    """
+    cursor = conn.execute(sql, params)
+    columns = [desc[0] for desc in cursor.description or ()]
+    return columns, iter_rows(cursor, fetch_size)
+
+
+def statement_body(sql: str) -> str:
+    """Remove ``;`` e comentários do fim da consulta para usá-la como subconsulta.
+
+    Literais e identificadores entre aspas são respeitados, então ``'--'`` ou
+    ``';'`` dentro de uma string não cortam a consulta.
+    """
+    end = 0
+    i, size = 0, len(sql)
+    while i < size:
+        char = sql[i]
+        if sql.startswith("--", i):
+            newline = sql.find("\n", i)
+            i = size if newline < 0 else newline + 1
+            continue
+        if sql.startswith("/*", i):
+            close = sql.find("*/", i + 2)
+            i = size if close < 0 else close + 2
+            continue
+        if char in "'\"`[":
+            closing = "]" if char == "[" else char
+            i += 1
+            while i < size:
+                if sql[i] == closing:
+                    # Aspas duplicadas escapam a própria aspa
+                    if closing != "]" and sql.startswith(closing * 2, i):
+                        i += 2
+                        continue
+                    break
+                i += 1
+            i += 1
+            end = i
+            continue
+        if not char.isspace() and char != ";":
+            end = i + 1
+        i += 1
+    return sql[:end].strip()
+
+
+async def iter_batches(
+    pool: SQLitePool,
+    sql: str,
+    params: Sequence[Any] = (),
+    fetch_size: Optional[int] = None,
+    max_pending: int = 2,
+    timeout: Optional[float] = None,
+    on_finish: Optional[Callable[[float, int], None]] = None
+) -> AsyncIterator[List[Tuple]]:
+    """Percorre o resultado em lotes de ``fetchmany`` sem bloquear o event loop.
+
+    A consulta roda uma única vez, em uma thread e conexão próprias (fora do
+    executor compartilhado, que não fica preso a um consumidor lento). Os
+    lotes passam por uma fila de ``max_pending`` posições: a leitura pausa
+    enquanto a fila está cheia. O prazo vale para cada lote, não para o
+    stream inteiro, e parar de iterar interrompe a consulta.
+
+    Args:
+        pool: Pool cuja configuração é usada na conexão da leitura
+        sql: Consulta SQL
+        params: Parâmetros posicionais da consulta
+        fetch_size: Linhas por lote (padrão: ``SQLITE_FETCH_SIZE`` ou 256)
+        max_pending: Lotes lidos e ainda não consumidos
+        timeout: Tempo limite de cada lote em segundos
+            (padrão: ``SQLITE_QUERY_TIMEOUT`` ou 30)
+        on_finish: Chamado ao fim da leitura com (segundos no SQLite, linhas)
+
+    Yields:
+        Lotes de tuplas
+
+    Raises:
+        QueryTimeoutError: Se um lote exceder o tempo limite
+    """
+    fetch_size = fetch_size or default_fetch_size()
+    timeout = timeout or float(os.getenv("SQLITE_QUERY_TIMEOUT", "30"))
+    loop = asyncio.get_running_loop()
+    batches: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+    stopped = threading.Event()
+
+    def put(item: Any) -> bool:
+        # Espera espaço na fila; desiste se o consumidor parou
+        try:
+            future = asyncio.run_coroutine_threadsafe(batches.put(item), loop)
+        except RuntimeError:
+            return False
+        while True:
+            try:
+                future.result(timeout=0.1)
+                return True
+            except FutureTimeoutError:
+                if stopped.is_set():
+                    future.cancel()
+                    return False
+
+    def read():
+        busy, rows = 0.0, 0
+        deadline = time.monotonic() + timeout
+
+        def interrupt() -> int:
+            return 1 if stopped.is_set() or time.monotonic() > deadline else 0
+
+        conn = None
+        end: Any = _END
+        try:
+            conn = pool.connect()
+            conn.set_progress_handler(interrupt, PROGRESS_INTERVAL)
+            started = time.monotonic()
+            cursor = conn.execute(sql, params)
+            while not stopped.is_set():
+                batch = cursor.fetchmany(fetch_size)
+                busy += time.monotonic() - started
+                if not batch:
+                    break
+                rows += len(batch)
+                if not put(batch):
+                    break
+                started = time.monotonic()
+                deadline = started + timeout
+        except sqlite3.OperationalError as e:
+            if "interrupted" in str(e) and not stopped.is_set():
+                end = QueryTimeoutError(f"Lote excedeu o tempo limite de {timeout:g}s")
+            else:
+                end = e
+        except Exception as e:
+            end = e
+        finally:
+            if conn is not None:
+                conn.close()
+            if on_finish is not None:
+                on_finish(busy, rows)
+        # Métricas já registradas quando o consumidor recebe o fim
+        if not stopped.is_set():
+            put(end)
+
+    threading.Thread(target=read, name="sqlite-stream", daemon=True).start()
+    try:
+        while True:
+            batch = await batches.get()
+            if batch is _END:
+                return
+            if isinstance(batch, Exception):
+                raise batch
+            yield batch
+    finally:
+        stopped.set()
+
+
+def _fingerprint(sql: str, params: Sequence[Any]) -> str:
+    payload = json.dumps([" ".join(sql.split()), list(params)], default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def max_page_offset() -> int:
+    """Maior offset aceito na paginação por offset (``SQLITE_MAX_PAGE_OFFSET`` ou 10000)."""
+    return int(os.getenv("SQLITE_MAX_PAGE_OFFSET", "10000"))
+
+
+def encode_page_token(sql: str, params: Sequence[Any], offset: int = 0, key: Any = None) -> str:
+    """Gera o token opaco que aponta para a próxima página da consulta.
+
+    Args:
+        sql: Consulta paginada
+        params: Parâmetros da consulta
+        offset: Linhas já lidas (paginação por offset)
+        key: Última chave lida (paginação por chave; tem prioridade sobre ``offset``)
+    """
+    payload = {"q": _fingerprint(sql, params)}
+    if key is not None:
+        payload["k"] = key
+    else:
+        payload["o"] = offset
+    token = json.dumps(payload)
+    return base64.urlsafe_b64encode(token.encode()).decode().rstrip("=")
+
+
+def _decode_token(sql: str, params: Sequence[Any], token: str) -> Dict[str, Any]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        fingerprint = data["q"]
+        if "o" in data:
+            data["o"] = int(data["o"])
+        elif "k" not in data:
+            raise KeyError("o")
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Token de paginação inválido") from e
+
+    if fingerprint != _fingerprint(sql, params) or data.get("o", 0) < 0:
+        raise ValueError("Token de paginação não corresponde à consulta")
+    return data
+
+
+def decode_page_token(sql: str, params: Sequence[Any], token: str) -> int:
+    """Valida um token de paginação por offset e retorna o offset.
+
+    Raises:
+        ValueError: Se o token for inválido, pertencer a outra consulta ou
+            não for de paginação por offset
+    """
+    data = _decode_token(sql, params, token)
+    if "o" not in data:
+        raise ValueError("Token de paginação não corresponde à consulta")
+    return data["o"]
+
+
+def decode_page_key(sql: str, params: Sequence[Any], token: str) -> Any:
+    """Valida um token de paginação por chave e retorna a última chave lida.
+
+    Raises:
+        ValueError: Se o token for inválido, pertencer a outra consulta ou
+            não for de paginação por chave
+    """
+    data = _decode_token(sql, params, token)
+    if "k" not in data:
+        raise ValueError("Token de paginação não corresponde à consulta")
+    return data["k"]
+
+
+def _quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def fetch_page(
+    conn: sqlite3.Connection,
+    sql: str,
+    params: Sequence[Any] = (),
+    page_size: Optional[int] = None,
+    page_token: Optional[str] = None,
+    key: Optional[str] = None
+) -> Dict[str, Any]:
+    """Lê uma página do resultado no formato colunar.
+
+    Com ``key`` (última coluna do SELECT, única e crescente, ex: ``rowid``),
+    a paginação é por chave: cada página filtra ``key > última chave`` e o
+    custo não cresce com a posição. Sem ela, a consulta é envolvida em
+    ``LIMIT/OFFSET``: o SQLite ainda percorre as linhas anteriores à página
+    (custo O(offset) por página), então o offset é limitado a
+    ``SQLITE_MAX_PAGE_OFFSET``; para ler resultados grandes por inteiro use
+    ``iter_batches``. Em ambos os casos no máximo ``page_size + 1`` linhas
+    chegam ao Python.
+
+    Args:
+        conn: Conexão onde a consulta é executada
+        sql: Consulta SQL (SELECT)
+        params: Parâmetros posicionais da consulta
+        page_size: Linhas por página (padrão: ``SQLITE_PAGE_SIZE`` ou 500)
+        page_token: Token devolvido pela página anterior (``None`` = primeira)
+        key: Coluna de paginação por chave (omitida do resultado)
+
+    Returns:
+        Dicionário com ``columns``, ``rows`` (tuplas), ``count`` e
+        ``next_page_token`` (``None`` na última página)
+
+    Raises:
+        ValueError: Se o token for inválido ou o offset exceder o limite
+    """
+    page_size = page_size or default_page_size()
+    params = tuple(params)
+    inner = statement_body(sql)
+
+    if key is not None:
+        column = _quote_identifier(key)
+        if page_token:
+            query = f"SELECT * FROM ({inner}) WHERE {column} > ? ORDER BY {column} LIMIT ?"
+            query_params = params + (decode_page_key(sql, params, page_token), page_size + 1)
+        else:
+            query = f"SELECT * FROM ({inner}) ORDER BY {column} LIMIT ?"
+            query_params = params + (page_size + 1,)
+    else:
+        offset = decode_page_token(sql, params, page_token) if page_token else 0
+        if offset > max_page_offset():
+            raise ValueError(
+                f"Offset de paginação acima do limite ({max_page_offset()}); use a leitura em streaming"
+            )
+        query = f"SELECT * FROM ({inner}) LIMIT ? OFFSET ?"
+        query_params = params + (page_size + 1, offset)
+
+    columns, rows = stream_query(conn, query, query_params, fetch_size=page_size + 1)
+    page = list(rows)
+    if key is not None and (not columns or columns[-1] != key):
+        raise ValueError(f"A coluna de paginação '{key}' deve ser a última do SELECT")
+
+    next_page_token = None
+    if len(page) > page_size:
+        page = page[:page_size]
+        if key is not None:
+            next_page_token = encode_page_token(sql, params, key=page[-1][-1])
+        else:
+            next_page_token = encode_page_token(sql, params, offset + page_size)
+
+    if key is not None:
+        columns = columns[:-1]
+        page = [row[:-1] for row in page]
+
+    return {
+        "columns": columns,
+        "rows": page,
+        "count": len(page),
+        "next_page_token": next_page_token
+    }
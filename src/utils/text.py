@@ -0,0 +1,37 @@
+"""Normalização de texto para roteamento, caches e buscas"""
+
+import re
+import unicodedata
+from typing import List
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+_WHITESPACE_RE = re.compile(r"\s+")
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def normalize_text(text: str, strip_punctuation: bool = True) -> str:
+    """Normaliza texto para comparação.
+    
+    Aplica casefold, remove acentos, opcionalmente remove pontuação e
+    colapsa espaços em branco.
+    
+    Args:
+        text: Texto original
+        strip_punctuation: Remove pontuação quando verdadeiro
+        
+    Returns:
+        Texto normalizado (ex: "Como está o clima em São Paulo?" ->
+        "como esta o clima em sao paulo")
+    """
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    without_accents = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    
+    if strip_punctuation:
+        without_accents = _PUNCTUATION_RE.sub(" ", without_accents)
+    
+    return _WHITESPACE_RE.sub(" ", without_accents).strip()
+
+
+def tokenize(text: str) -> List[str]:
+    """Divide texto normalizado em tokens alfanuméricos."""
+    return _TOKEN_RE.findall(normalize_text(text))
@@ -0,0 +1,146 @@
+"""Cache de observações meteorológicas por janela de tempo, com coalescência de requests"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from src.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Resultado do fetch coalescido quando quem buscava foi cancelado: quem
+# aguardava tenta de novo (e um deles passa a buscar)
+_RETRY = object()
+
+
+class ObservationCache:
+    """Cache de observações indexado por (lat, lon, variáveis, janela de tempo).
+
+    Os dados da Open-Meteo só mudam a cada 15 minutos, então cada entrada
+    vale até o fim da sua janela. Misses concorrentes para a mesma chave são
+    coalescidos: apenas um fetch fica em andamento e os demais aguardam o
+    mesmo resultado.
+    """
+
+    def __init__(
+        self,
+        bucket_seconds: Optional[float] = None,
+        maxsize: Optional[int] = None,
+        clock: Callable[[], float] = time.time
+    ):
+        """Inicializa o cache.
+
+        Args:
+            bucket_seconds: Tamanho da janela (padrão: ``WEATHER_CACHE_BUCKET_SECONDS`` ou 900)
+            maxsize: Máximo de observações (padrão: ``WEATHER_CACHE_SIZE`` ou 1024)
+            clock: Fonte de tempo em segundos (injetável para testes)
+        """
+        self.bucket_seconds = bucket_seconds or float(os.getenv("WEATHER_CACHE_BUCKET_SECONDS", "900"))
+        self.clock = clock
+        self.coalesced = 0
+        self._cache = TTLCache(
+            maxsize=maxsize or int(os.getenv("WEATHER_CACHE_SIZE", "1024")),
+            ttl=self.bucket_seconds,
+            clock=clock
+        )
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def make_key(self, latitude: float, longitude: float, variables: str) -> str:
+        """Monta a chave da observação na janela de tempo atual."""
+        bucket = int(self.clock() // self.bucket_seconds)
+        return f"{latitude:.4f}:{longitude:.4f}:{variables}:{bucket}"
+
+    def remaining(self) -> float:
+        """Segundos até o fim da janela atual (validade das observações em cache)."""
+        return self.bucket_seconds - (self.clock() % self.bucket_seconds)
+
+    def get(self, latitude: float, longitude: float, variables: str) -> Optional[Dict[str, Any]]:
+        """Retorna a observação da janela atual, se já estiver em cache."""
+        return self._cache.get(self.make_key(latitude, longitude, variables))
+
+    def put(self, latitude: float, longitude: float, variables: str, observation: Dict[str, Any]):
+        """Armazena uma observação até o fim da janela atual."""
+        self._cache.set(self.make_key(latitude, longitude, variables), observation, ttl=self.remaining())
+
+    async def get_or_fetch(
+        self,
+        latitude: float,
+        longitude: float,
+        variables: str,
+        fetch: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """Retorna a observação em cache ou executa ``fetch`` (uma vez por chave).
+
+        Args:
+            latitude: Latitude do ponto
+            longitude: Longitude do ponto
+            variables: Variáveis solicitadas à API (ex: "temperature_2m,...")
+            fetch: Corrotina sem argumentos que busca a observação na API
+
+        Returns:
+            Observação (bloco ``current`` da resposta da API)
+        """
+        while True:
+            key = self.make_key(latitude, longitude, variables)
+            cached = self._cache.get(key)
+            if cached is not None:
+                return cached
+
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                return await self._fetch(key, latitude, longitude, variables, fetch)
+
+            self.coalesced += 1
+            observation = await asyncio.shield(inflight)
+            if observation is not _RETRY:
+                return observation
+
+    async def _fetch(
+        self,
+        key: str,
+        latitude: float,
+        longitude: float,
+        variables: str,
+        fetch: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """Executa o fetch da chave, compartilhando o resultado com quem aguarda."""
+        future = asyncio.get_running_loop().create_future()
+        # Evita o aviso "exception was never retrieved" quando ninguém aguarda
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+
+        try:
+            observation = await fetch()
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            self.put(latitude, longitude, variables, observation)
+            future.set_result(observation)
+            return observation
+        finally:
+            self._inflight.pop(key, None)
+            # Cancelamento de quem buscava não é repassado a quem aguarda
+            if not future.done():
+                future.set_result(_RETRY)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas do cache e número de fetches coalescidos."""
+        stats = self._cache.get_stats()
+        stats["coalesced"] = self.coalesced
+        return stats
+
+
+_observation_cache: Optional[ObservationCache] = None
+
+
+def get_observation_cache() -> ObservationCache:
+    """Retorna o cache de observações compartilhado pelo processo."""
+    global _observation_cache
+
+    if _observation_cache is None:
+        _observation_cache = ObservationCache()
+
+    return _observation_cache
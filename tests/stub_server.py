@@ -0,0 +1,117 @@
+"""Servidor HTTP local que imita as APIs externas usadas pelos agentes"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from collections import Counter
+from urllib.parse import parse_qs, urlparse
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        self.server.stub.connections += 1
+
+    def do_GET(self):
+        stub = self.server.stub
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        stub.requests[url.path] += 1
+
+        if stub.delay:
+            time.sleep(stub.delay)
+
+        if url.path.endswith("/forecast"):
+            payload = stub.forecast(params)
+        elif url.path.endswith("/search"):
+            payload = stub.geocode(params)
+        elif "/latest/" in url.path:
+            payload = stub.latest_rates(url.path.rsplit("/", 1)[-1])
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StubServer:
+    """Servidor stub em thread própria, com atraso configurável por request.
+
+    Exemplo:
+        with StubServer(delay=0.05) as stub:
+            os.environ["WEATHER_API_BASE_URL"] = stub.url("/v1/forecast")
+    """
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.connections = 0
+        self.requests = Counter()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def url(self, path: str = "") -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}{path}"
+
+    def forecast(self, params: dict):
+        latitudes = params.get("latitude", "0").split(",")
+        longitudes = params.get("longitude", "0").split(",")
+        locations = [
+            {
+                "latitude": float(latitude),
+                "longitude": float(longitude),
+                "current": {
+                    "temperature_2m": 25.0,
+                    "relative_humidity_2m": 60,
+                    "wind_speed_10m": 10.0,
+                    "weather_code": 1
+                }
+            }
+            for latitude, longitude in zip(latitudes, longitudes)
+        ]
+        # Como a Open-Meteo: objeto para um ponto, lista para vários
+        return locations[0] if len(locations) == 1 else locations
+
+    def geocode(self, params: dict) -> dict:
+        return {
+            "results": [
+                {"name": params.get("name", ""), "latitude": -8.0476, "longitude": -34.877, "country_code": "BR"}
+            ]
+        }
+
+    def latest_rates(self, base: str) -> dict:
+        usd_rates = {"USD": 1.0, "BRL": 5.0, "EUR": 0.92, "GBP": 0.79, "JPY": 150.0}
+        base_in_usd = usd_rates.get(base.upper(), 1.0)
+        return {
+            "base": base.upper(),
+            "rates": {code: rate / base_in_usd for code, rate in usd_rates.items()}
+        }
+
+    def start(self) -> "StubServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
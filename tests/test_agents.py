@@ -2,10 +2,18 @@
 
 import pytest
 import asyncio
+import sqlite3
+from src.utils import weather_cache
+from src.utils import exchange_rates, knowledge_base, sqlite_executor
+from src.utils.http import create_http_client
+from src.utils.query_templates import QueryTemplateRegistry
+from src.utils.sqlite_executor import QueryTimeoutError, SQLiteExecutor
+from src.utils.sqlite_pool import close_all_pools, get_pool
 from src.agents.weather_agent import WeatherAgent
-from src.agents.data_agent import DataAgent
+from src.agents.data_agent import QUERY_TEMPLATES, DataAgent
 from src.agents.finance_agent import FinanceAgent
 from src.agents.info_agent import InformationAgent
+from tests.stub_server import StubServer
 
 
 class TestWeatherAgent:
@@ -23,6 +31,65 @@ class TestWeatherAgent:
         caps = agent.get_capabilities()
         assert len(caps) > 0
         assert "Consultar clima atual" in caps
+    
+    @pytest.mark.asyncio
+    async def test_shared_http_pool(self, monkeypatch):
+        with StubServer() as stub:
+            monkeypatch.setenv("WEATHER_API_BASE_URL", stub.url("/v1/forecast"))
+            monkeypatch.setattr(weather_cache, "_observation_cache", None)
+            agent = WeatherAgent()
+            http_client = create_http_client()
+            await agent.startup(http_client)
+            
+            for city in ["Recife", "Manaus", "Salvador", "Fortaleza", "Curitiba"]:
+                result = await agent.execute(f"Como está o clima em {city}?")
+                assert result["success"] == True
+            
+            await agent.shutdown()
+            await http_client.aclose()
+        
+        assert stub.requests["/v1/forecast"] == 5
+        assert stub.connections == 1
+    
+    def test_extract_multiple_cities(self):
+        agent = WeatherAgent()
+        cities = agent._extract_cities("clima em Sao Paulo, Rio de Janeiro e Curitiba")
+        assert cities == ["São Paulo", "Rio De Janeiro", "Curitiba"]
+    
+    @pytest.mark.asyncio
+    async def test_multi_city_single_request(self, monkeypatch):
+        with StubServer() as stub:
+            monkeypatch.setenv("WEATHER_API_BASE_URL", stub.url("/v1/forecast"))
+            monkeypatch.setattr(weather_cache, "_observation_cache", None)
+            agent = WeatherAgent()
+            result = await agent.execute("clima em São Paulo, Rio de Janeiro e Curitiba")
+        
+        assert result["success"] == True
+        assert [item["city"] for item in result["cities"]] == ["São Paulo", "Rio De Janeiro", "Curitiba"]
+        assert all(item["data"]["temperature"] == 25.0 for item in result["cities"])
+        assert stub.requests["/v1/forecast"] == 1
+
+
+# Consulta de agregação lenta (CTE recursiva) usada para ocupar uma thread de consulta
+SLOW_SQL = """
+    WITH RECURSIVE counter(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM counter)
+    SELECT COUNT(*) FROM counter, travel_bookings
+"""
+
+
+def create_bookings_db(path, bookings):
+    """Cria um banco travel_bookings com as reservas informadas."""
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE travel_bookings ("
+        "id INTEGER PRIMARY KEY, customer_name TEXT, destination TEXT, booking_date TEXT)"
+    )
+    conn.executemany(
+        "INSERT INTO travel_bookings (customer_name, destination, booking_date) VALUES (?, ?, ?)",
+        bookings
+    )
+    conn.commit()
+    conn.close()
 
 
 class TestDataAgent:
@@ -32,17 +99,282 @@ class TestDataAgent:
     async def test_database_query(self):
         agent = DataAgent()
         result = await agent.execute("Quantas reservas temos?")
-        assert "results" in result
+        assert "rows" in result
     
     def test_capabilities(self):
         agent = DataAgent()
         caps = agent.get_capabilities()
         assert "Executar consultas SQL" in caps
+    
+    @pytest.mark.asyncio
+    async def test_pooled_connection(self, tmp_path, monkeypatch):
+        db_path = str(tmp_path / "travel_agency.db")
+        create_bookings_db(db_path, [
+            ("Ana", "Paris", "2024-01-10"),
+            ("Bruno", "Paris", "2024-02-01"),
+            ("Ana", "Lisboa", "2024-03-05"),
+        ])
+        monkeypatch.setenv("DATABASE_PATH", db_path)
+        monkeypatch.setattr(sqlite_executor, "_executor", SQLiteExecutor(max_workers=1))
+        agent = DataAgent()
+        
+        result = await agent.execute("Qual o destino mais popular?")
+        assert result["columns"] == ["destination", "count"]
+        assert result["rows"] == [("Paris", 2)]
+        
+        result = await agent.execute("Quantas reservas temos?")
+        assert result["rows"] == [(3,)]
+        assert len(get_pool(db_path)._connections) == 1
+        sqlite_executor.shutdown_executor()
+        close_all_pools()
+    
+    @pytest.mark.asyncio
+    async def test_parameterized_templates(self, tmp_path, monkeypatch):
+        db_path = str(tmp_path / "travel_agency.db")
+        create_bookings_db(db_path, [
+            ("Ana", "Paris", "2024-01-10"),
+            ("Bruno", "100% Bahia", "2024-02-01"),
+            ("Carla", "Lisboa", "2024-03-05"),
+        ])
+        monkeypatch.setenv("DATABASE_PATH", db_path)
+        agent = DataAgent()
+        agent.templates = QueryTemplateRegistry()
+        for name in QUERY_TEMPLATES.names():
+            template = QUERY_TEMPLATES.get(name)
+            agent.templates.register(template.name, template.sql, template.description, template.page_key)
+        
+        result = await agent.execute("Últimas 2 reservas")
+        assert result["template"] == "latest_bookings"
+        assert result["params"] == [2]
+        assert [row[0] for row in result["rows"]] == ["Carla", "Bruno"]
+        
+        result = await agent.execute("Reservas para paris' OR '1'='1")
+        assert result["success"] == True
+        assert result["rows"] == []
+        
+        result = await agent.execute("Reservas para 100%")
+        assert [row[0] for row in result["rows"]] == ["Bruno"]
+        
+        stats = agent.templates.get_stats()
+        assert stats["bookings_by_destination"]["count"] == 2
+        assert stats["bookings_by_destination"]["rows"] == 1
+        assert stats["latest_bookings"]["p99_ms"] >= stats["latest_bookings"]["p50_ms"] > 0
+        assert stats["top_customer"]["count"] == 0
+        close_all_pools()
+    
+    @pytest.mark.asyncio
+    async def test_index_advisor(self, tmp_path, monkeypatch):
+        db_path = str(tmp_path / "travel_agency.db")
+        create_bookings_db(db_path, [
+            (f"Cliente {i}", destination, f"2024-01-{i % 28 + 1:02d}")
+            for i, destination in enumerate(["Paris", "Lisboa", "Parisópolis", "Roma"] * 25)
+        ])
+        monkeypatch.setenv("DATABASE_PATH", db_path)
+        agent = DataAgent()
+        
+        result = await agent.execute("Reservas para paris")
+        assert result["template"] == "bookings_by_destination"
+        expected = result["rows"]
+        
+        # Sem opt-in o startup não altera o schema do banco
+        await agent.startup()
+        assert agent.index_report == {}
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'index'").fetchone() == (0,)
+        conn.close()
+        
+        monkeypatch.setenv("DATA_AUTO_INDEX", "true")
+        await agent.startup()
+        report = agent.index_report
+        assert "idx_bookings_date" in report["created"]
+        assert "travel_bookings_fts" in report["created"]
+        plans = report["plans"]["latest_bookings"]
+        assert plans["before"] == ["SCAN travel_bookings", "USE TEMP B-TREE FOR ORDER BY"]
+        assert plans["after"] == ["SCAN travel_bookings USING COVERING INDEX idx_bookings_date"]
+        assert "VIRTUAL TABLE" in report["plans"]["bookings_by_destination_fts"]["after"][0]
+        # Contadores (triggers em cada escrita) exigem DATA_SUMMARY_COUNTERS
+        assert "booking_counters" not in report["created"] and not agent.summary_ready
+        
+        result = await agent.execute("Reservas para paris")
+        assert result["template"] == "bookings_by_destination_fts"
+        assert result["rows"] == expected
+        
+        conn = sqlite3.connect(db_path)
+        with conn:
+            conn.execute(
+                "INSERT INTO travel_bookings (customer_name, destination, booking_date) "
+                "VALUES ('Novo', 'Paris', '2024-02-01')"
+            )
+        conn.close()
+        result = await agent.execute("Reservas para paris")
+        assert result["count"] == len(expected) + 1
+        
+        await agent.startup()
+        assert agent.index_report["created"] == []
+        close_all_pools()
+    
+    @pytest.mark.asyncio
+    async def test_summary_counters(self, tmp_path, monkeypatch):
+        db_path = str(tmp_path / "travel_agency.db")
+        create_bookings_db(db_path, [
+            ("Ana", "Paris", "2024-01-10"),
+            ("Bruno", "Paris", "2024-02-01"),
+            ("Ana", "Lisboa", "2024-03-05"),
+        ])
+        monkeypatch.setenv("DATABASE_PATH", db_path)
+        agent = DataAgent()
+        await agent.ensure_indexes(summary=True)
+        
+        result = await agent.execute("Quantas reservas temos?")
+        assert result["template"] == "count_bookings_summary"
+        assert result["rows"] == [(3,)]
+        
+        conn = sqlite3.connect(db_path)
+        with conn:
+            conn.executemany(
+                "INSERT INTO travel_bookings (customer_name, destination, booking_date) VALUES (?, ?, ?)",
+                [("Carla", "Lisboa", "2024-04-01"), ("Carla", "Lisboa", "2024-04-02")]
+            )
+            conn.execute("UPDATE travel_bookings SET customer_name = 'Carla' WHERE id = 1")
+            conn.execute("DELETE FROM travel_bookings WHERE id = 2")
+        
+        assert (await agent.execute("Quantas reservas temos?"))["rows"] == [(4,)]
+        assert (await agent.execute("Qual o destino mais popular?"))["rows"] == [("Lisboa", 3)]
+        result = await agent.execute("Qual cliente tem mais reservas?")
+        assert result["template"] == "top_customer_summary"
+        assert result["rows"] == [("Carla", 3)]
+        assert await agent.check_summary() == {}
+        
+        with conn:
+            conn.execute("UPDATE booking_counters SET count = 99 WHERE kind = 'destination' AND key = 'Paris'")
+        conn.close()
+        assert await agent.check_summary(repair=True) == {"destination": 2}
+        assert await agent.check_summary() == {}
+        assert (await agent.execute("Qual o destino mais popular?"))["rows"] == [("Lisboa", 3)]
+        close_all_pools()
+    
+    @pytest.mark.asyncio
+    async def test_paginated_columnar_results(self, tmp_path, monkeypatch):
+        db_path = str(tmp_path / "travel_agency.db")
+        create_bookings_db(db_path, [(f"Cliente {i}", "Paris", f"2024-01-{i:02d}") for i in range(1, 26)])
+        monkeypatch.setenv("DATABASE_PATH", db_path)
+        agent = DataAgent()
+        
+        pages = []
+        context = {"page_size": 10}
+        while True:
+            result = await agent.execute("Reservas para Paris", context)
+            assert result["success"] == True
+            assert result["columns"] == ["customer_name", "booking_date"]
+            pages.append(result["rows"])
+            if result["next_page_token"] is None:
+                break
+            context = {"page_size": 10, "page_token": result["next_page_token"]}
+        
+        assert [len(page) for page in pages] == [10, 10, 5]
+        assert pages[0][0] == ("Cliente 1", "2024-01-01")
+        
+        streamed = [row async for row in agent.stream("Reservas para Paris", page_size=7)]
+        assert streamed == [row for page in pages for row in page]
+        
+        result = await agent.execute("Quantas reservas temos?", {"page_token": context["page_token"]})
+        assert result["success"] == False
+        close_all_pools()
+    
+    @pytest.mark.asyncio
+    async def test_stream_runs_query_once_without_holding_executor(self, tmp_path, monkeypatch):
+        db_path = str(tmp_path / "travel_agency.db")
+        create_bookings_db(db_path, [(f"Cliente {i}", "Paris", f"2024-01-{i:02d}") for i in range(1, 26)])
+        monkeypatch.setenv("DATABASE_PATH", db_path)
+        monkeypatch.setattr(sqlite_executor, "_executor", SQLiteExecutor(max_workers=1, timeout=0.2))
+        agent = DataAgent()
+        runs = agent.templates.get_stats("bookings_by_destination")["count"]
+        
+        # Consumidor lento: o prazo vale por lote, não pelo stream inteiro
+        streamed = []
+        async for row in agent.stream("Reservas para Paris", page_size=4):
+            streamed.append(row)
+            await asyncio.sleep(0.01)
+        assert len(streamed) == 25
+        assert agent.templates.get_stats("bookings_by_destination")["count"] == runs + 1
+        
+        # Um stream aberto não ocupa a única thread do executor
+        rows = agent.stream("Reservas para Paris", page_size=2, max_pending=1)
+        assert (await rows.__anext__())[0] == "Cliente 1"
+        result = await asyncio.wait_for(agent.execute("Quantas reservas temos?"), timeout=2)
+        assert result["success"] == True
+        await rows.aclose()
+        sqlite_executor.shutdown_executor()
+        close_all_pools()
+    
+    @pytest.mark.asyncio
+    async def test_slow_query_does_not_block_other_agents(self, tmp_path, monkeypatch):
+        db_path = str(tmp_path / "travel_agency.db")
+        create_bookings_db(db_path, [("Ana", "Paris", "2024-01-10")])
+        monkeypatch.setenv("DATABASE_PATH", db_path)
+        monkeypatch.setattr(sqlite_executor, "_executor", SQLiteExecutor(max_workers=2, timeout=1.0))
+        monkeypatch.setattr(weather_cache, "_observation_cache", None)
+        
+        data_agent = DataAgent()
+        data_agent.templates = QueryTemplateRegistry()
+        slow_report = data_agent.templates.register("slow_report", SLOW_SQL)
+        monkeypatch.setattr(data_agent, "_select_template", lambda query: (slow_report, ()))
+        
+        with StubServer() as stub:
+            monkeypatch.setenv("WEATHER_API_BASE_URL", stub.url("/v1/forecast"))
+            slow = asyncio.create_task(data_agent.execute("Relatório completo"))
+            await asyncio.sleep(0.05)
+            
+            started = asyncio.get_running_loop().time()
+            weather, finance = await asyncio.gather(
+                WeatherAgent().execute("Como está o clima em Recife?"),
+                FinanceAgent().execute("Converta 100 USD para BRL")
+            )
+            elapsed = asyncio.get_running_loop().time() - started
+            
+            result = await slow
+        
+        assert weather["success"] and finance["success"]
+        assert elapsed < 0.5
+        assert result["success"] == False
+        assert "tempo limite" in result["error"]
+        sqlite_executor.shutdown_executor()
+        close_all_pools()
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_query_frees_worker(self, tmp_path):
+        db_path = str(tmp_path / "travel_agency.db")
+        create_bookings_db(db_path, [("Ana", "Paris", "2024-01-10")])
+        executor = SQLiteExecutor(max_workers=1, timeout=30)
+        pool = get_pool(db_path)
+        
+        task = asyncio.create_task(executor.run(pool, lambda conn: conn.execute(SLOW_SQL).fetchall()))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        
+        rows = await asyncio.wait_for(
+            executor.run(pool, lambda conn: conn.execute("SELECT COUNT(*) FROM travel_bookings").fetchall()),
+            timeout=1.0
+        )
+        assert rows == [(1,)]
+        
+        with pytest.raises(QueryTimeoutError):
+            await executor.run(pool, lambda conn: conn.execute(SLOW_SQL).fetchall(), timeout=0.1)
+        executor.shutdown()
+        close_all_pools()
 
 
 class TestFinanceAgent:
     """Testes do Finance Agent."""
     
+    @pytest.fixture(autouse=True)
+    def rate_store(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("EXCHANGE_RATE_SNAPSHOT_PATH", str(tmp_path / "exchange_rates.json"))
+        monkeypatch.setattr(exchange_rates, "_store", None)
+    
+
     @pytest.mark.asyncio
     async def test_currency_conversion(self):
         agent = FinanceAgent()
@@ -50,6 +382,41 @@ class TestFinanceAgent:
         assert result["success"] == True
         assert "converted_amount" in result
     
+    @pytest.mark.asyncio
+    async def test_brazilian_formats(self, monkeypatch):
+        agent = FinanceAgent()
+        monkeypatch.setattr(agent.exchange_rates, "snapshot_path", "")
+        agent.exchange_rates.set_table("BRL", {"USD": 0.2})
+        
+        result = await agent.execute("Converta R$ 1.000,50 para USD")
+        assert result["converted_amount"] == 200.1
+        
+        result = await agent.execute("Calcule juros simples de R$ 2.000,00 a 1,5% por 1 ano")
+        assert result["principal"] == 2000.0
+        assert result["periods"] == 12
+        assert result["interest"] == 360.0
+    
+    @pytest.mark.asyncio
+    async def test_batch_operations(self):
+        agent = FinanceAgent()
+        result = await agent.execute("", {"batch": {
+            "operation": "currency_conversion",
+            "amounts": [10, 20, 30],
+            "from_currency": "USD",
+            "to_currency": ["BRL", "EUR", "BRL"]
+        }})
+        assert result["success"] == True
+        assert result["converted_amount"] == [50.0, 18.4, 150.0]
+        
+        result = await agent.execute("", {"batch": {
+            "operation": "interest_schedule", "principals": 1000, "rates": 0.01, "periods": 12
+        }})
+        assert result["count"] == 12
+        assert result["closing_balance"][-1] == 1126.83
+        
+        result = await agent.execute("", {"batch": {"operation": "amortization"}})
+        assert result["success"] == False
+    
     def test_capabilities(self):
         agent = FinanceAgent()
         caps = agent.get_capabilities()
@@ -59,11 +426,36 @@ class TestFinanceAgent:
 class TestInformationAgent:
     """Testes do Information Agent."""
     
+    @pytest.fixture(autouse=True)
+    def shared_knowledge(self, monkeypatch):
+        monkeypatch.setattr(knowledge_base, "_knowledge_base", None)
+    
     @pytest.mark.asyncio
     async def test_info_query(self):
         agent = InformationAgent()
         result = await agent.execute("O que é MCP?")
         assert result["success"] == True
+        assert result["topic"] == "mcp"
+    
+    @pytest.mark.asyncio
+    async def test_file_corpus_shared_and_lazy(self, tmp_path, monkeypatch):
+        (tmp_path / "rag.md").write_text(
+            "# RAG\n\nGeração aumentada por recuperação.\n\n## Conceitos\n- Embeddings\n",
+            encoding="utf-8"
+        )
+        monkeypatch.setenv("INFO_KNOWLEDGE_PATH", str(tmp_path))
+        first, second = InformationAgent(), InformationAgent()
+        assert first.knowledge is second.knowledge
+        assert not first.knowledge.loaded
+        
+        result = await first.execute("Como funcionam embeddings em RAG?")
+        assert result["topic"] == "rag"
+        assert result["information"]["key_concepts"] == ["Embeddings"]
+        
+        result = await second.execute("O que é MCP?")
+        assert result["topic"] == "general"
+        assert result["information"]["available_topics"] == ["rag"]
+        assert first.knowledge.get_stats()["reloads"] == 1
     
     def test_capabilities(self):
         agent = InformationAgent()
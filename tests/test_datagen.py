@@ -0,0 +1,31 @@
+"""Testes do gerador de reservas sintéticas"""
+
+import sqlite3
+
+from benchmarks.datagen import DESTINATIONS, generate_bookings, iter_bookings
+
+
+class TestDataGenerator:
+    """Testes do gerador determinístico de travel_bookings."""
+    
+    def test_deterministic(self):
+        first = [row for batch in iter_bookings(5000, seed=7) for row in batch]
+        second = [row for batch in iter_bookings(5000, seed=7) for row in batch]
+        other = [row for batch in iter_bookings(5000, seed=8) for row in batch]
+        assert len(first) == 5000
+        assert first == second
+        assert first != other
+    
+    def test_skewed_distribution(self, tmp_path):
+        path = generate_bookings(str(tmp_path / "bookings.db"), 20000)
+        conn = sqlite3.connect(path)
+        destinations = conn.execute(
+            "SELECT destination, COUNT(*) FROM travel_bookings GROUP BY destination ORDER BY 2 DESC"
+        ).fetchall()
+        customers = conn.execute("SELECT COUNT(DISTINCT customer_name) FROM travel_bookings").fetchone()[0]
+        conn.close()
+        
+        assert destinations[0][0] == DESTINATIONS[0]
+        assert destinations[0][1] > 5 * destinations[-1][1]
+        assert sum(count for _, count in destinations) == 20000
+        assert 100 < customers <= 1000
@@ -0,0 +1,117 @@
+"""Testes das ferramentas do MCP Server"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from src.mcp import server
+from src.utils import exchange_rates, weather_cache
+from tests.stub_server import StubServer
+
+
+@pytest.fixture
+def stub(monkeypatch, tmp_path):
+    """Servidor stub com 100ms de latência por request."""
+    with StubServer(delay=0.1) as stub:
+        monkeypatch.setenv("EXCHANGE_RATE_SNAPSHOT_PATH", str(tmp_path / "exchange_rates.json"))
+        monkeypatch.setattr(exchange_rates, "_store", None)
+        monkeypatch.setenv("GEOCODING_API_URL", stub.url("/v1/search"))
+        monkeypatch.setenv("WEATHER_API_BASE_URL", stub.url("/v1/forecast"))
+        monkeypatch.setenv("EXCHANGE_RATE_API_URL", stub.url("/v4/latest"))
+        monkeypatch.setenv("GEOCODING_CACHE_PATH", ":memory:")
+        monkeypatch.setattr(server, "_http_client", None)
+        monkeypatch.setattr(server, "_geocoding_cache", None)
+        monkeypatch.setattr(weather_cache, "_observation_cache", None)
+        yield stub
+
+
+class TestAsyncTools:
+    """Testes das ferramentas assíncronas com pool HTTP."""
+    
+    @pytest.mark.asyncio
+    async def test_get_weather(self, stub):
+        result = await server.get_weather("Recife")
+        assert result["temperature"] == 25.0
+        await server.close_http_client()
+    
+    @pytest.mark.asyncio
+    async def test_geocoding_cache(self, stub):
+        await server.get_weather("SÃO PAULO")
+        assert stub.requests["/v1/search"] == 0
+        
+        await server.get_weather("Natal")
+        await server.get_weather("natal")
+        assert stub.requests["/v1/search"] == 1
+        # A segunda consulta a Natal é servida pelo cache de observações
+        assert stub.requests["/v1/forecast"] == 2
+        await server.close_http_client()
+        
+        server.close_geocoding_cache()
+        assert server._geocoding_cache is None
+    
+    @pytest.mark.asyncio
+    async def test_geocoding_cache_off_event_loop(self, stub, monkeypatch):
+        cache = server.get_geocoding_cache()
+        threads = []
+        for name in ("lookup", "store"):
+            method = getattr(cache, name)
+            
+            def record(*args, method=method):
+                threads.append(threading.current_thread())
+                return method(*args)
+            
+            monkeypatch.setattr(cache, name, record)
+        
+        assert (await server._geocode("Natal", "BR"))["name"] == "Natal"
+        assert len(threads) == 2 and threading.main_thread() not in threads
+        await server.close_http_client()
+        server.close_geocoding_cache()
+    
+    @pytest.mark.asyncio
+    async def test_convert_currency(self, stub):
+        result = await server.convert_currency(100, "usd", "brl")
+        assert result["converted_amount"] == 500.0
+        await server.close_http_client()
+    
+    @pytest.mark.asyncio
+    async def test_convert_currency_batch(self, stub):
+        result = await server.convert_currency_batch(
+            [100, 200, 50, 10], ["USD", "usd", "EUR", "BRL"], ["BRL", "EUR", "USD", "XYZ"]
+        )
+        await server.close_http_client()
+        
+        assert result["converted_amount"] == [500.0, 184.0, 54.35, None]
+        assert result["missing_pairs"] == ["BRL/XYZ"]
+        # EUR -> USD sai da tabela do USD por triangulação
+        assert stub.requests["/v4/latest/USD"] == 1
+        assert stub.requests["/v4/latest/EUR"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_shared_rate_table(self, stub):
+        results = [
+            await server.convert_currency(100, "USD", "BRL"),
+            await server.convert_currency(100, "EUR", "GBP"),
+            await server.convert_currency(100, "BRL", "JPY"),
+        ]
+        await server.close_http_client()
+        
+        assert [result["converted_amount"] for result in results] == [500.0, 85.87, 3000.0]
+        assert stub.requests["/v4/latest/USD"] == 1
+        assert sum(count for path, count in stub.requests.items() if "/latest/" in path) == 1
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_overlap(self, stub):
+        calls = 10
+        started = time.perf_counter()
+        cities = ["Recife", "Manaus", "Salvador", "Fortaleza", "Curitiba"]
+        results = await asyncio.gather(
+            *(server.get_weather(city) for city in cities),
+            *(server.convert_currency(10, "EUR", "USD") for _ in range(calls // 2))
+        )
+        elapsed = time.perf_counter() - started
+        await server.close_http_client()
+        
+        assert all("error" not in result for result in results)
+        # Em série seriam 10 requests x 100ms = 1s
+        assert elapsed < 0.75
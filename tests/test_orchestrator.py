@@ -1,8 +1,29 @@
 """Testes do Orquestrador"""
 
+import asyncio
+import json
+import random
+import re
+import time
+
+import httpx
 import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage
+from src.orchestrator import batch
+from src.orchestrator.batch import BatchItem, Checkpoint, iter_batch, run_batch
+from src.orchestrator.cache import RoutingCache
+from src.orchestrator.limiter import LimitedLLM, LLMLimiter, TokenBucket
+from src.agents.base_agent import BaseAgent
+from src.orchestrator.batcher import MicroBatcher
+from src.orchestrator.main import (
+    Orchestrator, create_initial_state, create_orchestrator, parse_agents, route_batch_with_llm, route_with_llm
+)
+from src.orchestrator.response_cache import ResponseCache
+from src.orchestrator.router import LocalRouter
 from src.orchestrator.supervisor import Supervisor
 from src.orchestrator.mcp_client import MCPClient
+from tests.test_utils import FakeClock
 
 
 class TestSupervisor:
@@ -40,4 +61,619 @@ class TestMCPClient:
     async def test_list_tools(self):
         client = MCPClient()
         tools = await client.list_tools()
-        assert len(tools) > 0
\ No newline at end of file
+        assert len(tools) > 0
+
+class TestLocalRouter:
+    """Testes do roteador local baseado nos agent cards."""
+    
+    def test_route_from_cards(self):
+        router = LocalRouter.from_cards()
+        assert router.route("Como está o clima em São Paulo?").agent == "weather_agent"
+        assert router.route("Liste as últimas 5 reservas").agent == "data_agent"
+        assert router.route("Converta 1000 USD para BRL").agent == "finance_agent"
+        assert router.route("Explique o que é LangGraph").agent == "info_agent"
+    
+    def test_confidence_threshold(self):
+        router = LocalRouter.from_cards(threshold=0.6)
+        assert router.is_confident(router.route("Quantas reservas temos no banco?"))
+        assert not router.is_confident(router.route("bom dia"))
+    
+    @pytest.mark.asyncio
+    async def test_llm_only_below_threshold(self):
+        orchestrator = Orchestrator(llm=FakeListChatModel(responses=["weather_agent"]))
+        await orchestrator.process_query("O que é MCP?")
+        result = await orchestrator.process_query("bom dia")
+        
+        stats = orchestrator.get_stats()["routing"]
+        assert stats["local"] == 1
+        assert stats["llm"] == 1
+        assert result["agent"] == "weather_agent"
+        await orchestrator.stop()
+
+
+    def test_split_compound_query(self):
+        router = LocalRouter.from_cards(threshold=0.6)
+        assert router.split("clima em Recife e converta 100 USD para BRL") == {
+            "weather_agent": "clima em Recife",
+            "finance_agent": "converta 100 USD para BRL"
+        }
+        # Pedidos ao mesmo agente (ou vírgula decimal) não dividem a query
+        assert router.split("Converta R$ 1.000,50 para EUR e USD") == {}
+        assert router.split("Como está o clima em São Paulo e Rio de Janeiro?") == {}
+    
+    def test_parse_llm_agents(self):
+        assert parse_agents("weather_agent, finance_agent") == ["weather_agent", "finance_agent"]
+        assert parse_agents("Weather_Agent weather_agent") == ["weather_agent"]
+        assert parse_agents("não sei") == ["info_agent"]
+
+
+class SlowAgent(BaseAgent):
+    """Agente falso que demora ``delay`` segundos e ecoa a sub-query recebida."""
+    
+    def __init__(self, name: str, delay: float, result: dict):
+        super().__init__(name=name, description="teste")
+        self.delay = delay
+        self.result = result
+        self.queries = []
+    
+    async def execute(self, query, context=None):
+        self.queries.append(query)
+        await asyncio.sleep(self.delay)
+        return {"success": True, "agent": self.name, **self.result}
+    
+    def get_capabilities(self):
+        return []
+
+
+class TestFanOut:
+    """Testes do envio paralelo para vários agentes."""
+    
+    def _agents(self, delay: float):
+        return {
+            "weather_agent": SlowAgent("weather_agent", delay, {
+                "city": "Recife", "data": {"temperature": 30, "condition": "Céu limpo", "humidity": 70}
+            }),
+            "finance_agent": SlowAgent("finance_agent", delay / 2, {
+                "operation": "currency_conversion", "original_amount": 100,
+                "from_currency": "USD", "converted_amount": 500.0, "to_currency": "BRL"
+            })
+        }
+    
+    @pytest.mark.asyncio
+    async def test_agents_run_concurrently(self):
+        agents = self._agents(delay=0.3)
+        app = create_orchestrator(
+            FakeListChatModel(responses=["info_agent"]), agents, LocalRouter.from_cards(), RoutingCache(path="")
+        )
+        
+        started = time.perf_counter()
+        state = await app.ainvoke(create_initial_state("clima em Recife e converta 100 USD para BRL"))
+        elapsed = time.perf_counter() - started
+        
+        assert elapsed < 0.45
+        assert agents["weather_agent"].queries == ["clima em Recife"]
+        assert agents["finance_agent"].queries == ["converta 100 USD para BRL"]
+        assert state["current_agent"] == "weather_agent,finance_agent"
+        # Ordem da query, mesmo com o finance_agent terminando antes
+        assert state["final_answer"].index("Recife") < state["final_answer"].index("USD")
+    
+    @pytest.mark.asyncio
+    async def test_llm_multi_label_and_cached_routes(self):
+        agents = self._agents(delay=0.01)
+        cache = RoutingCache(path="")
+        router = LocalRouter.from_cards(threshold=1.1)
+        app = create_orchestrator(
+            FakeListChatModel(responses=["weather_agent, finance_agent"]), agents, router, cache
+        )
+        
+        for _ in range(2):
+            state = await app.ainvoke(create_initial_state("clima em Recife e converta 100 USD para BRL"))
+            assert len(state["results"]) == 2
+        
+        assert cache.get_route("clima em recife e converta 100 usd para brl") == "weather_agent,finance_agent"
+        assert router.get_stats()["llm"] == 1
+        assert router.get_stats()["cache"] == 1
+        # Sem trechos confiáveis para dividir, cada agente recebe a query inteira
+        assert agents["finance_agent"].queries[-1] == "clima em Recife e converta 100 USD para BRL"
+
+
+class TestRoutingCache:
+    """Testes do cache de roteamento."""
+    
+    def test_normalized_keys(self):
+        cache = RoutingCache(maxsize=10, ttl=60, path="")
+        cache.set_route("Como está o clima em São Paulo?", "weather_agent")
+        assert cache.get_route("como esta o CLIMA em sao paulo") == "weather_agent"
+        assert cache.get_stats()["hits"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_repeated_query_skips_llm(self, monkeypatch):
+        # Sem o cache de respostas, a segunda query passa pelo supervisor
+        monkeypatch.setenv("RESPONSE_CACHE_ENABLED", "false")
+        orchestrator = Orchestrator(llm=FakeListChatModel(responses=["weather_agent"]))
+        await orchestrator.process_query("bom dia")
+        await orchestrator.process_query("Bom   dia!")
+        
+        stats = orchestrator.get_stats()["routing"]
+        assert stats["llm"] == 1
+        assert stats["cache"] == 1
+        await orchestrator.stop()
+
+
+class TestResponseCache:
+    """Testes do cache de respostas finais."""
+    
+    def test_normalized_exact_hit(self):
+        cache = ResponseCache(maxsize=10, similarity=0, path="")
+        cache.store("O que é MCP?", {"agent": "info_agent", "answer": "MCP"}, ttl=60)
+        
+        hit = cache.lookup("o que e   mcp")
+        assert hit["answer"] == "MCP"
+        assert hit["cache"] == "exact"
+        assert cache.lookup("O que é LangGraph?") is None
+    
+    def test_ttl_and_uncacheable(self):
+        clock = FakeClock()
+        cache = ResponseCache(maxsize=10, similarity=0, path="", clock=clock)
+        cache.store("clima em recife", {"agent": "weather_agent", "answer": "30°C"}, ttl=60)
+        cache.store("quantas reservas", {"agent": "data_agent", "answer": "42"}, ttl=0)
+        
+        assert cache.lookup("quantas reservas") is None
+        assert cache.lookup("clima em recife") is not None
+        clock.now += 61
+        assert cache.lookup("clima em recife") is None
+        
+        agents = cache.get_stats()["agents"]
+        assert agents["weather_agent"] == {
+            "hits": 1, "near_hits": 0, "misses": 1, "uncacheable": 0, "hit_rate": 0.5
+        }
+        assert agents["data_agent"]["uncacheable"] == 1
+    
+    def test_similar_query_requires_same_numbers(self):
+        cache = ResponseCache(maxsize=10, similarity=0.6, path="")
+        cache.store(
+            "converta 1000 usd para brl por favor",
+            {"agent": "finance_agent", "answer": "R$ 5000"},
+            ttl=60
+        )
+        
+        hit = cache.lookup("converta 1000 usd para brl, por favor!!")
+        assert hit is not None and hit["cache"] == "exact"
+        hit = cache.lookup("converta 1000 usd para brl por gentileza")
+        assert hit is not None and hit["cache"] == "similar"
+        assert cache.lookup("converta 100 usd para brl por favor") is None
+        assert cache.get_stats()["near_hits"] == 1
+    
+    def test_fan_out_counts_each_agent(self):
+        cache = ResponseCache(maxsize=10, similarity=0, path="")
+        response = {"agent": "weather_agent,finance_agent", "answer": "30°C e R$ 5000"}
+        cache.store("clima em recife e cotacao do dolar", response, ttl=60)
+        assert cache.lookup("clima em recife e cotacao do dolar") is not None
+        
+        agents = cache.get_stats()["agents"]
+        assert set(agents) == {"weather_agent", "finance_agent"}
+        assert agents["weather_agent"]["hits"] == agents["finance_agent"]["hits"] == 1
+        assert agents["weather_agent"]["misses"] == agents["finance_agent"]["misses"] == 1
+    
+    def test_persisted_entries_are_similarity_candidates(self, tmp_path):
+        path = str(tmp_path / "responses.db")
+        cache = ResponseCache(maxsize=10, similarity=0.6, path=path)
+        cache.store(
+            "converta 1000 usd para brl por favor",
+            {"agent": "finance_agent", "answer": "R$ 5000"},
+            ttl=60
+        )
+        cache.close()
+        
+        restarted = ResponseCache(maxsize=10, similarity=0.6, path=path)
+        hit = restarted.lookup("converta 1000 usd para brl por gentileza")
+        assert hit is not None and hit["cache"] == "similar"
+        restarted.close()
+    
+    def test_eviction_drops_signatures(self):
+        cache = ResponseCache(maxsize=2, similarity=0.8, path="")
+        for query in ["o que e mcp", "o que e langgraph", "o que e multi agente"]:
+            cache.store(query, {"agent": "info_agent", "answer": query}, ttl=60)
+        
+        assert len(cache) == 2
+        assert set(cache._signatures) == {"o que e langgraph", "o que e multi agente"}
+        assert all("o que e mcp" not in keys for keys in cache._buckets.values())
+        
+        cache.clear()
+        assert not cache._signatures and not cache._buckets
+
+
+class TestOrchestrator:
+    """Testes do Orquestrador de longa duração."""
+    
+    @pytest.mark.asyncio
+    async def test_graph_compiled_once(self):
+        orchestrator = Orchestrator(llm=FakeListChatModel(responses=["info_agent"]))
+        await orchestrator.start()
+        app = orchestrator.app
+        
+        await orchestrator.process_query("O que é MCP?")
+        await orchestrator.process_query("O que é LangGraph?")
+        
+        assert orchestrator.app is app
+        http_client = orchestrator.http_client
+        assert all(agent.http_client is http_client for agent in orchestrator.agents.values())
+        
+        await orchestrator.stop()
+        assert not orchestrator.is_running
+        assert http_client.is_closed
+    
+    @pytest.mark.asyncio
+    async def test_process_query(self):
+        orchestrator = Orchestrator(llm=FakeListChatModel(responses=["info_agent"]))
+        result = await orchestrator.process_query("O que é MCP?")
+        assert result["success"] == True
+        assert result["agent"] == "info_agent"
+        assert "Model Context Protocol" in result["answer"]
+        await orchestrator.stop()
+    
+    @pytest.mark.asyncio
+    async def test_repeated_query_served_from_cache(self):
+        orchestrator = Orchestrator(llm=FakeListChatModel(responses=["info_agent"]))
+        first = await orchestrator.process_query("O que é MCP?")
+        second = await orchestrator.process_query("o que e mcp")
+        
+        assert "cached" not in first
+        assert second["cached"] == "exact"
+        assert second["answer"] == first["answer"]
+        assert orchestrator.get_stats()["routing"]["local"] == 1
+        assert orchestrator.get_stats()["response_cache"]["agents"]["info_agent"]["hits"] == 1
+        
+        # Queries com contexto nunca usam o cache
+        third = await orchestrator.process_query("O que é MCP?", {"user": "x"})
+        assert "cached" not in third
+        await orchestrator.stop()
+
+
+class Crash(BaseException):
+    """Simula a queda do processo no meio de um lote."""
+
+
+class FakeOrchestrator:
+    """Responde cada query após ``delays[query]`` segundos, registrando a concorrência."""
+    
+    def __init__(self, delays=None, crash_on=None):
+        self.delays = delays or {}
+        self.crash_on = crash_on
+        self.running = 0
+        self.max_running = 0
+        self.queries = []
+    
+    async def process_query(self, query, context=None):
+        if query == self.crash_on:
+            raise Crash()
+        self.queries.append(query)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(self.delays.get(query, 0.001))
+        self.running -= 1
+        return {"success": True, "query": query, "agent": "info_agent", "answer": query.upper()}
+
+
+class TestBatch:
+    """Testes do processamento em lote."""
+    
+    @pytest.mark.asyncio
+    async def test_bounded_concurrency_and_order(self):
+        queries = [f"q{i}" for i in range(8)]
+        delays = {query: 0.08 - i * 0.01 for i, query in enumerate(queries)}
+        items = [BatchItem(i, query) for i, query in enumerate(queries)]
+        
+        orchestrator = FakeOrchestrator(delays)
+        started = time.perf_counter()
+        ordered = [r.item.index async for r in iter_batch(orchestrator, items, concurrency=4)]
+        elapsed = time.perf_counter() - started
+        
+        assert ordered == list(range(8))
+        assert orchestrator.max_running == 4
+        assert elapsed < sum(delays.values()) / 2
+        
+        unordered = [r.item.index async for r in iter_batch(FakeOrchestrator(delays), items, 4, ordered=False)]
+        assert sorted(unordered) == list(range(8))
+        assert unordered != list(range(8))
+    
+    @pytest.mark.asyncio
+    async def test_resume_from_checkpoint(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(batch, "CHECKPOINT_EVERY", 1)
+        source = tmp_path / "queries.jsonl"
+        lines = ['{"id": 0, "query": "a"}', "", "b", '{"query": "pare"}', "{quebrado", '{"query": "c"}']
+        source.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        output = str(tmp_path / "out.jsonl")
+        
+        with pytest.raises(Crash):
+            await run_batch(FakeOrchestrator(crash_on="pare"), str(source), output, concurrency=1)
+        
+        orchestrator = FakeOrchestrator()
+        report = await run_batch(orchestrator, str(source), output, concurrency=2)
+        
+        assert orchestrator.queries == ["pare", "c"]
+        assert report.skipped == 3
+        assert (report.processed, report.succeeded, report.failed) == (3, 2, 1)
+        assert set(report.latency_ms) == {"mean", "p50", "p90", "p99", "max"}
+        
+        with open(output, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        assert [r["line"] for r in records] == [0, 2, 3, 4, 5]
+        assert records[0]["id"] == 0 and records[0]["answer"] == "A"
+        assert "JSON inválido" in records[3]["error"]
+    
+    @pytest.mark.asyncio
+    async def test_resume_discards_output_after_checkpoint(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(batch, "CHECKPOINT_EVERY", 2)
+        source = tmp_path / "queries.jsonl"
+        source.write_text("a\nb\nc\npare\nd\n", encoding="utf-8")
+        output = tmp_path / "out.jsonl"
+        
+        # Sem checkpoint, uma saída antiga é sobrescrita
+        output.write_text('{"line": 99}\n', encoding="utf-8")
+        with pytest.raises(Crash):
+            await run_batch(FakeOrchestrator(crash_on="pare"), str(source), str(output), concurrency=1)
+        # "c" foi gravada depois do último checkpoint (após "b")
+        assert [json.loads(line)["line"] for line in output.read_text().splitlines()] == [0, 1, 2]
+        
+        orchestrator = FakeOrchestrator()
+        await run_batch(orchestrator, str(source), str(output), concurrency=1)
+        assert orchestrator.queries == ["c", "pare", "d"]
+        assert [json.loads(line)["line"] for line in output.read_text().splitlines()] == [0, 1, 2, 3, 4]
+    
+    def test_checkpoint_out_of_order(self, tmp_path):
+        source = tmp_path / "queries.jsonl"
+        source.write_text("a\nb\nc\n", encoding="utf-8")
+        checkpoint = Checkpoint(str(tmp_path / "ckpt"))
+        with open(source, "rb") as f:
+            assert [item.query for item in checkpoint.read(f, "query")] == ["a", "b", "c"]
+        
+        checkpoint.complete(2)
+        checkpoint.complete(0)
+        assert (checkpoint.offset, checkpoint.byte_offset, checkpoint.done) == (1, 2, {2})
+        checkpoint.save()
+        
+        resumed = Checkpoint.load(str(tmp_path / "ckpt"))
+        with open(source, "rb") as f:
+            assert [item.query for item in resumed.read(f, "query")] == ["b"]
+        resumed.complete(1)
+        assert (resumed.offset, resumed.byte_offset, resumed.done) == (3, 6, set())
+
+
+class ProviderRateLimit(Exception):
+    """Erro no formato dos clientes dos providers (``status_code`` 429)."""
+    status_code = 429
+
+
+class CapacityLLM:
+    """LLM falso que responde 429 acima de ``capacity`` chamadas simultâneas."""
+    
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.running = 0
+        self.rejected = 0
+    
+    async def ainvoke(self, prompt):
+        if self.running >= self.capacity:
+            self.rejected += 1
+            raise ProviderRateLimit("rate limited")
+        self.running += 1
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        return AIMessage(content="info_agent", usage_metadata={
+            "input_tokens": 10, "output_tokens": 2, "total_tokens": 12
+        })
+
+
+class TestLLMLimiter:
+    """Testes do limitador de chamadas ao LLM."""
+    
+    @pytest.mark.asyncio
+    async def test_aimd_window_backs_off_on_429(self):
+        provider = CapacityLLM(capacity=3)
+        limiter = LLMLimiter(
+            rpm=60000, tpm=10 ** 7, max_concurrency=16, initial_concurrency=16,
+            max_retries=50, base_delay=0.005, rng=random.Random(1)
+        )
+        llm = LimitedLLM(provider, limiter)
+        
+        responses = await asyncio.gather(*(llm.ainvoke(f"query {i}") for i in range(40)))
+        
+        assert all(response.content == "info_agent" for response in responses)
+        stats = limiter.get_stats()
+        assert stats["rate_limited"] == provider.rejected > 0
+        assert stats["retries"] == provider.rejected
+        assert stats["calls"] == 40 + provider.rejected
+        assert stats["limit"] < 16
+        assert stats["failures"] == 0
+        assert set(stats["queue_wait_ms"]) == {"mean", "p50", "p95", "max"}
+    
+    @pytest.mark.asyncio
+    async def test_token_bucket_waits_for_refill(self):
+        clock = FakeClock()
+        sleeps = []
+        
+        async def sleep(seconds):
+            sleeps.append(seconds)
+            clock.now += seconds
+        
+        bucket = TokenBucket(rate_per_minute=60, capacity=2, clock=clock, sleep=sleep)
+        assert await bucket.acquire() == 0
+        assert await bucket.acquire() == 0
+        assert await bucket.acquire() == pytest.approx(1.0)
+        
+        # Consumo acima do reservado atrasa a próxima chamada
+        bucket.adjust(-2)
+        assert await bucket.acquire() == pytest.approx(3.0)
+        assert sleeps == pytest.approx([1.0, 3.0])
+    
+    @pytest.mark.asyncio
+    async def test_non_retryable_errors_propagate(self):
+        class Broken:
+            async def ainvoke(self, prompt):
+                raise ValueError("prompt inválido")
+        
+        limiter = LLMLimiter(rpm=600, tpm=10 ** 6, max_concurrency=4)
+        with pytest.raises(ValueError):
+            await LimitedLLM(Broken(), limiter).ainvoke("x")
+        assert (limiter.calls, limiter.retries, limiter.failures) == (1, 0, 1)
+        assert limiter.in_flight == 0
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_calls_release_slots(self):
+        class Hanging:
+            async def ainvoke(self, prompt):
+                await asyncio.sleep(3600)
+        
+        limiter = LLMLimiter(rpm=60000, tpm=10 ** 7, max_concurrency=2, initial_concurrency=2)
+        llm = LimitedLLM(Hanging(), limiter)
+        # Duas chamadas ocupam a janela e a terceira fica na fila
+        tasks = [asyncio.create_task(llm.ainvoke(f"q{i}")) for i in range(3)]
+        await asyncio.sleep(0.01)
+        assert limiter.in_flight == 2
+        
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        assert limiter.in_flight == 0
+        
+        limiter_llm = LimitedLLM(FakeListChatModel(responses=["ok"]), limiter)
+        response = await asyncio.wait_for(limiter_llm.ainvoke("depois"), timeout=1)
+        assert response.content == "ok"
+    
+    @pytest.mark.asyncio
+    async def test_connection_errors_are_retried(self):
+        class Flaky:
+            calls = 0
+        
+            async def ainvoke(self, prompt):
+                self.calls += 1
+                if self.calls == 1:
+                    raise httpx.ConnectError("conexão recusada")
+                if self.calls == 2:
+                    raise ConnectionResetError("conexão perdida")
+                return "ok"
+        
+        limiter = LLMLimiter(rpm=60000, tpm=10 ** 7, max_concurrency=4, base_delay=0.001)
+        assert await LimitedLLM(Flaky(), limiter).ainvoke("x") == "ok"
+        assert (limiter.retries, limiter.failures, limiter.in_flight) == (2, 0, 0)
+    
+    @pytest.mark.asyncio
+    async def test_backoff_releases_slot_and_tokens(self):
+        clock = FakeClock()
+        during_backoff = []
+        
+        async def sleep(seconds):
+            during_backoff.append((limiter.in_flight, limiter.tokens.tokens))
+            clock.now += seconds
+        
+        class LimitedOnce:
+            calls = 0
+            
+            async def ainvoke(self, prompt):
+                self.calls += 1
+                if self.calls == 1:
+                    raise ProviderRateLimit("rate limited")
+                return "ok"
+        
+        limiter = LLMLimiter(
+            rpm=600, tpm=1000, max_concurrency=1, expected_output_tokens=100,
+            clock=clock, sleep=sleep, rng=random.Random(1)
+        )
+        assert await LimitedLLM(LimitedOnce(), limiter).ainvoke("x") == "ok"
+        
+        # Durante o backoff a vaga está livre e as fichas da tentativa voltaram
+        assert during_backoff == [(0, 1000)]
+        assert limiter.tokens.tokens == pytest.approx(1000 - 101)
+        assert (limiter.retries, limiter.in_flight) == (1, 0)
+    
+    @pytest.mark.asyncio
+    async def test_orchestrator_wraps_llm(self):
+        orchestrator = Orchestrator(llm=FakeListChatModel(responses=["info_agent"]))
+        await orchestrator.process_query("bom dia")
+        
+        assert isinstance(orchestrator.llm, LimitedLLM)
+        assert orchestrator.get_stats()["llm_limiter"]["calls"] == 1
+        await orchestrator.stop()
+
+
+class NumberedLLM:
+    """LLM falso que responde prompts de roteamento individuais e numerados."""
+    
+    def __init__(self, batch_reply=None):
+        self.batch_reply = batch_reply
+        self.batch_calls = 0
+        self.single_calls = 0
+    
+    @staticmethod
+    def classify(query: str) -> str:
+        return "finance_agent" if "juros" in query.lower() else "info_agent"
+    
+    async def ainvoke(self, prompt):
+        await asyncio.sleep(0.001)
+        if "Queries dos usuários" in prompt:
+            self.batch_calls += 1
+            if self.batch_reply is not None:
+                return AIMessage(content=self.batch_reply)
+            lines = re.findall(r"^(\d+)\. (.*)$", prompt, re.MULTILINE)
+            return AIMessage(content="\n".join(f"{n}: {self.classify(q)}" for n, q in lines))
+        self.single_calls += 1
+        query = re.search(r"Query do usuário: (.*)", prompt).group(1)
+        return AIMessage(content=self.classify(query))
+
+
+class TestRoutingBatcher:
+    """Testes do micro-batching do roteamento pelo LLM."""
+    
+    def _batcher(self, llm, max_batch=4, max_wait_ms=20):
+        return MicroBatcher(
+            lambda queries: route_batch_with_llm(llm, queries),
+            lambda query: route_with_llm(llm, query),
+            max_batch=max_batch,
+            max_wait_ms=max_wait_ms
+        )
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_routes_share_prompts(self):
+        llm = NumberedLLM()
+        batcher = self._batcher(llm)
+        queries = [f"juros {i}" if i % 2 else f"pergunta {i}" for i in range(10)]
+        
+        routes = await asyncio.gather(*(batcher.submit(query) for query in queries))
+        
+        assert routes == [[NumberedLLM.classify(query)] for query in queries]
+        assert (llm.batch_calls, llm.single_calls) == (3, 0)
+        assert batcher.get_stats()["avg_batch_size"] == pytest.approx(10 / 3, abs=0.01)
+    
+    @pytest.mark.asyncio
+    async def test_unparseable_lines_fall_back_to_single_routing(self):
+        llm = NumberedLLM(batch_reply="1: finance_agent\n2: não sei\nresto ilegível")
+        batcher = self._batcher(llm)
+        
+        routes = await asyncio.gather(*(batcher.submit(q) for q in ["juros", "pergunta", "juros 2"]))
+        
+        assert routes == [["finance_agent"], ["info_agent"], ["finance_agent"]]
+        assert (llm.batch_calls, llm.single_calls) == (1, 2)
+        assert batcher.get_stats()["fallbacks"] == 2
+    
+    @pytest.mark.asyncio
+    async def test_single_request_skips_batch_prompt(self):
+        llm = NumberedLLM()
+        assert await self._batcher(llm, max_wait_ms=1).submit("juros") == ["finance_agent"]
+        assert (llm.batch_calls, llm.single_calls) == (0, 1)
+    
+    @pytest.mark.asyncio
+    async def test_orchestrator_batches_llm_routing(self, monkeypatch):
+        monkeypatch.setenv("ROUTER_CONFIDENCE_THRESHOLD", "1.1")
+        monkeypatch.setenv("ROUTING_BATCH_WAIT_MS", "50")
+        llm = NumberedLLM()
+        orchestrator = Orchestrator(llm=llm)
+        await orchestrator.start()
+        
+        queries = ["O que é MCP?", "Calcule juros compostos de 1000 a 1% por 12 meses", "O que é LangGraph?"]
+        results = await asyncio.gather(*(orchestrator.process_query(query) for query in queries))
+        
+        assert [result["agent"] for result in results] == ["info_agent", "finance_agent", "info_agent"]
+        assert (llm.batch_calls, llm.single_calls) == (1, 0)
+        assert orchestrator.get_stats()["routing_batcher"]["batched_items"] == 3
+        await orchestrator.stop()
@@ -0,0 +1,686 @@
+"""Testes dos utilitários compartilhados"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import tracemalloc
+
+import numpy as np
+import pytest
+from src.utils.cache import TTLCache
+from src.utils.exchange_rates import ExchangeRateStore
+from src.utils.finance_batch import compound_interest_batch, compound_interest_schedule, convert_batch
+from src.utils.knowledge_base import KnowledgeBase
+from src.utils.finance_parser import parse_finance_query, parse_number
+from src.utils.index_advisor import IndexSpec, apply_indexes, object_exists
+from src.utils.query_templates import QueryTemplateRegistry
+from src.utils.search_index import BM25Index, load_documents
+from src.utils.sqlite_pool import SQLitePool
+from src.utils.sqlite_executor import QueryTimeoutError
+from src.utils.sqlite_stream import decode_page_token, fetch_page, iter_batches, statement_body, stream_query
+from src.utils.text import normalize_text
+from src.utils.weather_cache import ObservationCache
+
+
+class FakeClock:
+    """Relógio manual para testes de expiração."""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+
+class TestNormalizeText:
+    """Testes de normalização de texto."""
+    
+    def test_accents_case_and_spaces(self):
+        assert normalize_text("  Como está o   clima em SÃO Paulo?! ") == "como esta o clima em sao paulo"
+
+
+class TestTTLCache:
+    """Testes do cache LRU/TTL."""
+    
+    def test_lru_eviction(self):
+        cache = TTLCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get_stats()["evictions"] == 1
+    
+    def test_ttl_expiration(self):
+        clock = FakeClock()
+        cache = TTLCache(ttl=10, clock=clock)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=100)
+        clock.now += 11
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+        assert cache.get_stats()["hits"] == 1
+        assert cache.get_stats()["misses"] == 1
+    
+    def test_sqlite_persistence(self, tmp_path):
+        path = str(tmp_path / "cache.db")
+        cache = TTLCache(path=path, table="test_cache")
+        cache.set("a", {"agent": "weather_agent"})
+        cache.close()
+        
+        reopened = TTLCache(path=path, table="test_cache")
+        assert reopened.get("a") == {"agent": "weather_agent"}
+        reopened.close()
+
+
+class TestObservationCache:
+    """Testes do cache de observações meteorológicas."""
+    
+    @pytest.mark.asyncio
+    async def test_coalesces_concurrent_misses(self):
+        cache = ObservationCache(bucket_seconds=900)
+        calls = 0
+        
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return {"temperature_2m": 20.0}
+        
+        results = await asyncio.gather(*(cache.get_or_fetch(-8.0, -34.9, "temperature_2m", fetch) for _ in range(20)))
+        
+        assert calls == 1
+        assert all(result == {"temperature_2m": 20.0} for result in results)
+        assert cache.get_stats()["coalesced"] == 19
+    
+    @pytest.mark.asyncio
+    async def test_new_bucket_refetches(self):
+        clock = FakeClock()
+        cache = ObservationCache(bucket_seconds=900, clock=clock)
+        calls = 0
+        
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            return {"temperature_2m": 20.0 + calls}
+        
+        first = await cache.get_or_fetch(-8.0, -34.9, "temperature_2m", fetch)
+        assert await cache.get_or_fetch(-8.0, -34.9, "temperature_2m", fetch) == first
+        
+        clock.now += 900
+        assert (await cache.get_or_fetch(-8.0, -34.9, "temperature_2m", fetch))["temperature_2m"] == 22.0
+        assert calls == 2
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_fetch_releases_waiters(self):
+        cache = ObservationCache(bucket_seconds=900)
+        started = asyncio.Event()
+        calls = 0
+        
+        async def first_hangs():
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                started.set()
+                await asyncio.sleep(3600)
+            return {"temperature_2m": 20.0}
+        
+        leader = asyncio.create_task(cache.get_or_fetch(-8.0, -34.9, "temperature_2m", first_hangs))
+        await started.wait()
+        followers = [
+            asyncio.create_task(cache.get_or_fetch(-8.0, -34.9, "temperature_2m", first_hangs))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        leader.cancel()
+        
+        # Só a tarefa cancelada termina cancelada; as demais refazem o fetch uma vez
+        results = await asyncio.wait_for(asyncio.gather(*followers), timeout=1)
+        assert results == [{"temperature_2m": 20.0}] * 3
+        assert leader.cancelled()
+        assert calls == 2
+        assert cache._inflight == {}
+
+
+class TestSQLitePool:
+    """Testes do pool de conexões SQLite."""
+    
+    def _make_db(self, tmp_path):
+        path = str(tmp_path / "pool.db")
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.execute("INSERT INTO items (name) VALUES ('a'), ('b')")
+        conn.commit()
+        conn.close()
+        return path
+    
+    def test_connection_reused_per_thread(self, tmp_path):
+        pool = SQLitePool(self._make_db(tmp_path))
+        assert pool.connection() is pool.connection()
+        
+        other = []
+        thread = threading.Thread(target=lambda: other.append(pool.connection()))
+        thread.start()
+        thread.join()
+        assert other[0] is not pool.connection()
+        pool.close()
+    
+    def test_read_only_and_wal(self, tmp_path):
+        pool = SQLitePool(self._make_db(tmp_path), mmap_size=1024 * 1024)
+        assert pool.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 2
+        assert pool.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert pool.execute("PRAGMA mmap_size").fetchone()[0] == 1024 * 1024
+        
+        with pytest.raises(sqlite3.OperationalError):
+            pool.execute("INSERT INTO items (name) VALUES ('c')")
+        pool.close()
+
+
+class TestSQLiteStream:
+    """Testes de streaming e paginação de resultados."""
+    
+    SERIES = "WITH RECURSIVE s(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM s WHERE n < ?) SELECT n, 'x' AS tag FROM s"
+    
+    def test_stream_memory_is_flat(self):
+        conn = sqlite3.connect(":memory:")
+        
+        tracemalloc.start()
+        columns, rows = stream_query(conn, self.SERIES, (200_000,), fetch_size=100)
+        total = sum(1 for _ in rows)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        
+        assert columns == ["n", "tag"]
+        assert total == 200_000
+        assert peak < 512 * 1024
+        conn.close()
+    
+    def test_page_tokens(self):
+        conn = sqlite3.connect(":memory:")
+        
+        first = fetch_page(conn, self.SERIES, (5,), page_size=2)
+        assert first["rows"] == [(1, "x"), (2, "x")]
+        second = fetch_page(conn, self.SERIES, (5,), page_size=2, page_token=first["next_page_token"])
+        assert second["rows"] == [(3, "x"), (4, "x")]
+        last = fetch_page(conn, self.SERIES, (5,), page_size=2, page_token=second["next_page_token"])
+        assert last["rows"] == [(5, "x")]
+        assert last["next_page_token"] is None
+        
+        with pytest.raises(ValueError):
+            decode_page_token(self.SERIES, (6,), first["next_page_token"])
+        with pytest.raises(ValueError):
+            decode_page_token(self.SERIES, (5,), "não-é-token")
+        conn.close()
+    
+    def test_keyset_pages_and_offset_cap(self, monkeypatch):
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE TABLE items (name TEXT)")
+        conn.executemany("INSERT INTO items VALUES (?)", [(f"item {i}",) for i in range(5)])
+        sql = "SELECT name, rowid AS page_key FROM items WHERE name LIKE ? ORDER BY rowid"
+        
+        first = fetch_page(conn, sql, ("item%",), page_size=2, key="page_key")
+        assert first["columns"] == ["name"]
+        assert first["rows"] == [("item 0",), ("item 1",)]
+        # Linhas removidas antes da posição não deslocam as próximas páginas
+        conn.execute("DELETE FROM items WHERE rowid = 1")
+        second = fetch_page(
+            conn, sql, ("item%",), page_size=2, page_token=first["next_page_token"], key="page_key"
+        )
+        assert second["rows"] == [("item 2",), ("item 3",)]
+        
+        explain = f"EXPLAIN QUERY PLAN SELECT * FROM ({sql}) WHERE page_key > ?"
+        plan = [row[3] for row in conn.execute(explain, ("item%", 2))]
+        assert plan == ["SEARCH items USING INTEGER PRIMARY KEY (rowid>?)"]
+        
+        monkeypatch.setenv("SQLITE_MAX_PAGE_OFFSET", "2")
+        page = fetch_page(conn, self.SERIES, (10,), page_size=3)
+        with pytest.raises(ValueError):
+            fetch_page(conn, self.SERIES, (10,), page_size=3, page_token=page["next_page_token"])
+        with pytest.raises(ValueError):
+            fetch_page(conn, sql, ("item%",), page_size=2, page_token=page["next_page_token"], key="page_key")
+        conn.close()
+    
+    @pytest.mark.asyncio
+    async def test_iter_batches_deadline_per_batch(self, tmp_path):
+        path = str(tmp_path / "series.db")
+        sqlite3.connect(path).close()
+        pool = SQLitePool(path)
+        finished = []
+        
+        batches = iter_batches(
+            pool, self.SERIES, (10,), fetch_size=4, timeout=5, on_finish=lambda *args: finished.append(args)
+        )
+        assert [len(batch) async for batch in batches] == [4, 4, 2]
+        assert finished[0][1] == 10
+        
+        endless = "WITH RECURSIVE s(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM s) SELECT COUNT(*) FROM s"
+        with pytest.raises(QueryTimeoutError):
+            async for _ in iter_batches(pool, endless, timeout=0.2):
+                pass
+        pool.close()
+    
+    def test_page_of_query_with_trailing_comment(self):
+        conn = sqlite3.connect(":memory:")
+        
+        assert statement_body("SELECT '--;' AS v; -- fim\n/* nota */ ;") == "SELECT '--;' AS v"
+        page = fetch_page(conn, self.SERIES + "; -- série de teste", (3,), page_size=2)
+        assert page["rows"] == [(1, "x"), (2, "x")]
+        assert fetch_page(conn, "SELECT '--' AS v -- comentário", page_size=2)["rows"] == [("--",)]
+        conn.close()
+
+
+class TestIndexAdvisor:
+    """Testes da criação de índices sob demanda."""
+    
+    SPEC = IndexSpec("items_audit", (
+        "CREATE TABLE IF NOT EXISTS items_audit (item_id INTEGER)",
+        "CREATE TRIGGER IF NOT EXISTS items_audit_ai AFTER INSERT ON items BEGIN "
+        "INSERT INTO items_audit VALUES (new.id); END",
+    ))
+    
+    def test_failed_spec_is_rolled_back(self):
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY)")
+        broken = IndexSpec("items_audit", self.SPEC.statements[:1] + ("CREATE TRIGGER sem_corpo",))
+        
+        report = apply_indexes(conn, "items", [broken], {})
+        assert list(report["failed"]) == ["items_audit"]
+        assert not object_exists(conn, "items_audit")
+        
+        report = apply_indexes(conn, "items", [self.SPEC], {})
+        assert report["created"] == ["items_audit"]
+        assert self.SPEC.objects == ("items_audit", "items_audit_ai")
+        conn.close()
+    
+    def test_incomplete_spec_is_reapplied(self):
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY)")
+        conn.execute(self.SPEC.statements[0])
+        
+        assert apply_indexes(conn, "items", [self.SPEC], {})["created"] == ["items_audit"]
+        conn.execute("INSERT INTO items (id) VALUES (7)")
+        assert conn.execute("SELECT item_id FROM items_audit").fetchall() == [(7,)]
+        assert apply_indexes(conn, "items", [self.SPEC], {})["created"] == []
+        conn.close()
+
+
+class TestQueryTemplateRegistry:
+    """Testes do registro de templates de consulta."""
+    
+    def test_register_and_stats(self):
+        clock = FakeClock()
+        registry = QueryTemplateRegistry(clock=clock)
+        template = registry.register("by_id", "SELECT *\n  FROM items\n  WHERE id = ?")
+        assert template.sql == "SELECT * FROM items WHERE id = ?"
+        
+        with pytest.raises(ValueError):
+            registry.register("by_id", "SELECT 1")
+        
+        def fetch(elapsed):
+            clock.now += elapsed
+            return "ok", 2
+        
+        for elapsed in [0.001] * 98 + [0.050, 0.200]:
+            assert registry.timed("by_id", lambda: fetch(elapsed)) == "ok"
+        
+        stats = registry.get_stats("by_id")
+        assert stats["count"] == 100
+        assert stats["rows"] == 200
+        assert stats["p50_ms"] == pytest.approx(1.0)
+        assert stats["p99_ms"] == pytest.approx(50.0)
+
+
+class TestFinanceBatch:
+    """Testes dos cálculos financeiros em lote."""
+    
+    RATES = {"USD": {"BRL": 5.0, "EUR": 0.92}, "EUR": {"USD": 1.09}}
+    
+    def test_convert_batch_matches_scalar(self):
+        amounts = [i * 1.5 for i in range(1000)]
+        result = convert_batch(amounts, "USD", "BRL", self.RATES)
+        assert result["count"] == 1000
+        assert result["converted_amount"] == [round(amount * 5.0, 2) for amount in amounts]
+        
+        result = convert_batch([1, 1, 1], ["eur", "USD", "BRL"], ["USD", "USD", "JPY"], self.RATES)
+        assert result["rate"] == [1.09, 1.0, None]
+        assert result["missing_pairs"] == ["BRL/JPY"]
+        
+        with pytest.raises(ValueError):
+            convert_batch([1, 2, 3], ["USD", "EUR"], "BRL", self.RATES)
+    
+    def test_compound_interest_batch(self):
+        result = compound_interest_batch([1000, 2000, 500], [0.01, 0.02, 0.0], [12, 6, 10])
+        expected = [round(p * (1 + r) ** n, 2) for p, r, n in [(1000, 0.01, 12), (2000, 0.02, 6), (500, 0.0, 10)]]
+        assert result["final_amount"] == expected
+        assert result["interest_earned"][2] == 0.0
+    
+    def test_schedule(self):
+        result = compound_interest_schedule([1000, 100], [0.1, 0.5], [3, 2])
+        assert result["scenario"] == [0, 0, 0, 1, 1]
+        assert result["period"] == [1, 2, 3, 1, 2]
+        assert result["closing_balance"] == [1100.0, 1210.0, 1331.0, 150.0, 225.0]
+        assert result["interest"] == [100.0, 110.0, 121.0, 50.0, 75.0]
+        assert result["cumulative_interest"][2] == 331.0
+        
+        with pytest.raises(ValueError):
+            compound_interest_schedule(1000, 0.1, -1)
+
+
+class TestFinanceParser:
+    """Testes do parser de queries financeiras."""
+    
+    def test_number_formats(self):
+        assert parse_number("1.000,50") == 1000.5
+        assert parse_number("1,000.50") == 1000.5
+        assert parse_number("12.500") == 12500.0
+        assert parse_number("0,5") == 0.5
+        assert parse_number("1000.75") == 1000.75
+    
+    def test_currency_conversion(self):
+        parsed = parse_finance_query("Converta R$ 1.000,50 para usd")
+        assert parsed.operation == "currency_conversion"
+        assert parsed.amounts == [1000.5]
+        assert parsed.currencies == ["BRL", "USD"]
+        
+        parsed = parse_finance_query("Quanto é 100 dólares em reais?")
+        assert parsed.operation == "currency_conversion"
+        assert parsed.currencies == ["USD", "BRL"]
+        
+        # Códigos ISO pouco comuns só em maiúsculas ("try" não é lira turca)
+        parsed = parse_finance_query("Converter 50 TRY para SEK, try all")
+        assert parsed.currencies == ["TRY", "SEK"]
+        # Em contexto de moeda qualquer código ISO vale, em qualquer caixa
+        parsed = parse_finance_query("converta 100 sek para chf")
+        assert (parsed.operation, parsed.currencies) == ("currency_conversion", ["SEK", "CHF"])
+        assert parse_finance_query("converta nok em dkk").currencies == ["NOK", "DKK"]
+        assert parse_finance_query("try all the top rates").currencies == []
+    
+    def test_exchange_rate_and_interest(self):
+        parsed = parse_finance_query("Qual a taxa de câmbio do EUR para BRL?")
+        assert parsed.operation == "exchange_rate"
+        assert parsed.currencies == ["EUR", "BRL"]
+        
+        parsed = parse_finance_query("Calcule juros compostos de 10.000 a 0,5% por 2 anos")
+        assert parsed.operation == "interest_calculation"
+        assert parsed.amounts == [10000.0]
+        assert parsed.rate == pytest.approx(0.005)
+        assert parsed.periods == 24
+        assert parsed.compound
+        
+        assert parse_finance_query("Qual a previsão do tempo?").operation is None
+
+
+class TestBM25Index:
+    """Testes do índice de busca da base de conhecimento."""
+    
+    DOCUMENTS = {
+        "arquitetura hexagonal": {
+            "definition": "Padrão que isola o domínio das dependências externas.",
+            "key_concepts": ["Portas", "Adaptadores"]
+        },
+        "mcp": {
+            "definition": "Protocolo que padroniza o contexto fornecido a LLMs.",
+            "key_concepts": ["Ferramentas", "Cliente-servidor"]
+        },
+        "langgraph": {
+            "definition": "Biblioteca de grafos de estados para aplicações multi-agente com LLMs.",
+            "key_concepts": ["Nós", "Arestas"]
+        },
+    }
+    
+    def test_ranking(self):
+        index = BM25Index.build(self.DOCUMENTS)
+        assert index.search("O que é MCP?")[0].topic == "mcp"
+        assert index.search("portas e adaptadores")[0].topic == "arquitetura hexagonal"
+        
+        hits = index.search("LLMs e grafos", k=5)
+        assert [hit.topic for hit in hits] == ["langgraph", "mcp"]
+        assert hits[0].score > hits[1].score
+        assert index.search("clima em Paris") == []
+    
+    def test_frequent_terms_match_exhaustive(self):
+        rng = np.random.default_rng(7)
+        words = [f"termo{i}" for i in range(50)]
+        documents = {
+            f"doc {i}": {"definition": " ".join(["comum"] * int(rng.integers(1, 4)) + list(rng.choice(words, 8)))}
+            for i in range(400)
+        }
+        index = BM25Index.build(documents)
+        
+        for query in ["comum termo3", "comum doc termo7 termo8", "termo1 termo2"]:
+            candidates, scores = index._accumulate(index._postings(query))
+            expected = sorted(zip(-scores, candidates.tolist()))[:5]
+            hits = index.search(query, k=5)
+            assert [hit.doc_id for hit in hits] == [doc_id for _, doc_id in expected]
+            assert [hit.score for hit in hits] == pytest.approx([-score for score, _ in expected])
+    
+    def test_save_and_mmap_load(self, tmp_path):
+        path = str(tmp_path / "knowledge.idx")
+        BM25Index.build(self.DOCUMENTS).save(path)
+        
+        index = BM25Index.load(path)
+        assert isinstance(index.posting_weights, np.memmap)
+        assert len(index) == 3 and "mcp" in index
+        hit = index.search("protocolo de contexto")[0]
+        assert hit.topic == "mcp"
+        assert index.document(hit.doc_id) == self.DOCUMENTS["mcp"]
+        
+        (tmp_path / "broken.idx").write_bytes(b"not an index")
+        with pytest.raises(ValueError):
+            BM25Index.load(str(tmp_path / "broken.idx"))
+    
+    def test_load_documents(self, tmp_path):
+        (tmp_path / "rag.md").write_text(
+            "# RAG\n\nGeração aumentada por recuperação de documentos.\n\n"
+            "## Conceitos-chave\n- Recuperação\n- Embeddings\n",
+            encoding="utf-8"
+        )
+        (tmp_path / "extra.json").write_text(
+            '[{"topic": "BM25", "definition": "Função de ranking."}]', encoding="utf-8"
+        )
+        (tmp_path / "invalid.json").write_text("{", encoding="utf-8")
+        
+        documents = load_documents([str(tmp_path)])
+        assert documents["rag"] == {
+            "definition": "Geração aumentada por recuperação de documentos.",
+            "key_concepts": ["Recuperação", "Embeddings"]
+        }
+        assert documents["bm25"] == {"definition": "Função de ranking."}
+        assert BM25Index.build(documents).search("embeddings")[0].topic == "rag"
+
+
+class TestKnowledgeBase:
+    """Testes da base de conhecimento em arquivos."""
+    
+    @staticmethod
+    def _write(path, topic, definition, mtime_ns):
+        path.write_text(f"# {topic}\n\n{definition}\n", encoding="utf-8")
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    
+    def test_lazy_load_and_hot_reload(self, tmp_path):
+        self._write(tmp_path / "a.md", "Alfa", "Primeira letra grega.", 10**18)
+        self._write(tmp_path / "b.md", "Beta", "Segunda letra grega.", 10**18)
+        clock = FakeClock()
+        knowledge = KnowledgeBase([str(tmp_path)], index_path="", reload_interval=5, clock=clock)
+        assert knowledge.get_stats()["loaded"] is False
+        
+        hits, document = knowledge.search("segunda letra")
+        assert hits[0].topic == "beta"
+        assert document == {"definition": "Segunda letra grega."}
+        assert knowledge.get_stats()["parsed_files"] == 2
+        
+        # Conteúdo alterado: só b.md é reprocessado, após o intervalo
+        self._write(tmp_path / "b.md", "Beta", "Letra com som de B.", 2 * 10**18)
+        assert knowledge.search("som")[0] == []
+        clock.now += 5
+        assert knowledge.search("som")[0][0].topic == "beta"
+        assert knowledge.get_stats()["parsed_files"] == 3
+        
+        # Mesmo conteúdo com novo mtime: nada é reconstruído
+        os.utime(tmp_path / "a.md", ns=(3 * 10**18, 3 * 10**18))
+        clock.now += 5
+        assert knowledge.refresh() is False
+        
+        (tmp_path / "b.md").unlink()
+        assert knowledge.refresh() is True
+        assert knowledge.topics() == ["alfa"]
+    
+    @pytest.mark.asyncio
+    async def test_background_reload_reuses_unchanged_documents(self, tmp_path):
+        self._write(tmp_path / "a.md", "Alfa", "Primeira letra grega.", 10**18)
+        self._write(tmp_path / "b.md", "Beta", "Segunda letra grega.", 10**18)
+        clock = FakeClock()
+        knowledge = KnowledgeBase([str(tmp_path)], index_path="", reload_interval=5, clock=clock)
+        
+        hits, _ = await knowledge.asearch("segunda letra")
+        assert hits[0].topic == "beta"
+        assert knowledge.get_stats()["analyzed_documents"] == 2
+        
+        # A busca não espera a recarga: responde com o índice anterior
+        self._write(tmp_path / "b.md", "Beta", "Letra com som de B.", 2 * 10**18)
+        clock.now += 5
+        assert (await knowledge.asearch("som"))[0] == []
+        await knowledge._refresh_task
+        assert (await knowledge.asearch("som"))[0][0].topic == "beta"
+        assert await knowledge.atopics() == ["alfa", "beta"]
+        
+        # Só o documento alterado foi tokenizado de novo
+        stats = knowledge.get_stats()
+        assert (stats["reloads"], stats["analyzed_documents"]) == (2, 3)
+    
+    def test_persisted_index(self, tmp_path):
+        corpus = tmp_path / "corpus"
+        corpus.mkdir()
+        self._write(corpus / "a.md", "Alfa", "Primeira letra grega.", 10**18)
+        index_path = str(tmp_path / "knowledge.idx")
+        
+        KnowledgeBase([str(corpus)], index_path=index_path).refresh()
+        reopened = KnowledgeBase([str(corpus)], index_path=index_path)
+        assert reopened.search("primeira")[0][0].topic == "alfa"
+        assert reopened.get_stats()["parsed_files"] == 0
+        
+        # Tópico redefinido em outro arquivo: o último arquivo vence e, ao
+        # removê-lo, a definição original volta
+        self._write(corpus / "z.md", "Alfa", "Redefinida.", 10**18)
+        assert reopened.refresh() is True
+        assert reopened.get("alfa") == {"definition": "Redefinida."}
+        (corpus / "z.md").unlink()
+        reopened.refresh()
+        assert reopened.get("alfa") == {"definition": "Primeira letra grega."}
+
+
+class TestExchangeRateStore:
+    """Testes do cache de taxas de câmbio."""
+    
+    USD_RATES = {"USD": 1.0, "BRL": 5.0, "EUR": 0.92, "JPY": 150.0}
+    
+    def _fetcher(self, calls, fail=False):
+        async def get_json(url):
+            calls.append(url.rsplit("/", 1)[-1])
+            await asyncio.sleep(0.01)
+            if fail:
+                raise ConnectionError("offline")
+            return {"rates": self.USD_RATES}
+        return get_json
+    
+    @pytest.mark.asyncio
+    async def test_triangulation_and_ttl(self, tmp_path):
+        clock = FakeClock()
+        store = ExchangeRateStore(ttl=60, snapshot_path=str(tmp_path / "rates.json"), clock=clock)
+        calls = []
+        get_json = self._fetcher(calls)
+        
+        rates = await asyncio.gather(*(store.rate("EUR", "BRL", get_json) for _ in range(10)))
+        assert rates[0] == pytest.approx(5.0 / 0.92)
+        assert await store.rate("JPY", "EUR", get_json) == pytest.approx(0.92 / 150.0)
+        assert calls == ["USD"]
+        
+        clock.now += 45
+        assert store.remaining_ttl(["USD", "EUR"]) == pytest.approx(15)
+        assert store.remaining_ttl(["EUR"]) == 0
+        
+        clock.now += 16
+        assert store.remaining_ttl(["USD"]) == 0
+        await store.rate("USD", "BRL", get_json)
+        assert calls == ["USD", "USD"]
+        assert await store.rate("USD", "XYZ", get_json) is None
+    
+    @pytest.mark.asyncio
+    async def test_cross_rates_from_pivot_table(self, tmp_path, monkeypatch):
+        path = tmp_path / "rates.json"
+        store = ExchangeRateStore(ttl=60, snapshot_path=str(path), clock=FakeClock())
+        threads = []
+        write_snapshot = store._write_snapshot
+        
+        def record_thread(*args):
+            threads.append(threading.current_thread())
+            write_snapshot(*args)
+        
+        monkeypatch.setattr(store, "_write_snapshot", record_thread)
+        calls = []
+        matrix = await store.cross_rates(["usd", "BRL", "EUR", "JPY"], self._fetcher(calls))
+        
+        assert calls == ["USD"]
+        assert matrix["EUR"]["BRL"] == pytest.approx(5.0 / 0.92)
+        assert matrix["JPY"]["JPY"] == 1.0
+        assert len(matrix) == 4 and all(len(row) == 4 for row in matrix.values())
+        # Snapshot gravado fora do event loop
+        assert threads and threading.main_thread() not in threads
+        assert path.exists()
+        
+        # Moeda fora da tabela pivô: só os pares com ela consultam ``rate``
+        pairs = []
+        rate = store.rate
+        
+        async def record_pair(source, target, get_json=None):
+            pairs.append((source, target))
+            return await rate(source, target, get_json)
+        
+        monkeypatch.setattr(store, "rate", record_pair)
+        matrix = await store.cross_rates(["USD", "BRL", "XYZ"], self._fetcher(calls, fail=True))
+        assert all("XYZ" in pair for pair in pairs) and len(set(pairs)) == 5
+        assert matrix["USD"] == {"USD": 1.0, "BRL": 5.0}
+    
+    @pytest.mark.asyncio
+    async def test_offline_start_from_snapshot(self, tmp_path):
+        clock = FakeClock()
+        path = str(tmp_path / "rates.json")
+        online = ExchangeRateStore(ttl=60, snapshot_path=path, clock=clock)
+        await online.rate("USD", "JPY", self._fetcher([]))
+        
+        clock.now += 3600
+        calls = []
+        offline = ExchangeRateStore(ttl=60, snapshot_path=path, retry_after=30, clock=clock)
+        assert await offline.rate("BRL", "JPY", self._fetcher(calls, fail=True)) == pytest.approx(30.0)
+        assert await offline.rate("BRL", "JPY", self._fetcher(calls, fail=True)) == pytest.approx(30.0)
+        assert calls == ["USD"]
+        assert offline.get_stats()["stale"] == 2
+        
+        empty = ExchangeRateStore(snapshot_path="", clock=clock)
+        assert await empty.rate("USD", "BRL", self._fetcher([], fail=True)) == 5.0
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_fetch_releases_waiters(self):
+        store = ExchangeRateStore(snapshot_path="", clock=FakeClock())
+        started = asyncio.Event()
+        calls = []
+        
+        async def first_hangs(url):
+            calls.append(url)
+            if len(calls) == 1:
+                started.set()
+                await asyncio.sleep(3600)
+            return {"rates": self.USD_RATES}
+        
+        owner = asyncio.create_task(store.rate("USD", "BRL", first_hangs))
+        await started.wait()
+        waiter = asyncio.create_task(store.rate("USD", "BRL", first_hangs))
+        await asyncio.sleep(0)
+        owner.cancel()
+        
+        # Quem aguardava o fetch cancelado é liberado e busca de novo
+        assert await asyncio.wait_for(waiter, timeout=1) == 5.0
+        assert len(calls) == 2
+        assert store._inflight == {}